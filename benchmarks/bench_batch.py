@@ -0,0 +1,48 @@
+"""
+Compare the scalar get_average_return loop with the batch engine over the full catalog.
+
+Usage: python benchmarks/bench_batch.py [path/to/index.json.gz]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import relic_engine  # noqa: E402
+
+
+def main(index_path, scenarios=1000):
+    relic_engine.load_index(index_path)
+    relic_engine.get_batch_arrays()
+
+    start = time.perf_counter()
+    scalar = np.array([[[relic_engine.get_average_return(relic, refinement[0], style[0])
+                         for style in relic_engine.STYLES]
+                        for refinement in relic_engine.REFINEMENTS]
+                       for relic in relic_engine.get_relic_list()])
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table = relic_engine.get_average_returns()
+    batch_time = time.perf_counter() - start
+
+    calls = scalar.size
+    print(f"scalar: {calls} calls in {scalar_time * 1000:.1f} ms")
+    print(f"batch:  {batch_time * 1000:.2f} ms ({scalar_time / batch_time:.0f}x)")
+    print(f"max abs difference after rounding: {np.abs(np.round(table.values, 3) - scalar).max():.4f}")
+
+    arrays = relic_engine.get_batch_arrays()
+    matrix = arrays.prices * np.random.default_rng(0).uniform(0.5, 1.5, (scenarios, len(arrays.parts)))
+    start = time.perf_counter()
+    relic_engine.get_scenario_returns(matrix)
+    sweep_time = time.perf_counter() - start
+    print(f"scenario sweep: {scenarios} scenarios in {sweep_time * 1000:.0f} ms "
+          f"(scalar estimate {scalar_time * scenarios:.0f} s)")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'index.json.gz'))
@@ -0,0 +1,71 @@
+"""
+Compare loading index.json.gz against the memory-mapped binary index.
+
+Usage: python benchmarks/bench_binary.py [path/to/index.json.gz]
+
+The binary form is generated next to a temporary copy of the JSON index. Each load runs in a fresh
+interpreter, timing ``load_index`` plus a first ``get_relic_drops``/``get_price``/``get_ducats``.
+tests/test_binary.py checks that the two forms agree.
+"""
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from relic_engine.binary import encode_binary_index  # noqa: E402
+
+PROBE = """
+import json, resource, sys, time
+import relic_engine
+t0 = time.perf_counter()
+relic_engine.load_index(sys.argv[1])
+t1 = time.perf_counter()
+relic_engine.get_relic_drops('Axi A1', 'Radiant')
+relic_engine.get_price('Ash Prime Set')
+relic_engine.get_ducats('Ash Prime Blueprint')
+t2 = time.perf_counter()
+print(json.dumps({'load_ms': (t1 - t0) * 1000, 'first_lookup_ms': (t2 - t1) * 1000,
+                  'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+REPEATS = 5
+
+
+def _probe(path):
+    runs = []
+    for _ in range(REPEATS):
+        result = subprocess.run([sys.executable, '-c', PROBE, path], cwd=ROOT, capture_output=True, text=True,
+                                check=True)
+        runs.append(json.loads(result.stdout))
+
+    return {key: sorted(run[key] for run in runs)[REPEATS // 2] for key in runs[0]}
+
+
+def main(index_path):
+    with open(index_path, 'rb') as fp:
+        raw = fp.read()
+    index = json.loads(gzip.decompress(raw))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'index.json.gz')
+        binary_path = os.path.join(tmp, 'index.bin')
+        with open(json_path, 'wb') as fp:
+            fp.write(raw)
+        with open(binary_path, 'wb') as fp:
+            fp.write(encode_binary_index(index, hashlib.sha1(raw).hexdigest()))
+
+        print(f"{'format':16} {'bytes':>8} {'load ms':>8} {'lookup ms':>10} {'max rss kB':>11}")
+        for label, path in (('index.json.gz', json_path), ('index.bin', binary_path)):
+            result = _probe(path)
+            print(f"{label:16} {os.path.getsize(path):8} {result['load_ms']:8.2f} "
+                  f"{result['first_lookup_ms']:10.2f} {result['max_rss_kb']:11}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'index.json.gz'))
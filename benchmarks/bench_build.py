@@ -0,0 +1,72 @@
+"""
+Compare serial and concurrent source fetching in build_index.build_files against a local stand-in server.
+
+Usage: python benchmarks/bench_build.py [latency_seconds]
+
+The server answers ``/<host>/<path>`` from benchmarks/fixtures/sources (falling back to the ``.gz``
+copy) after an artificial delay per request, standing in for the real sources' round trips.
+"""
+import gzip
+import http.server
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES = os.path.join(ROOT, 'benchmarks', 'fixtures', 'sources')
+sys.path.insert(0, ROOT)
+
+import build_index  # noqa: E402
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        path = self.path.split('?')[0]
+        path = os.path.join(SOURCES, *(path + ('index.html' if path.endswith('/') else '')).strip('/').split('/'))
+        if os.path.exists(path):
+            with open(path, 'rb') as fp:
+                payload = fp.read()
+        elif os.path.exists(path + '.gz'):
+            with gzip.open(path + '.gz', 'rb') as fp:
+                payload = fp.read()
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(latency):
+    _Handler.latency = latency
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mirror = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"Artificial latency per request: {latency * 1000:.0f} ms")
+    results = {}
+    for label, workers in [('serial', 1), ('concurrent', 8)]:
+        fetcher = build_index.SourceFetcher(mirror=mirror, workers=workers)
+        start = time.perf_counter()
+        results[label] = build_index.build_files(fetcher=fetcher)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n{label} ({workers} worker{'s' if workers > 1 else ''}): {elapsed:.2f}s")
+        print(fetcher.report())
+
+    assert results['serial'] == results['concurrent'], "serial and concurrent builds differ"
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.25)
@@ -0,0 +1,54 @@
+"""
+Compare the streaming drop table parser with the BeautifulSoup reference on the saved fixture.
+
+Usage: python benchmarks/bench_droptables.py [path/to/droptables(.gz)]
+
+Each parser runs in its own interpreter so peak RSS is not shared between them.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE = os.path.join(ROOT, 'benchmarks', 'fixtures', 'sources', 'www.warframe.com', 'droptables.gz')
+
+PROBE = """
+import gzip, json, resource, sys, time
+import build_index
+with open(sys.argv[2], 'rb') as fp:
+    data = fp.read()
+if data[:2] == b'\\x1f\\x8b':
+    data = gzip.decompress(data)
+html = data.decode('utf-8')
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+relics, nv_relics = getattr(build_index, sys.argv[1])(html)
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': elapsed, 'peak_rss_kb': peak, 'parse_rss_kb': peak - before,
+                  'result': [relics, sorted(nv_relics)]}))
+"""
+
+
+def _run(parser, fixture):
+    result = subprocess.run([sys.executable, '-c', PROBE, parser, fixture], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def main(fixture):
+    results = {parser: _run(parser, fixture) for parser in ('build_relic_list_soup', 'build_relic_list')}
+
+    print(f"{'parser':24} {'seconds':>8} {'peak RSS MB':>12} {'parse RSS MB':>13}")
+    for parser, result in results.items():
+        print(f"{parser:24} {result['seconds']:8.2f} {result['peak_rss_kb'] / 1024:12.1f} "
+              f"{result['parse_rss_kb'] / 1024:13.1f}")
+
+    identical = results['build_relic_list']['result'] == results['build_relic_list_soup']['result']
+    print(f"identical output: {identical}")
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else FIXTURE))
@@ -0,0 +1,73 @@
+"""
+Compare ways of writing relic_data.json and set_data.json: the former JSON round trip, the direct dicts and
+the streaming writer.
+
+Usage: python benchmarks/bench_json_output.py [path/to/index.json.gz]
+
+Wall time is measured on its own; peak memory is measured in a second pass under tracemalloc, which slows
+Python down and would skew the times.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import relic_engine  # noqa: E402
+
+
+def round_trip(relic_path, set_path):
+    relic_data, set_data = relic_engine.build_json_files()
+    relic_data, set_data = json.loads(json.dumps(relic_data)), json.loads(json.dumps(set_data))
+    for path, data in [(relic_path, relic_data), (set_path, set_data)]:
+        with open(path, 'w') as fp:
+            json.dump(data, fp, indent=4)
+
+
+def direct(relic_path, set_path):
+    relic_data, set_data = relic_engine.build_json_files()
+    for path, data in [(relic_path, relic_data), (set_path, set_data)]:
+        with open(path, 'w') as fp:
+            json.dump(data, fp, indent=4)
+
+
+def streaming(relic_path, set_path):
+    relic_engine.write_json_files(relic_path, set_path)
+
+
+def main(index_path):
+    relic_engine.load_index(index_path)
+    relic_engine.build_json_files()
+
+    with tempfile.TemporaryDirectory() as directory:
+        outputs = {}
+        for name, write in [('round trip', round_trip), ('direct', direct), ('streaming', streaming)]:
+            paths = [os.path.join(directory, f"{name}-{file}") for file in ('relic_data.json', 'set_data.json')]
+
+            start = time.perf_counter()
+            write(*paths)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            write(*paths)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            outputs[name] = []
+            for path in paths:
+                with open(path, 'rb') as fp:
+                    outputs[name].append(fp.read())
+
+            print(f"{name:>10}: {elapsed * 1000:7.1f} ms, peak {peak / 2 ** 20:6.1f} MiB")
+
+    assert outputs['direct'] == outputs['round trip'], "direct output differs from the round trip"
+    assert outputs['streaming'] == outputs['round trip'], "streamed output differs from the round trip"
+    print(f"outputs identical ({sum(map(len, outputs['streaming'])) / 2 ** 20:.1f} MiB)")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'index.json.gz'))
@@ -0,0 +1,89 @@
+"""
+Check and time the streaming manifest index decoder against the old byte-by-byte truncation loop.
+
+Usage: python benchmarks/bench_lzma.py
+
+Payloads are synthetic: xz and LZMA-alone streams, and an LZMA-alone stream without its end
+marker, each followed by 0, 1 and thousands of garbage bytes.
+"""
+import lzma
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from build_index import decompress_lzma_stream  # noqa: E402
+
+GARBAGE_SIZES = (0, 1, 5000)
+
+
+def _legacy_decompress(data):
+    """The decoder fix() used before streaming, kept here as the timing reference."""
+    results = []
+    while True:
+        decomp = lzma.LZMADecompressor(lzma.FORMAT_AUTO, None, None)
+        try:
+            res = decomp.decompress(data)
+        except lzma.LZMAError:
+            if results:
+                break
+            else:
+                raise
+        results.append(res)
+        data = decomp.unused_data
+        if not data:
+            break
+        if not decomp.eof:
+            raise lzma.LZMAError("Compressed data ended before the end-of-stream marker was reached")
+    return b"".join(results)
+
+
+def _legacy_fix(byt):
+    length = len(byt)
+    while True:
+        try:
+            return _legacy_decompress(byt[0:length])
+        except lzma.LZMAError:
+            length -= 1
+
+
+def _chunks(data, size=1 << 14):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def main():
+    rng = random.Random(0)
+    text = '\r\n'.join(f"ExportItem{i}_en.json!00_{rng.getrandbits(64):016x}" for i in range(2000)).encode()
+    payloads = {
+        'xz': lzma.compress(text),
+        'alone': lzma.compress(text, format=lzma.FORMAT_ALONE),
+        # Drop the end marker and pad with a byte the decoder accepts, like the published index.
+        'alone, no end marker': lzma.compress(text, format=lzma.FORMAT_ALONE)[:-5] + b'\x00',
+    }
+
+    failures = 0
+    print(f"{'payload':22} {'garbage':>8} {'ignored':>8} {'stream ms':>10} {'legacy ms':>10}  ok")
+    for name, payload in payloads.items():
+        for size in GARBAGE_SIZES:
+            data = payload + bytes(rng.getrandbits(8) for _ in range(size))
+
+            start = time.perf_counter()
+            output, ignored = decompress_lzma_stream(_chunks(data))
+            stream_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            legacy = _legacy_fix(data)
+            legacy_time = time.perf_counter() - start
+
+            ok = output == text and legacy[:len(text)] == text
+            failures += not ok
+            print(f"{name:22} {size:8} {ignored:8} {stream_time * 1000:10.2f} {legacy_time * 1000:10.2f}  {ok}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Compare the typed relic model against the nested string dicts it replaced.
+
+Usage: python benchmarks/bench_model.py [path/to/index.json.gz]
+
+Memory is what tracemalloc sees still allocated after loading, so the decoded JSON's temporary
+strings are not counted against the model. ``get_relic_drops`` results are cached per relic and
+refinement on first use, so the model is also measured with every result cached. Per-call cost is
+measured on ``get_relic_drops``.
+"""
+import gc
+import gzip
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import relic_engine  # noqa: E402
+from relic_engine.index import IndexSnapshot  # noqa: E402
+
+CALLS = 20000
+
+
+def _retained(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def _dict_relic_drops(relic_dict, relic, refinement):
+    """get_relic_drops as it was: re-derive every chance from the packed rarity code."""
+    relic_drops = {}
+    for drop in relic_dict[relic].items():
+        relic_drops[drop[0]] = relic_engine.get_drop_chance(refinement, drop[1])
+
+    return relic_drops
+
+
+def main(index_path):
+    with open(index_path, 'rb') as fp:
+        text = gzip.decompress(fp.read()).decode('utf-8')
+
+    index, dict_bytes = _retained(lambda: json.loads(text)['relics'])
+    model, model_bytes = _retained(lambda: IndexSnapshot(json.loads(text)).model)
+
+    def warm_model():
+        warm = IndexSnapshot(json.loads(text)).model
+        for relic in warm.relics:
+            for refinement in ('Intact', 'Exceptional', 'Flawless', 'Radiant'):
+                warm.drop_chances(relic, refinement)
+        return warm
+
+    _, warm_bytes = _retained(warm_model)
+
+    print(f"{'relic section':24} {'retained kB':>12}")
+    print(f"{'nested dicts':24} {dict_bytes / 1024:12.1f}")
+    print(f"{'IndexModel':24} {model_bytes / 1024:12.1f}")
+    print(f"{'IndexModel, all cached':24} {warm_bytes / 1024:12.1f}")
+
+    relic_engine.load_index(json.loads(text))
+    relics = list(index)
+    for relic in relics:
+        # Relics outside the standard tier layout, such as Requiem ETERNA's eight equal drops, no longer
+        # take their chances from the tier table.
+        expected = _dict_relic_drops(index, relic, 'Radiant')
+        flat = [c for chance in expected.values() for c in (chance if isinstance(chance, list) else [chance])]
+        if abs(sum(flat) - 1) < 1e-9:
+            assert relic_engine.get_relic_drops(relic, 'Radiant') == expected, relic
+
+    cases = [
+        ('nested dicts', lambda i: _dict_relic_drops(index, relics[i % len(relics)], 'Radiant')),
+        ('IndexModel', lambda i: relic_engine.get_relic_drops(relics[i % len(relics)], 'Radiant')),
+    ]
+
+    print(f"\n{'get_relic_drops':24} {'us/call':>12}")
+    for label, call in cases:
+        seconds = min(timeit.repeat(lambda: [call(i) for i in range(CALLS)], number=1, repeat=5))
+        print(f"{label:24} {seconds / CALLS * 1e6:12.2f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'index.json.gz'))
@@ -0,0 +1,48 @@
+"""
+Time build_json_files with 1, 2, 4 and 8 worker processes and check every build matches the serial one.
+
+Usage: python benchmarks/bench_parallel_build.py [path/to/index] [repeats]
+
+Speedups are bounded by the cores available; the serial set data and merging the shards stay in the parent.
+"""
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import relic_engine  # noqa: E402
+
+WORKERS = (1, 2, 4, 8)
+
+
+def main(index_path, repeats=3):
+    relic_engine.load_index(index_path)
+    relic_engine.build_json_files()
+    print(f"{os.cpu_count()} CPUs, {len(relic_engine.get_relic_list())} relics, best of {repeats}")
+
+    reference = None
+    serial_time = None
+    for workers in WORKERS:
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            relic_data, set_data = relic_engine.build_json_files(workers=workers)
+            times.append(time.perf_counter() - start)
+
+        encoded = json.dumps(relic_data, indent=4), json.dumps(set_data, indent=4)
+        if reference is None:
+            reference, serial_time = encoded, min(times)
+        assert encoded == reference, f"{workers} workers built different data"
+
+        print(f"{workers} worker{'s' if workers > 1 else ' '}: {min(times) * 1000:7.1f} ms "
+              f"({serial_time / min(times):.2f}x)")
+
+    print("all builds identical")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'index.json.gz'),
+         int(sys.argv[2]) if len(sys.argv) > 2 else 3)
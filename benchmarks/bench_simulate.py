@@ -0,0 +1,48 @@
+"""
+Simulate every relic and check the simulated means against the analytic average returns.
+
+Usage: python benchmarks/bench_simulate.py [path/to/index.json.gz] [runs]
+
+Reports throughput and how far the simulated means fall from ``get_average_returns`` in standard
+errors. With thousands of cells a handful beyond 3 is expected; a cell far beyond 5 points at a
+disagreement between the closed form and the simulated draws.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import relic_engine  # noqa: E402
+
+
+def main(index_path, runs=2000):
+    relic_engine.load_index(index_path)
+    relic_engine.get_batch_arrays()
+
+    start = time.perf_counter()
+    result = relic_engine.simulate_returns(runs=runs, seed=0)
+    elapsed = time.perf_counter() - start
+
+    width = int((relic_engine.batch.STYLE_MEMBERS * relic_engine.simulate.STYLE_REWARDS).max())
+    draws = len(result.relics) * len(relic_engine.REFINEMENTS) * runs * width
+    print(f"{len(result.relics)} relics x {len(relic_engine.REFINEMENTS)} refinements x {runs} runs "
+          f"in {elapsed:.2f} s ({draws / elapsed / 1e6:.0f}M draws/s)")
+
+    deviation = np.abs(result.deviation())
+    print(f"\n{'style':6} {'max |z|':>8} {'|z| > 3':>8} {'|z| > 5':>8}")
+    for i, style in enumerate(result.styles):
+        cells = deviation[..., i]
+        print(f"{style:6} {cells.max():8.2f} {(cells > 3).sum():8} {(cells > 5).sum():8}")
+
+    worst = np.unravel_index(np.argmax(deviation), deviation.shape)
+    relic, refinement, style = result.relics[worst[0]], relic_engine.REFINEMENTS[worst[1]], result.styles[worst[2]]
+    print(f"\nlargest deviation: {relic} {refinement} {style}: {result.get(relic, refinement, style)}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'index.json.gz'),
+         int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
@@ -0,0 +1,111 @@
+"""
+Measure cold-start cost and failure behaviour of index loading against a local stand-in server.
+
+Usage: python benchmarks/cold_start.py [path/to/index.json.gz]
+
+Each scenario runs in a fresh interpreter so import and first-use costs are measured cold.
+"""
+import hashlib
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time, warnings
+t0 = time.perf_counter()
+import relic_engine
+t1 = time.perf_counter()
+status = 'ok'
+with warnings.catch_warnings(record=True) as caught:
+    warnings.simplefilter('always')
+    try:
+        relic_engine.get_relic_list()
+    except relic_engine.IndexLoadError:
+        status = 'IndexLoadError'
+    if caught and status == 'ok':
+        status = 'ok (stale cache)'
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'first_use_ms': (t2 - t1) * 1000, 'status': status}))
+"""
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    payload = b''
+    etag = ''
+    last_modified = 'Mon, 01 Jan 2024 00:00:00 GMT'
+    mode = 'ok'
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.headers.get('If-None-Match'))
+        if self.mode == 'slow':
+            time.sleep(2)
+        if self.mode == 'error':
+            self.send_response(500)
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Last-Modified', self.last_modified)
+        self.send_header('Content-Length', str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _run(env):
+    result = subprocess.run([sys.executable, '-c', PROBE], env=env, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        return {'status': result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout)
+
+
+def main(index_path):
+    with open(index_path, 'rb') as fp:
+        _Handler.payload = fp.read()
+    _Handler.etag = '"' + hashlib.sha1(_Handler.payload).hexdigest() + '"'
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/index.json.gz"
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, RELIC_ENGINE_INDEX_URL=url, RELIC_ENGINE_CACHE_DIR=cache_dir,
+                   RELIC_ENGINE_TIMEOUT='1')
+
+        scenarios = [
+            ('cold, empty cache', 'ok', {}),
+            ('warm, fresh cache', 'ok', {}),
+            ('warm, revalidated (304)', 'ok', {'RELIC_ENGINE_MAX_AGE': '0'}),
+            ('server error, stale cache', 'error', {'RELIC_ENGINE_MAX_AGE': '0'}),
+            ('server timeout, stale cache', 'slow', {'RELIC_ENGINE_MAX_AGE': '0'}),
+            ('server error, no cache', 'error', {'RELIC_ENGINE_CACHE_DIR': ''}),
+        ]
+
+        print(f"{'scenario':32} {'import ms':>10} {'first use ms':>13}  status")
+        for name, mode, extra in scenarios:
+            _Handler.mode = mode
+            result = _run(dict(env, **extra))
+            print(f"{name:32} {result.get('import_ms', float('nan')):10.1f} "
+                  f"{result.get('first_use_ms', float('nan')):13.1f}  {result['status']}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'index.json.gz'))
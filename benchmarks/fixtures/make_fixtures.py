@@ -0,0 +1,188 @@
+"""
+Regenerate the synthetic source fixtures from the frozen ``index.json.gz`` next to this file.
+
+Usage: python benchmarks/fixtures/make_fixtures.py
+
+Sources are written under ``sources/<host>/<path>``, the layout ``build_index.py --fixtures`` reads
+and a local stand-in server can serve. Large files are stored gzip-compressed with a ``.gz`` suffix.
+Building from these sources reproduces the frozen index. They are not real captures: each file holds only
+the rows the index needs, far smaller than the live sources (see the README).
+"""
+import gzip
+import json
+import lzma
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCES = os.path.join(HERE, 'sources')
+
+HISTORY_FILE = 'price_history_2024-08-21.json'
+MANIFESTS = ['ExportRecipes', 'ExportResources', 'ExportWarframes', 'ExportWeapons', 'ExportSentinels']
+WEAPON_CATEGORIES = {'Primary': 'LongGuns', 'Secondary': 'Pistols', 'Archmelee': 'SpaceMelee', 'Archgun': 'SpaceGuns'}
+
+REFINEMENT_CHANCES = {
+    'Intact': {'Common': '25.33', 'Uncommon': '11.00', 'Rare': '2.00'},
+    'Exceptional': {'Common': '23.33', 'Uncommon': '13.00', 'Rare': '4.00'},
+    'Flawless': {'Common': '20.00', 'Uncommon': '17.00', 'Rare': '6.00'},
+    'Radiant': {'Common': '16.67', 'Uncommon': '20.00', 'Rare': '10.00'},
+}
+TIER_NAMES = {1: 'Common', 2: 'Uncommon', 3: 'Rare'}
+BLANK_ROW = '<tr class="blank-row"><td class="blank-row" colspan="2"></td></tr>'
+
+
+def _header(text):
+    return f'<tr><th colspan="2">{text}</th></tr>'
+
+
+def _row(name, chance):
+    return f'<tr><td>{name}</td><td>{chance}</td></tr>'
+
+
+def _mission_rows(index):
+    """Mission rewards listing every non-vaulted relic, plus rows the parser must ignore."""
+    relics = index['non_vaulted']
+    rows = []
+    for i in range(0, len(relics), 4):
+        rows.append(_header(f"Node{i}/Sector{i} ({'Survival' if i % 8 else 'Defense'})"))
+        rows.append(_header('Rotation A'))
+        rows.extend(_row(f"{relic} Relic", 'Uncommon (11.06%)') for relic in relics[i:i + 4])
+        rows.append(_row('Endo', 'Common (50.00%)'))
+        rows.append(BLANK_ROW)
+
+    # A relic listed more than 20 rows after its mission header is outside the parser's window.
+    vaulted = next(relic for relic in index['relics'] if relic not in relics)
+    rows.append(_header('Deep/Archive (Exterminate)'))
+    rows.extend(_row(f"Credits Cache {i}", 'Common (5.00%)') for i in range(20))
+    rows.append(_row(f"{vaulted} Relic", 'Rare (1.00%)'))
+    rows.append(BLANK_ROW)
+
+    return rows
+
+
+def _relic_rows(index):
+    rows = []
+    for relic, drops in index['relics'].items():
+        table = index.get('chances', {}).get(relic)
+        for refinement, chances in REFINEMENT_CHANCES.items():
+            rows.append(_header(f"{relic} Relic ({refinement})"))
+            for part, rarity in drops.items():
+                percents = table[refinement][part] if table else None
+                if not isinstance(percents, list):
+                    percents = [percents]
+                for tier, percent in zip(str(rarity), percents):
+                    tier_name = TIER_NAMES[int(tier)]
+                    chance = chances[tier_name] if percent is None else f"{percent:.2f}"
+                    rows.append(_row(part, f"{tier_name} ({chance}%)"))
+            rows.append(BLANK_ROW)
+
+    return rows
+
+
+def make_droptables(index):
+    return ('<!DOCTYPE html><html><head><title>Warframe PC Drops</title></head><body>'
+            '<h3 id="missionRewards">Missions:</h3><table>' + ''.join(_mission_rows(index)) + '</table>'
+            '<h3 id="relicRewards">Relics:</h3><table>' + ''.join(_relic_rows(index)) + '</table>'
+            '</body></html>')
+
+
+def _set_name(part):
+    set_name = part.split(" Prime")[0] + " Prime"
+    if "Kavasa" in set_name:
+        set_name += " Kubrow Collar"
+
+    return set_name
+
+
+def _unique_name(name):
+    return '/Lotus/Fixture/' + name.replace(' ', '')
+
+
+def make_manifests(index):
+    """Export* manifests from which ``get_mainfest_data`` rebuilds the index's ducat, required and type dicts."""
+    manifests = {name: [] for name in MANIFESTS}
+    known = set()
+
+    def add_item(name, item_type):
+        if name in known:
+            return
+        known.add(name)
+        item = {'uniqueName': _unique_name(name), 'name': name}
+        if item_type == 'Warframes':
+            manifests['ExportWarframes'].append(item)
+        elif item_type == 'Sentinels':
+            manifests['ExportSentinels'].append(dict(item, productCategory='Sentinels'))
+        elif item_type in ('Melee', 'Primary', 'Secondary', 'Archgun', 'Archmelee'):
+            manifests['ExportWeapons'].append(dict(item, productCategory=WEAPON_CATEGORIES.get(item_type, item_type)))
+        else:
+            manifests['ExportResources'].append(item)
+
+    for name, item_type in index['types'].items():
+        if name != 'Kavasa Prime':
+            add_item(name, item_type)
+
+    sets = {}
+    for part in index['ducats']:
+        sets.setdefault(_set_name(part), []).append(part)
+
+    for set_name, parts in sets.items():
+        components = [part for part in parts if part != set_name + ' Blueprint']
+        for part in parts:
+            if not part.endswith(' Blueprint'):
+                manifests['ExportResources'].append({'uniqueName': _unique_name(part), 'name': part,
+                                                     'primeSellingPrice': index['ducats'][part]})
+                known.add(part)
+                continue
+
+            result = part[:-len(' Blueprint')]
+            add_item(result, None)
+            recipe = {'uniqueName': _unique_name(part), 'resultType': _unique_name(result),
+                      'primeSellingPrice': index['ducats'][part], 'ingredients': []}
+            if result == set_name:
+                for component in components:
+                    component = component[:-len(' Blueprint')] if component.endswith(' Blueprint') else component
+                    add_item(component, None)
+                    recipe['ingredients'].append({'ItemType': _unique_name(component),
+                                                  'ItemCount': index['required_count'].get(component, 1)})
+            manifests['ExportRecipes'].append(recipe)
+
+    return {name: {name: items} for name, items in manifests.items()}
+
+
+def make_price_history(index):
+    return {item: [{'datetime': '2024-08-21T00:00:00.000+00:00', 'volume': 10 + len(item), 'min_price': price,
+                    'max_price': price + 2, 'avg_price': price, 'median': price}]
+            for item, price in index['prices'].items()}
+
+
+def _write(path, data: bytes, compress=False):
+    path = os.path.join(SOURCES, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if compress:
+        with gzip.GzipFile(path + '.gz', 'wb', mtime=0) as fp:
+            fp.write(data)
+    else:
+        with open(path, 'wb') as fp:
+            fp.write(data)
+
+
+def main():
+    with gzip.open(os.path.join(HERE, 'index.json.gz'), 'rb') as fp:
+        index = json.load(fp)
+
+    _write('www.warframe.com/droptables', make_droptables(index).encode('utf-8'), compress=True)
+
+    _write('relics.run/history/index.html',
+           f'<html><body><a href="../">../</a><a href="price_history_2024-08-20.json">old</a>'
+           f'<a href="{HISTORY_FILE}">{HISTORY_FILE}</a></body></html>'.encode('utf-8'))
+    _write(f'relics.run/history/{HISTORY_FILE}', json.dumps(make_price_history(index)).encode('utf-8'), compress=True)
+
+    manifest_index = '\r\n'.join(f'{name}_en.json!00_fixture' for name in MANIFESTS)
+    _write('content.warframe.com/PublicExport/index_en.txt.lzma',
+           lzma.compress(manifest_index.encode('utf-8'), format=lzma.FORMAT_ALONE) + b'\x00' * 16)
+    for name, manifest in make_manifests(index).items():
+        _write(f'content.warframe.com/PublicExport/Manifest/{name}_en.json!00_fixture',
+               json.dumps(manifest).encode('utf-8'), compress=True)
+
+
+if __name__ == '__main__':
+    main()
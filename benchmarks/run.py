@@ -0,0 +1,416 @@
+"""
+Benchmark suite for the engine's hot paths, run against the checked-in fixtures with no network.
+
+Usage:
+    python benchmarks/run.py [--output results.json] [--compare baseline.json] [--case NAME [--case NAME ...]]
+
+Every case runs in fresh interpreters so caches, imports and peak RSS do not leak between cases.
+Cold cases time one fresh interpreter per repeat; the others time warm calls with ``timeit`` in several
+interpreters (``--processes``) and then measure the peak memory one call allocates under tracemalloc, on
+its own so tracing does not skew the times. Results are written as JSON; with ``--compare`` every case
+is checked against a stored baseline and the exit status is 1 if any is slower or allocates more than
+the thresholds allow.
+
+Store a baseline with ``--output baseline.json`` on the reference machine, then compare later runs
+against it on the same machine; times from different machines are not comparable.
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+INDEX = os.path.join(FIXTURES, 'index.json.gz')
+SOURCES = os.path.join(FIXTURES, 'sources')
+
+RESULTS_FORMAT = 1
+
+# Memory growth below this many KiB is never flagged, however large the ratio; tiny peaks are noisy.
+MEMORY_SLACK_KB = 64
+
+# Default for slowdowns never flagged, in seconds per call: microsecond cases shift by about that much
+# between runs on a busy machine without any code change.
+TIME_SLACK_SECONDS = 2e-6
+
+# Cases only import relic_engine and build_index when they run, so cold cases see a fresh interpreter.
+CASES = {}
+
+
+def case(kind: str):
+    """
+    Register a benchmark case.
+
+    ``cold`` cases are a function timing themselves once in a fresh interpreter and returning the seconds.
+    ``latency`` and ``throughput`` cases are a function doing the setup and returning ``(call, items)``:
+    the call to time and how many items one call processes.
+    """
+    def register(func):
+        CASES[func.__name__] = (kind, func)
+        return func
+
+    return register
+
+
+def _load_engine(index_path):
+    sys.path.insert(0, ROOT)
+    import relic_engine
+
+    relic_engine.load_index(index_path)
+    return relic_engine
+
+
+def _load_build_index():
+    sys.path.insert(0, ROOT)
+    import build_index
+
+    return build_index
+
+
+@case('cold')
+def import_engine(index_path):
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    import relic_engine  # noqa: F401
+
+    return time.perf_counter() - start
+
+
+@case('cold')
+def first_use(index_path):
+    start = time.perf_counter()
+    relic_engine = _load_engine(index_path)
+    relic_engine.get_average_return(relic_engine.get_relic_list()[0], 'Intact', 'solo')
+
+    return time.perf_counter() - start
+
+
+@case('latency')
+def get_average_return(index_path):
+    relic_engine = _load_engine(index_path)
+    relic = relic_engine.get_relic_list()[0]
+    relic_engine.get_average_return(relic, 'Radiant', '4b4')
+
+    return lambda: relic_engine.get_average_return(relic, 'Radiant', '4b4'), 1
+
+
+@case('latency')
+def get_average_return_uncached(index_path):
+    relic_engine = _load_engine(index_path)
+    relic = relic_engine.get_relic_list()[0]
+    cache = relic_engine.average_return_cache
+
+    def call():
+        cache.clear()
+        relic_engine.get_average_return(relic, 'Radiant', '4b4')
+
+    return call, 1
+
+
+@case('latency')
+def calculate_average(index_path):
+    relic_engine = _load_engine(index_path)
+    drops = relic_engine.get_relic_drops(relic_engine.get_relic_list()[0], 'Radiant')
+
+    return lambda: relic_engine.calculate_average(drops, [4, 1]), 1
+
+
+@case('latency')
+def get_set_parts(index_path):
+    relic_engine = _load_engine(index_path)
+    set_name = relic_engine.get_set_list()[0]
+    relic_engine.get_set_parts(set_name)
+
+    return lambda: relic_engine.get_set_parts(set_name), 1
+
+
+@case('throughput')
+def average_return_catalog(index_path):
+    relic_engine = _load_engine(index_path)
+    calls = [(relic, refinement, style) for relic in relic_engine.get_relic_list()
+             for refinement in relic_engine.REFINEMENTS for style in relic_engine.STYLES]
+
+    def call():
+        relic_engine.average_return_cache.clear()
+        for relic, refinement, style in calls:
+            relic_engine.get_average_return(relic, refinement, style)
+
+    return call, len(calls)
+
+
+@case('throughput')
+def get_average_returns(index_path):
+    relic_engine = _load_engine(index_path)
+    relic_engine.get_average_returns()
+    relics = len(relic_engine.get_relic_list())
+
+    return lambda: relic_engine.get_average_returns(prices=relic_engine.get_price_dict()), relics
+
+
+@case('throughput')
+def build_json_files(index_path):
+    relic_engine = _load_engine(index_path)
+    relic_engine.build_json_files()
+
+    return relic_engine.build_json_files, len(relic_engine.get_relic_list())
+
+
+@case('throughput')
+def parse_drop_table(index_path):
+    build_index = _load_build_index()
+    with gzip.open(os.path.join(SOURCES, 'www.warframe.com', 'droptables.gz'), 'rb') as fp:
+        data = fp.read()
+    relics = len(build_index.build_relic_tables(data)[0])
+
+    return lambda: build_index.build_relic_tables(data), relics
+
+
+@case('throughput')
+def parse_manifests(index_path):
+    build_index = _load_build_index()
+    fetcher = build_index.SourceFetcher(fixtures=SOURCES, workers=1)
+    parts = len(build_index.get_mainfest_data(fetcher=fetcher)[0])
+
+    # Reads, decompresses and decodes the fixture manifests on every call, as a build does.
+    return lambda: build_index.get_mainfest_data(fetcher=fetcher), parts
+
+
+@case('throughput')
+def parse_price_history(index_path):
+    build_index = _load_build_index()
+    fetcher = build_index.SourceFetcher(fixtures=SOURCES, workers=1)
+    items = len(build_index.build_price_data(None, fetcher))
+
+    return lambda: build_index.build_price_data(None, fetcher), items
+
+
+def _peak_rss_kb() -> int:
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_child(name: str, index_path: str, repeats: int) -> dict:
+    """Run one case in this interpreter; called by the fresh interpreter ``_run_case`` starts."""
+    kind, func = CASES[name]
+    if kind == 'cold':
+        return {'runs': [func(index_path)], 'peak_rss_kb': _peak_rss_kb()}
+
+    call, items = func(index_path)
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    runs = [seconds / number for seconds in timer.repeat(repeats, number)]
+
+    tracemalloc.start()
+    call()
+    peak_alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'runs': runs, 'number': number, 'items': items, 'peak_alloc_kb': round(peak_alloc / 1024, 1),
+            'peak_rss_kb': _peak_rss_kb()}
+
+
+def _child(name: str, index_path: str, repeats: int) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), '--child', name, '--index', index_path,
+               '--repeats', str(repeats)]
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"Benchmark case {name} failed:\n{result.stderr}")
+
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def _run_case(name: str, index_path: str, repeats: int, processes: int) -> dict:
+    kind = CASES[name][0]
+    if kind == 'cold':
+        children = [_child(name, index_path, 1) for _ in range(repeats)]
+        result = {'runs': [child['runs'][0] for child in children],
+                  'peak_rss_kb': max(child['peak_rss_kb'] for child in children)}
+        result['process_seconds'] = result['runs']
+    else:
+        # Timings shift between interpreters (memory layout, hash seeds) more than between repeats in one.
+        children = [_child(name, index_path, repeats) for _ in range(processes)]
+        result = children[0]
+        result.update(runs=[run for child in children for run in child['runs']],
+                      process_seconds=[_median(child['runs']) for child in children],
+                      peak_alloc_kb=max(child['peak_alloc_kb'] for child in children),
+                      peak_rss_kb=max(child['peak_rss_kb'] for child in children))
+
+    result.update(kind=kind, seconds=_median(result['process_seconds']), min_seconds=min(result['runs']))
+    if result.get('items'):
+        result['items_per_second'] = result['items'] / result['seconds']
+
+    return result
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+
+    return result.stdout.strip() or None
+
+
+def _machine() -> dict:
+    import numpy
+
+    return {'python': platform.python_version(), 'numpy': numpy.__version__, 'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count()}
+
+
+def run_suite(names, index_path: str = INDEX, repeats: int = 5, processes: int = 3) -> dict:
+    """Run the named cases, each in fresh interpreters, and return the results document."""
+    results = {}
+    for name in names:
+        results[name] = _run_case(name, index_path, repeats, processes)
+        print(f"{name:28} {_format_seconds(results[name]['seconds']):>10}", file=sys.stderr)
+
+    return {'format': RESULTS_FORMAT,
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'machine': _machine(),
+            'index': os.path.relpath(os.path.abspath(index_path), ROOT),
+            'repeats': repeats,
+            'processes': processes,
+            'results': results}
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.15, memory_threshold: float = 0.10,
+            time_slack: float = TIME_SLACK_SECONDS) -> list:
+    """
+    Compare a results document with a baseline.
+
+    Args:
+        results (dict): Document from ``run_suite``.
+        baseline (dict): An earlier document, usually from the same machine.
+        threshold (float): Fraction by which a case's median time may exceed the baseline's. A slowdown
+            is only flagged if every interpreter timing the case is that much slower, and by more than
+            ``time_slack`` seconds per call.
+        memory_threshold (float): Fraction by which its peak allocation (peak RSS for cold cases) may
+            exceed the baseline's, by more than ``MEMORY_SLACK_KB``.
+        time_slack (float): Slowdown per call, in seconds, below which no case is flagged.
+
+    Returns:
+        list: Rows of ``(case, metric, baseline, current, ratio, regressed)`` for the cases in both.
+
+    Raises:
+        ValueError: If the baseline was written in another format version.
+    """
+    if baseline.get('format') != RESULTS_FORMAT:
+        raise ValueError(f"Unsupported baseline format {baseline.get('format')}")
+
+    rows = []
+    for name, current in results['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+
+        memory = 'peak_alloc_kb' if 'peak_alloc_kb' in current else 'peak_rss_kb'
+        for metric, limit in [('seconds', threshold), (memory, memory_threshold)]:
+            if not previous.get(metric) or metric not in current:
+                continue
+            ratio = current[metric] / previous[metric]
+            if metric == 'seconds':
+                # Noise slows some interpreters; a real regression slows all of them.
+                persists = min(current['process_seconds']) > previous['seconds'] * (1 + limit)
+                grown = persists and current[metric] - previous[metric] > time_slack
+            else:
+                grown = current[metric] - previous[metric] > MEMORY_SLACK_KB
+            rows.append((name, metric, previous[metric], current[metric], ratio, grown and ratio > 1 + limit))
+
+    return rows
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def _format_value(metric: str, value: float) -> str:
+    if metric == 'seconds':
+        return _format_seconds(value)
+
+    return f"{value / 1024:.1f} MiB" if value >= 1024 else f"{value:.1f} KiB"
+
+
+def print_results(results: dict):
+    print(f"{'case':28} {'kind':10} {'median':>10} {'min':>10} {'items/s':>12} {'peak alloc':>11} {'peak RSS':>10}")
+    for name, result in results['results'].items():
+        rate = f"{result['items_per_second']:,.0f}" if 'items_per_second' in result else ''
+        alloc = _format_value('kb', result['peak_alloc_kb']) if 'peak_alloc_kb' in result else ''
+        print(f"{name:28} {result['kind']:10} {_format_seconds(result['seconds']):>10} "
+              f"{_format_seconds(result['min_seconds']):>10} {rate:>12} {alloc:>11} "
+              f"{_format_value('kb', result['peak_rss_kb']):>10}")
+
+
+def print_comparison(rows: list, baseline: dict):
+    print(f"\nAgainst baseline {baseline.get('commit') or ''} ({baseline.get('created', 'unknown date')}):")
+    print(f"{'case':28} {'metric':14} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, metric, previous, current, ratio, regressed in rows:
+        print(f"{name:28} {metric:14} {_format_value(metric, previous):>10} {_format_value(metric, current):>10} "
+              f"{(ratio - 1) * 100:+7.1f}%{'  REGRESSION' if regressed else ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the engine's hot paths against the checked-in fixtures.")
+    parser.add_argument('--case', action='append', choices=sorted(CASES), dest='cases',
+                        help="Run only this case; repeat for several. Defaults to every case.")
+    parser.add_argument('--index', default=INDEX, help="Index the engine cases load.")
+    parser.add_argument('--repeats', type=int, default=5,
+                        help="Timed runs per interpreter, or interpreters per cold case.")
+    parser.add_argument('--processes', type=int, default=3,
+                        help="Interpreters timing each warm case; the median of their medians is reported.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Results file to compare against.")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Flag cases whose median time grew by more than this fraction.")
+    parser.add_argument('--memory-threshold', type=float, default=0.10,
+                        help="Flag cases whose peak memory grew by more than this fraction.")
+    parser.add_argument('--time-slack', type=float, default=TIME_SLACK_SECONDS,
+                        help="Never flag slowdowns of fewer seconds per call than this.")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_run_child(args.child, args.index, args.repeats)))
+        return 0
+
+    results = run_suite(args.cases or list(CASES), args.index, args.repeats, args.processes)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=4)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        rows = compare(results, baseline, args.threshold, args.memory_threshold, args.time_slack)
+        print_comparison(rows, baseline)
+
+        regressions = sorted({row[0] for row in rows if row[5]})
+        if regressions:
+            print(f"\n{len(regressions)} regressed: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
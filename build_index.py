@@ -1,16 +1,139 @@
+import argparse
 import gzip
+import hashlib
 import json
 import lzma
 import os
 import re
-from pprint import pprint
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit
 
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from relic_engine.binary import OPTIONAL_SECTIONS, encode_binary_index
+from relic_engine.diff import diff_indexes
+from relic_engine.history import PriceHistory
+from relic_engine.index import _write_atomic
+from relic_engine.model import resolve_chances
+
+DROP_TABLE_URL = 'https://www.warframe.com/droptables'
+PRICE_HISTORY_URL = 'https://relics.run/history/'
+MANIFEST_INDEX_URL = 'https://content.warframe.com/PublicExport/index_en.txt.lzma'
+MANIFEST_URL = 'http://content.warframe.com/PublicExport/Manifest/'
+
+# Seconds allowed per source; anything not listed uses the fetcher's default timeout.
+SOURCE_TIMEOUTS = {'droptables': 120}
+
+
+class SourceFetcher:
+    """
+    Fetches build sources over one pooled session with per-source timeouts, retries and latency tracking.
+
+    With ``mirror`` every URL is rewritten to ``<mirror>/<host>/<path>`` so a local stand-in server can
+    answer. With ``fixtures`` nothing touches the network: ``<fixtures>/<host>/<path>`` (or the same
+    path with ``.gz``) is read instead. Paths ending in ``/`` map to ``index.html``.
+    """
+
+    def __init__(self, mirror: str = None, fixtures: str = None, timeout: float = 30, retries: int = 3,
+                 workers: int = 8):
+        self.mirror = mirror.rstrip('/') if mirror else None
+        self.fixtures = fixtures
+        self.timeout = timeout
+        self.workers = workers
+        self.latency = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET']))
+        adapter = HTTPAdapter(pool_connections=max(workers, 1), pool_maxsize=max(workers, 1), max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _fixture_chunks(self, url, chunk_size):
+        parsed = urlsplit(url)
+        path = unquote(parsed.path + ('index.html' if parsed.path.endswith('/') else ''))
+        path = os.path.join(self.fixtures, parsed.netloc, *path.strip('/').split('/'))
+
+        opener = (gzip.open, path + '.gz') if not os.path.exists(path) else (open, path)
+        with opener[0](opener[1], 'rb') as fp:
+            while True:
+                chunk = fp.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _http_chunks(self, name, url, chunk_size):
+        if self.mirror:
+            parsed = urlsplit(url)
+            url = f"{self.mirror}/{parsed.netloc}{parsed.path}"
+
+        timeout = SOURCE_TIMEOUTS.get(name, self.timeout)
+        with self.session.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            yield from response.iter_content(chunk_size)
+
+    def iter_content(self, name: str, url: str, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+        """
+        Yield a source's bytes as they arrive, recording its latency under ``name``.
+
+        The recorded total includes time the caller spends between chunks, e.g. a streaming parser.
+        """
+        start = time.perf_counter()
+        first_byte = None
+        size = 0
+        chunks = self._fixture_chunks(url, chunk_size) if self.fixtures else self._http_chunks(name, url, chunk_size)
+        try:
+            for chunk in chunks:
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                size += len(chunk)
+                yield chunk
+        finally:
+            with self._lock:
+                self.latency[name] = {'first_byte': first_byte, 'seconds': time.perf_counter() - start,
+                                      'bytes': size}
+
+    def get(self, name: str, url: str) -> bytes:
+        return b''.join(self.iter_content(name, url))
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        """Apply ``func`` to every item concurrently, keeping order."""
+        items = list(items)
+        if self.workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as pool:
+            return list(pool.map(func, items))
+
+    def report(self) -> str:
+        lines = [f"{'source':28} {'first byte s':>12} {'total s':>8} {'bytes':>10}"]
+        for name, stats in sorted(self.latency.items()):
+            first_byte = stats['first_byte'] if stats['first_byte'] is not None else float('nan')
+            lines.append(f"{name:28} {first_byte:12.3f} {stats['seconds']:8.3f} {stats['bytes']:10}")
+
+        return '\n'.join(lines)
+
+
+_fetcher = None
+
+
+def _default_fetcher() -> SourceFetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = SourceFetcher()
 
+    return _fetcher
 
-def add_manual_relics(relic_list):
+
+def add_manual_relics(relic_list, chance_list=None):
     if not os.path.exists('manual_relics'):
         return relic_list
 
@@ -26,12 +149,270 @@ def add_manual_relics(relic_list):
 
         relic_list[relic] = drop_dict
 
+        if chance_list is not None:
+            try:
+                chance_list[relic] = {
+                    refinement: {drop: _percent(relic_data[relic][refinement]["drops"][drop]["chance"])
+                                 for drop in drop_dict}
+                    for refinement in REFINEMENTS}
+            except (KeyError, TypeError):
+                # Missing refinements or non-numeric chances; the relic falls back to its tiers.
+                chance_list.pop(relic, None)
+
     return relic_list
 
 
-def build_relic_list(drop_table: Optional[str]):
+def _percent(chance):
+    if isinstance(chance, list):
+        return [round(value * 100, 2) for value in chance]
+
+    return round(chance * 100, 2)
+
+
+REFINEMENTS = ['Intact', 'Exceptional', 'Flawless', 'Radiant']
+
+MISSION_KEYWORDS = ['(Exterminate)', '(Capture)', '(Defense)', '(Mobile Defense)', '(Sabotage)', '(Survival)',
+                    '(Rescue)', '(Caches)', 'Kuva Siphon', 'Kuva Flood']
+
+# Rows after a mission header that are searched for relic rewards.
+MISSION_WINDOW = 20
+
+
+def _parse_relic_name(text):
+    raw_relic = text.split()
+    return f"{raw_relic[0]} {raw_relic[1].upper()}"
+
+
+def _chance_percent(pct_str):
+    return float(re.search(r'[\d.]+', pct_str).group())
+
+
+def _chance_tiers(rows):
+    """Map each chance text of a relic's Intact rows to its tier id."""
+    # Build the tier mapping dynamically from the unique percentage strings
+    # present in this relic, sorted descending so the most-common drop is
+    # always tier 1.  This handles both the standard 3-tier relics and new
+    # equal-chance relics like Requiem Eterna without hard-coding percentages.
+    seen_pcts: list = []
+    for _, pct_str in rows:
+        if pct_str not in seen_pcts:
+            seen_pcts.append(pct_str)
+
+    seen_pcts.sort(key=_chance_percent, reverse=True)
+    return {pct: i + 1 for i, pct in enumerate(seen_pcts)}
+
+
+def _build_relic_drops(rows):
+    """Turn a relic's ``(item name, chance text)`` rows into ``{item: tier id}``, packing repeated items."""
+    chance_dict = _chance_tiers(rows)
+
+    relic_drops = {}
+    for item_name, pct_str in rows:
+        tier_id = chance_dict[pct_str]
+
+        if item_name not in relic_drops:
+            relic_drops[item_name] = tier_id
+        else:
+            tier_ids = sorted([str(relic_drops[item_name]), str(tier_id)], reverse=True)
+            relic_drops[item_name] = int(''.join(tier_ids))
+
+    return dict(sorted(relic_drops.items(), reverse=True, key=lambda x: str(x[1])))
+
+
+def _rarity_label(pct_str):
+    return pct_str.split('(')[0].strip()
+
+
+def _build_relic_chances(tables, relic_drops):
+    """
+    Turn a relic's rows at every refinement into ``{refinement: {item: percent}}``, in the order of
+    ``relic_drops``; a packed item gets a list of percentages, one per digit of its rarity code.
+
+    A row is matched to its Intact tier by item and rarity label, falling back to the order an item's
+    rows appear in. Returns None if a refinement table is missing or does not cover every drop.
+    """
+    if any(refinement not in tables for refinement in REFINEMENTS):
+        return None
+
+    intact_tiers = _chance_tiers(tables['Intact'])
+    label_tiers = {}
+    item_tiers = {}
+    for item_name, pct_str in tables['Intact']:
+        label_tiers[(item_name, _rarity_label(pct_str))] = intact_tiers[pct_str]
+        item_tiers.setdefault(item_name, []).append(intact_tiers[pct_str])
+
+    relic_chances = {}
+    for refinement in REFINEMENTS:
+        percents = {}
+        seen = {}
+        for item_name, pct_str in tables[refinement]:
+            occurrence = seen[item_name] = seen.get(item_name, -1) + 1
+            tier_id = label_tiers.get((item_name, _rarity_label(pct_str)))
+            if tier_id is None and occurrence < len(item_tiers.get(item_name, [])):
+                tier_id = item_tiers[item_name][occurrence]
+            percents[(item_name, tier_id)] = _chance_percent(pct_str)
+
+        chances = {}
+        for item_name, rarity in relic_drops.items():
+            values = [percents.get((item_name, int(tier_id))) for tier_id in str(rarity)]
+            if None in values:
+                return None
+            chances[item_name] = values[0] if len(values) == 1 else values
+        relic_chances[refinement] = chances
+
+    return relic_chances
+
+
+def _tag_string(element):
+    """Equivalent of BeautifulSoup's ``Tag.string`` for an lxml element."""
+    children = list(element)
+    if not children:
+        return element.text
+    if len(children) == 1 and not element.text and not children[0].tail:
+        return _tag_string(children[0])
+
+    return None
+
+
+def _cell_text(cell):
+    return cell.text if cell.text is not None else ''
+
+
+def iter_drop_table(chunks: Iterable[bytes]) -> Iterator[Tuple]:
+    """
+    Stream the drop table in a single pass, without building the whole document.
+
+    Yields ``('relic', name, refinement, rows)`` once all rows of a relic table are read, where
+    ``rows`` is a list of ``(item name, chance text)``, and ``('mission_relic', name)`` for every
+    relic seen in a mission reward table.
+
+    Args:
+        chunks: The drop table HTML as an iterable of byte chunks, e.g. ``response.iter_content()``.
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag='tr')
+
+    relic = None
+    refinement = None
+    rows = None
+    window = 0
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, tr in parser.read_events():
+            cells = tr.findall('.//td')
+            text = ''.join(tr.itertext())
+
+            # Rows following a mission header, up to the first blank row.
+            if window:
+                window -= 1
+                if not text:
+                    window = 0
+                elif cells and 'Relic' in _cell_text(cells[0]):
+                    yield 'mission_relic', _parse_relic_name(_cell_text(cells[0]))
+
+            # Rows of the relic table being read, up to the next header row.
+            header = tr.find('.//th')
+            if header is not None:
+                if rows is not None:
+                    yield 'relic', relic, refinement, rows
+                rows = None
+            elif rows is not None and len(cells) >= 2:
+                rows.append((_cell_text(cells[0]), _cell_text(cells[1])))
+
+            string = _tag_string(tr)
+            if string:
+                match = re.search("Relic .(Intact|Exceptional|Flawless|Radiant)", string)
+                if match:
+                    try:
+                        relic = _parse_relic_name(_cell_text(header).split("Relic")[0])
+                        refinement = match.group(1)
+                        rows = []
+                    except IndexError:
+                        pass
+                if any(x in string for x in MISSION_KEYWORDS):
+                    window = MISSION_WINDOW
+
+            # Rows are never revisited, so drop them to keep memory flat.
+            tr.clear(keep_tail=True)
+            while tr.getprevious() is not None:
+                del tr.getparent()[0]
+
+    parser.close()
+    if rows is not None:
+        yield 'relic', relic, refinement, rows
+
+
+def _drop_table_chunks(drop_table, fetcher, chunk_size=1 << 16):
+    if drop_table is None:
+        return (fetcher or _default_fetcher()).iter_content('droptables', DROP_TABLE_URL, chunk_size)
+
+    if isinstance(drop_table, str):
+        drop_table = drop_table.encode('utf-8')
+
+    return (drop_table[i:i + chunk_size] for i in range(0, len(drop_table), chunk_size))
+
+
+def build_relic_tables(drop_table: Optional[Union[str, bytes]], fetcher: SourceFetcher = None):
+    """
+    Read the relics, their drop chances and the non-vaulted relics from the drop table.
+
+    Returns:
+        Tuple[Dict, Set[str], Dict]: ``{relic: {item: tier id}}``, the non-vaulted relics and the
+        ``chances`` section, ``{relic: {refinement: {item: percent}}}``, with the percentages shown in
+        the drop table. Only relics whose odds differ from their tiers' have a chances entry; the others,
+        and relics whose refinement tables are incomplete, take their chances from the tiers.
+    """
+    return _relic_tables(*_read_drop_table(_drop_table_chunks(drop_table, fetcher)))
+
+
+def _read_drop_table(chunks: Iterable[bytes]):
+    """Collect the rows of every relic table, per relic and refinement, and the non-vaulted relics."""
+    tables = {}
+    nv_relics = set()
+
+    for event in iter_drop_table(chunks):
+        if event[0] == 'relic':
+            tables.setdefault(event[1], {})[event[2]] = event[3]
+        else:
+            nv_relics.add(event[1])
+
+    return tables, nv_relics
+
+
+def _relic_tables(tables, nv_relics):
+    relic_list = {}
+    chance_list = {}
+    for relic, relic_tables in tables.items():
+        if 'Intact' not in relic_tables:
+            continue
+
+        relic_list[relic] = _build_relic_drops(relic_tables['Intact'])
+        relic_chances = _build_relic_chances(relic_tables, relic_list[relic])
+        if relic_chances is not None:
+            chance_list[relic] = relic_chances
+
+    relic_list = add_manual_relics(relic_list, chance_list)
+    chance_list = {relic: table for relic, table in chance_list.items() if _needs_chances(relic_list[relic], table)}
+
+    return relic_list, nv_relics, chance_list
+
+
+def _needs_chances(drops, table):
+    """Whether a relic's drop table percentages give other chances than its tiers do."""
+    parts, rarities = list(drops), list(drops.values())
+    return resolve_chances(parts, rarities, table) != resolve_chances(parts, rarities)
+
+
+def build_relic_list(drop_table: Optional[Union[str, bytes]], fetcher: SourceFetcher = None):
+    relic_list, nv_relics, _ = build_relic_tables(drop_table, fetcher)
+
+    return relic_list, nv_relics
+
+
+def build_relic_list_soup(drop_table: Optional[str], fetcher: SourceFetcher = None):
+    """Reference BeautifulSoup implementation of ``build_relic_list``, kept for comparison and benchmarks."""
     if drop_table is None:
-        drop_table = requests.get('https://www.warframe.com/droptables').text
+        drop_table = (fetcher or _default_fetcher()).get('droptables', DROP_TABLE_URL).decode('utf-8')
 
     soup = BeautifulSoup(drop_table, 'lxml')
 
@@ -39,67 +420,32 @@ def build_relic_list(drop_table: Optional[str]):
                            string=re.compile("Relic .Intact"))
 
     relic_list = {}
-    prime_part_list = []
 
     for table in tables:
-        raw_relic = table.find("th").contents[0].split("Relic")[0].rstrip().split()
-
         try:
-            relic = f"{raw_relic[0]} {raw_relic[1].upper()}"
+            relic = _parse_relic_name(table.find("th").contents[0].split("Relic")[0])
         except IndexError:
             continue
 
         # Collect all item rows for this relic, stopping at the next header row.
         # This handles relics with any number of drops (e.g. Requiem Eterna has 8).
-        items = []
+        rows = []
         for sibling in table.find_all_next("tr"):
             if sibling.find("th"):
                 break
             item_contents = sibling.find_all("td")
             if len(item_contents) >= 2:
-                items.append(sibling)
-
-        # Build the tier mapping dynamically from the unique percentage strings
-        # present in this relic, sorted descending so the most-common drop is
-        # always tier 1.  This handles both the standard 3-tier relics and new
-        # equal-chance relics like Requiem Eterna without hard-coding percentages.
-        seen_pcts: list = []
-        for item in items:
-            pct_str = item.find_all("td")[1].contents[0]
-            if pct_str not in seen_pcts:
-                seen_pcts.append(pct_str)
-
-        seen_pcts.sort(key=lambda s: float(re.search(r'[\d.]+', s).group()), reverse=True)
-        chance_dict = {pct: i + 1 for i, pct in enumerate(seen_pcts)}
-
-        relic_drops = {}
-        for item in items:
-            item_contents = item.find_all("td")
-
-            item_name = item_contents[0].contents[0]
-            tier_id = chance_dict[item_contents[1].contents[0]]
-
-            if " Prime " in item_name:
-                prime_part_list.append(item_name)
+                rows.append((item_contents[0].contents[0], item_contents[1].contents[0]))
 
-            if item_name not in relic_drops:
-                relic_drops[item_name] = tier_id
-            else:
-                tier_ids = sorted([str(relic_drops[item_name]), str(tier_id)], reverse=True)
-                relic_drops[item_name] = int(''.join(tier_ids))
-
-        relic_list[relic] = dict(sorted(relic_drops.items(), reverse=True, key=lambda x: str(x[1])))
+        relic_list[relic] = _build_relic_drops(rows)
 
     relic_list = add_manual_relics(relic_list)
 
-    tables = soup.find_all('tr', string=lambda t: t and any(x in t for x in ['(Exterminate)', '(Capture)', '(Defense)',
-                                                                             '(Mobile Defense)', '(Sabotage)',
-                                                                             '(Survival)', '(Rescue)', '(Caches)',
-                                                                             'Kuva Siphon', 'Kuva Flood']))
+    tables = soup.find_all('tr', string=lambda t: t and any(x in t for x in MISSION_KEYWORDS))
 
     nv_relics = set()
     for table in tables:
-        items = table.find_all_next("tr", limit=20)
+        items = table.find_all_next("tr", limit=MISSION_WINDOW)
 
         for item in items:
             item_contents = item.find_all("td")
@@ -112,9 +458,7 @@ def build_relic_list(drop_table: Optional[str]):
             item_name = item_contents[0].contents[0]
 
             if 'Relic' in item_name:
-                raw_relic = item_name.split()
-                relic = f"{raw_relic[0]} {raw_relic[1].upper()}"
-                nv_relics.add(relic)
+                nv_relics.add(_parse_relic_name(item_name))
 
     return relic_list, nv_relics
 
@@ -132,18 +476,26 @@ def encode_and_compress(json_file):
     return encoded_list
 
 
-def get_price_history(pd_file=None):
+def get_price_history_url(fetcher: SourceFetcher = None):
+    listing = (fetcher or _default_fetcher()).get('price_history_list', PRICE_HISTORY_URL).decode('utf-8')
+    soup = BeautifulSoup(listing, 'html.parser')
+    return sorted(['http://relics.run/history/' + node.get('href')
+                   for node in soup.find_all('a') if node.get('href').endswith('json')])[-1]
+
+
+def get_price_history(pd_file=None, fetcher: SourceFetcher = None):
+    fetcher = fetcher or _default_fetcher()
     if pd_file is None:
-        soup = BeautifulSoup(requests.get('https://relics.run/history/').text, 'html.parser')
-        return requests.get(sorted(['http://relics.run/history/' + node.get('href')
-                                    for node in soup.find_all('a') if node.get('href').endswith('json')])[-1]).json()
+        url = get_price_history_url(fetcher)
     else:
-        return requests.get(f"https://relics.run/history/{pd_file}").json()
+        url = f"https://relics.run/history/{pd_file}"
 
+    return json.loads(fetcher.get('price_history', url))
 
-def build_price_data(price_history):
+
+def build_price_data(price_history, fetcher: SourceFetcher = None):
     if price_history is None:
-        price_history = get_price_history()
+        price_history = get_price_history(fetcher=fetcher)
 
     price_data = {}
     for item in price_history:
@@ -153,80 +505,185 @@ def build_price_data(price_history):
     return price_data
 
 
+def _history_records(price_history):
+    return {item: records[0] for item, records in price_history.items() if ' Prime ' in item and records}
+
+
+def append_price_history(path: str, price_history) -> Optional[str]:
+    """
+    Append the day of a relics.run price history file to the price history store at ``path``.
+
+    The store is created if missing. Appending the day already stored last replaces it, so rebuilding
+    on the same day is harmless.
+
+    Returns:
+        Optional[str]: The day appended, or None if the file has no prime prices.
+    """
+    records = _history_records(price_history)
+    if not records:
+        return None
+
+    day = next(iter(records.values()))['datetime'][:10]
+    history = PriceHistory.load(path) if os.path.exists(path) else PriceHistory()
+    history.append(day, records)
+    history.save(path)
+
+    return day
+
+
 def build_files(drop_table=None, price_history=None,
-                recipes=None, resources=None, warframes=None, weapons=None):
-    relic_list, nv_relics = build_relic_list(drop_table)
-    price_data = build_price_data(price_history)
-    ducat_data, required_data, type_data = get_mainfest_data(recipes, resources, warframes, weapons)
+                recipes=None, resources=None, warframes=None, weapons=None, sentinels=None,
+                fetcher: SourceFetcher = None):
+    fetcher = fetcher or _default_fetcher()
+
+    # The drop table, price history and manifests are independent, so they are fetched side by side.
+    stages = [lambda: build_relic_tables(drop_table, fetcher),
+              lambda: build_price_data(price_history, fetcher),
+              lambda: get_mainfest_data(recipes, resources, warframes, weapons, sentinels, fetcher)]
+    ((relic_list, nv_relics, chance_list), price_data,
+     (ducat_data, required_data, type_data)) = fetcher.map(lambda f: f(), stages)
 
     index_file = {'relics': relic_list,
-                  'non_vaulted': list(nv_relics),
+                  'non_vaulted': sorted(nv_relics),
                   'prices': price_data,
                   'ducats': ducat_data,
                   'required_count': required_data,
                   'types': type_data}
+    if chance_list:
+        index_file['chances'] = chance_list
 
     return index_file
 
 
-def decompress_lzma(data):
-    results = []
-    while True:
-        decomp = lzma.LZMADecompressor(lzma.FORMAT_AUTO, None, None)
-        try:
-            res = decomp.decompress(data)
-        except lzma.LZMAError:
-            if results:
-                break  # Leftover data is not a valid LZMA/XZ stream; ignore it.
-            else:
-                raise  # Error on the first iteration; bail out.
-        results.append(res)
-        data = decomp.unused_data
-        if not data:
-            break
-        if not decomp.eof:
-            raise lzma.LZMAError("Compressed data ended before the end-of-stream marker was reached")
-    return b"".join(results)
-
-
-def fix():
-    response = requests.get('https://content.warframe.com/PublicExport/index_en.txt.lzma')
-    data = response.content
-    byt = bytes(data)
-    length = len(data)
-    stay = True
-    while stay:
-        stay = False
+# Largest piece fed to the decoder at once; bounds the re-decoding needed when a stream lacks an end marker.
+LZMA_BLOCK_SIZE = 1 << 12
+
+
+def _split_blocks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    for chunk in chunks:
+        for i in range(0, len(chunk), LZMA_BLOCK_SIZE):
+            yield chunk[i:i + LZMA_BLOCK_SIZE]
+
+
+def decompress_lzma_stream(chunks: Iterable[bytes]) -> Tuple[bytes, int]:
+    """
+    Decompress an LZMA/XZ payload as it arrives, ignoring whatever follows the last valid stream.
+
+    Concatenated streams are decoded in turn. Decoding stops cleanly at the last end-of-stream
+    marker that is followed by data which is not another complete stream. A stream written without
+    an end marker is cut at the first byte the decoder rejects. Either way the payload is decoded
+    once, however much junk follows it.
+
+    Args:
+        chunks: The compressed payload as an iterable of byte chunks, e.g. ``response.iter_content()``.
+
+    Returns:
+        Tuple[bytes, int]: The decompressed data and the number of trailing bytes ignored. The count is
+        exact after an end-of-stream marker. Without one it is approximate: the decoder cannot tell where
+        such a stream stops, and accepts a few of the bytes that follow before rejecting one, so those
+        bytes, or all of them if none is rejected, count as part of the stream.
+
+    Raises:
+        lzma.LZMAError: If the payload does not start with a valid stream.
+    """
+    blocks = _split_blocks(chunks)
+    results = []            # Output of every completed stream.
+    output = []             # Output of the stream being decoded.
+    consumed = []           # Input of the stream being decoded.
+    decomp = lzma.LZMADecompressor(lzma.FORMAT_AUTO)
+
+    for block in blocks:
+        while block:
+            try:
+                output.append(decomp.decompress(block))
+            except lzma.LZMAError:
+                if results:
+                    # Leftover data is not a valid LZMA/XZ stream; ignore it.
+                    return b"".join(results), sum(map(len, consumed)) + len(block) + sum(map(len, blocks))
+
+                # The first stream has no end marker. Decode it again up to the byte the decoder rejects.
+                data, valid = _decompress_lzma_prefix(consumed, block)
+                return data, len(block) - valid + sum(map(len, blocks))
+
+            consumed.append(block)
+            block = b''
+            if decomp.eof:
+                results.append(b"".join(output))
+                block = decomp.unused_data
+                output, consumed = [], []
+                decomp = lzma.LZMADecompressor(lzma.FORMAT_AUTO)
+
+    if results and consumed:
+        # An unfinished stream after a complete one is trailing junk.
+        return b"".join(results), sum(map(len, consumed))
+
+    results.append(b"".join(output))
+    return b"".join(results), 0
+
+
+def _decompress_lzma_prefix(consumed, failing_block) -> Tuple[bytes, int]:
+    """Replay a stream and feed its failing block byte by byte. Returns the output and the valid bytes of the block."""
+    decomp = lzma.LZMADecompressor(lzma.FORMAT_AUTO)
+    output = [decomp.decompress(b"".join(consumed))]
+
+    for valid in range(len(failing_block)):
         try:
-            decompress_lzma(byt[0:length])
+            output.append(decomp.decompress(failing_block[valid:valid + 1]))
         except lzma.LZMAError:
-            length -= 1
-            stay = True
+            if not any(output):
+                raise  # Nothing decoded before the error; the payload was never a valid stream.
+            return b"".join(output), valid
+
+    return b"".join(output), len(failing_block)
+
+
+def decompress_lzma(data):
+    return decompress_lzma_stream([data])[0]
+
+
+def fix(fetcher: SourceFetcher = None):
+    fetcher = fetcher or _default_fetcher()
+    data, ignored = decompress_lzma_stream(fetcher.iter_content('manifest_index', MANIFEST_INDEX_URL, 1 << 14))
+    if ignored:
+        # The published index has no end marker, so the count may be a few bytes short.
+        print(f"Ignored about {ignored} trailing bytes after the manifest index stream")
+
+    return data.decode("utf-8")
+
 
-    return decompress_lzma(byt[0:length]).decode("utf-8")
+def decode_manifest_file(manifest_url, fetcher: SourceFetcher = None):
+    json_file = (fetcher or _default_fetcher()).get(manifest_url.split('_')[0], MANIFEST_URL + manifest_url)
+    return json.loads(json_file.decode('utf-8'), strict=False)
 
 
-def decode_manifest_file(manifest_url):
-    json_file = requests.get(f"http://content.warframe.com/PublicExport/Manifest/{manifest_url}").text
-    return json.loads(json_file, strict=False)
+MANIFEST_NAMES = ['ExportRecipes', 'ExportResources', 'ExportWarframes', 'ExportWeapons', 'ExportSentinels']
 
 
-def get_manifest():
-    wf_mainfest = fix().split('\r\n')
+def get_manifest_urls(fetcher: SourceFetcher = None):
+    """
+    Return the manifest file name of each of ``MANIFEST_NAMES``.
 
+    The names end in a content hash, so they change exactly when the manifests do.
+    """
+    wf_mainfest = fix(fetcher).split('\r\n')
+
+    manifest_urls = {}
     for item in wf_mainfest:
-        if "ExportRecipes" in item:
-            recipes = decode_manifest_file(item)
-        elif "ExportResources" in item:
-            resources = decode_manifest_file(item)
-        elif "ExportWarframes" in item:
-            warframes = decode_manifest_file(item)
-        elif "ExportWeapons" in item:
-            weapons = decode_manifest_file(item)
-        elif "ExportSentinels" in item:
-            sentinels = decode_manifest_file(item)
+        for name in MANIFEST_NAMES:
+            if name in item:
+                manifest_urls[name] = item
+
+    return manifest_urls
+
+
+def get_manifest(fetcher: SourceFetcher = None, manifest_urls=None):
+    fetcher = fetcher or _default_fetcher()
+    if manifest_urls is None:
+        manifest_urls = get_manifest_urls(fetcher)
+
+    manifests = fetcher.map(lambda name: decode_manifest_file(manifest_urls[name], fetcher), MANIFEST_NAMES)
 
-    return recipes, resources, warframes, weapons, sentinels
+    return tuple(manifests)
 
 
 def build_parser(resources, warframes, weapons, sentinels):
@@ -254,9 +711,10 @@ def build_parser(resources, warframes, weapons, sentinels):
     return parser
 
 
-def get_mainfest_data(recipes=None, resources=None, warframes=None, weapons=None, sentinels=None):
+def get_mainfest_data(recipes=None, resources=None, warframes=None, weapons=None, sentinels=None,
+                      fetcher: SourceFetcher = None, manifest_urls=None):
     if any(x is None for x in [recipes, resources, warframes, weapons, sentinels]):
-        recipes, resources, warframes, weapons, sentinels = get_manifest()
+        recipes, resources, warframes, weapons, sentinels = get_manifest(fetcher, manifest_urls)
 
     parser = build_parser(resources, warframes, weapons, sentinels)
 
@@ -310,8 +768,254 @@ def get_mainfest_data(recipes=None, resources=None, warframes=None, weapons=None
     return ducat_dict, required_dict, type_dict
 
 
-index_file = build_files()
+# Bump whenever a stage's parsing changes, so outputs cached by an older builder are not reused.
+BUILD_STATE_VERSION = 3
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hashed(chunks: Iterable[bytes], hasher) -> Iterator[bytes]:
+    """Pass chunks through, feeding each to ``hasher`` on the way, so a source is hashed as it streams in."""
+    for chunk in chunks:
+        hasher.update(chunk)
+        yield chunk
+
+
+class BuildState:
+    """
+    Source hashes and stage outputs of the previous build, kept in a directory between runs.
+
+    ``manifest.json`` maps each stage to the hash of the sources it was built from; the stage's index
+    sections live next to it in ``<stage>.json.gz``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hashes = {}
+        self._lock = threading.Lock()
+
+        try:
+            with open(os.path.join(path, 'manifest.json')) as fp:
+                manifest = json.load(fp)
+        except (OSError, ValueError):
+            return
+
+        if manifest.get('version') == BUILD_STATE_VERSION:
+            self.hashes = manifest.get('stages', {})
+
+    def load(self, stage: str, source_hash: str) -> Optional[Dict]:
+        """Return the sections a stage built from the same sources last time, or None."""
+        if self.hashes.get(stage) != source_hash:
+            return None
+
+        try:
+            with gzip.open(os.path.join(self.path, f"{stage}.json.gz"), 'rb') as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, stage: str, source_hash: str, sections: Dict):
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            _write_gzip(os.path.join(self.path, f"{stage}.json.gz"), json.dumps(sections).encode('utf-8'))
+
+            self.hashes[stage] = source_hash
+            _write_atomic(os.path.join(self.path, 'manifest.json'),
+                          json.dumps({'version': BUILD_STATE_VERSION, 'stages': self.hashes},
+                                     indent=4, sort_keys=True).encode('utf-8'))
+
+
+def _write_gzip(path: str, data: bytes):
+    # A fixed mtime keeps the archive byte-identical whenever its content is.
+    _write_atomic(path, gzip.compress(data, mtime=0))
+
+
+def _manual_relics_source() -> str:
+    """Names and content hashes of the ``manual_relics`` files, which the relic stage reads besides the drop table."""
+    if not os.path.exists('manual_relics'):
+        return ''
+
+    lines = []
+    for relic_file in sorted(os.listdir('manual_relics')):
+        with open(f'manual_relics/{relic_file}', 'rb') as fp:
+            lines.append(f"{relic_file}={_content_hash(fp.read())}")
+
+    return '\n'.join(lines)
+
+
+def _relic_stage(fetcher):
+    # The drop table goes through the hasher and the pull parser in the same loop and is never held whole.
+    # An unchanged table still streams through the parser; the stage then skips turning its rows into sections.
+    hasher = hashlib.sha256()
+    tables, nv_relics = _read_drop_table(_hashed(fetcher.iter_content('droptables', DROP_TABLE_URL), hasher))
+
+    def build():
+        relic_list, _, chance_list = _relic_tables(tables, nv_relics)
+        return {'relics': relic_list, 'non_vaulted': sorted(nv_relics), 'chances': chance_list}
+
+    source_hash = hasher.hexdigest()
+    manual_relics = _manual_relics_source()
+    if manual_relics:
+        source_hash = _content_hash(f"{source_hash}\n{manual_relics}".encode('utf-8'))
+
+    return source_hash, build
+
+
+def _price_stage(fetcher, history_path: str = None):
+    # Hashed as it streams in; the JSON parser and the history store need the whole file either way.
+    hasher = hashlib.sha256()
+    price_history = b''.join(_hashed(fetcher.iter_content('price_history', get_price_history_url(fetcher)), hasher))
+    if history_path:
+        # Every build records its day in the history, even when the index prices are reused.
+        append_price_history(history_path, json.loads(price_history))
+
+    return hasher.hexdigest(), lambda: {'prices': build_price_data(json.loads(price_history))}
+
+
+def _manifest_stage(fetcher):
+    # Only the manifest index is downloaded up front; its entries carry the manifests' content hashes.
+    manifest_urls = get_manifest_urls(fetcher)
+    source = '\n'.join(f"{name}={manifest_urls.get(name)}" for name in MANIFEST_NAMES)
+
+    def build():
+        ducat_data, required_data, type_data = get_mainfest_data(fetcher=fetcher, manifest_urls=manifest_urls)
+        return {'ducats': ducat_data, 'required_count': required_data, 'types': type_data}
+
+    return _content_hash(source.encode('utf-8')), build
+
+
+BUILD_STAGES = {'relics': _relic_stage, 'prices': _price_stage, 'manifests': _manifest_stage}
+
+INDEX_SECTIONS = ['relics', 'non_vaulted', 'prices', 'ducats', 'required_count', 'types', 'chances']
+
+
+def build_files_incremental(state: BuildState, fetcher: SourceFetcher = None, force: bool = False,
+                            history_path: str = None):
+    """
+    Build the index like ``build_files``, reusing the output of every stage whose sources are unchanged.
 
+    Args:
+        state (BuildState): Hashes and outputs of the previous build; updated for every stage that ran.
+        fetcher (SourceFetcher, optional): Fetcher for the sources.
+        force (bool): Run every stage even if its sources are unchanged.
+        history_path (str, optional): Price history store to append the day's prices to.
 
-with gzip.open('index.json.gz', 'wb') as fp:
-    fp.write(encode_and_compress(index_file))
+    Returns:
+        Tuple[Dict, List[Tuple[str, str, float]]]: The index and a ``(stage, 'ran' or 'skipped', seconds)``
+        log entry per stage.
+    """
+    fetcher = fetcher or _default_fetcher()
+    stage_options = {'prices': {'history_path': history_path}}
+
+    def run_stage(stage):
+        start = time.perf_counter()
+        source_hash, build = BUILD_STAGES[stage](fetcher, **stage_options.get(stage, {}))
+
+        sections = None if force else state.load(stage, source_hash)
+        status = 'skipped'
+        if sections is None:
+            sections = build()
+            state.save(stage, source_hash, sections)
+            status = 'ran'
+
+        return sections, (stage, status, time.perf_counter() - start)
+
+    results = fetcher.map(run_stage, list(BUILD_STAGES))
+
+    sections = {}
+    for stage_sections, _ in results:
+        sections.update(stage_sections)
+
+    # Optional sections are left out when empty, as an index without them reads the same.
+    index_file = {section: sections[section] for section in INDEX_SECTIONS
+                  if section not in OPTIONAL_SECTIONS or sections[section]}
+
+    return index_file, [entry for _, entry in results]
+
+
+def write_index(index_file, path: str) -> bool:
+    """Write the index unless ``path`` already holds the same index; returns whether it was written."""
+    encoded = encode_and_compress(index_file)
+    try:
+        with gzip.open(path, 'rb') as fp:
+            if fp.read() == encoded:
+                return False
+    except (OSError, EOFError):
+        pass
+
+    _write_gzip(path, encoded)
+    return True
+
+
+def write_binary(index_file, path: str, json_path: str) -> bool:
+    """
+    Write the binary form of the index unless ``path`` already holds it; returns whether it was written.
+
+    The binary index records the sha1 of ``json_path`` as its version, so both files load as the same snapshot.
+    """
+    with open(json_path, 'rb') as fp:
+        encoded = encode_binary_index(index_file, hashlib.sha1(fp.read()).hexdigest())
+
+    try:
+        with open(path, 'rb') as fp:
+            if fp.read() == encoded:
+                return False
+    except OSError:
+        pass
+
+    _write_atomic(path, encoded)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build index.json.gz from the drop table, prices and manifests.")
+    parser.add_argument('--output', default='index.json.gz', help="Where to write the index.")
+    parser.add_argument('--binary-output', default='index.bin',
+                        help="Where to write the memory-mappable binary index; empty to skip it.")
+    parser.add_argument('--mirror', help="Base URL of a stand-in server serving <host>/<path> for every source.")
+    parser.add_argument('--fixtures', help="Directory laid out as <host>/<path> to read every source from.")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent downloads; 1 fetches serially.")
+    parser.add_argument('--timeout', type=float, default=30, help="Default per-source timeout in seconds.")
+    parser.add_argument('--retries', type=int, default=3, help="Retries per source on connection errors and 5xx.")
+    parser.add_argument('--state', default='.build_state',
+                        help="Directory keeping source hashes and stage outputs between builds.")
+    parser.add_argument('--history', default='price_history.npz',
+                        help="Price history store to append the day's prices to; empty to skip it.")
+    parser.add_argument('--changes', default='changes.json',
+                        help="Where to write what changed since the index at --output, when anything did; "
+                             "empty to skip it.")
+    parser.add_argument('--full', action='store_true', help="Rebuild every stage even if its sources are unchanged.")
+    args = parser.parse_args(argv)
+
+    fetcher = SourceFetcher(mirror=args.mirror, fixtures=args.fixtures, timeout=args.timeout,
+                            retries=args.retries, workers=args.workers)
+
+    start = time.perf_counter()
+    index_file, stage_log = build_files_incremental(BuildState(args.state), fetcher, force=args.full,
+                                                     history_path=args.history)
+    for stage, status, seconds in stage_log:
+        print(f"stage {stage:10} {status:8} {seconds:7.3f}s")
+
+    if args.changes and os.path.exists(args.output):
+        # Diff against the encoded index so the new version is the one readers of the written file see.
+        changes = diff_indexes(args.output, gzip.compress(encode_and_compress(index_file), mtime=0))
+        if changes:
+            # Kept when the index is unchanged, so it always describes the last change published.
+            _write_atomic(args.changes, json.dumps(changes.to_dict(), indent=4).encode('utf-8'))
+        print(f"Changed sections: {', '.join(changes.sections) or 'none'}; "
+              f"{len(changes.affected_relics)} relics need new average returns")
+
+    outputs = [(args.output, write_index(index_file, args.output))]
+    if args.binary_output:
+        outputs.append((args.binary_output, write_binary(index_file, args.binary_output, args.output)))
+
+    print(fetcher.report())
+    for path, written in outputs:
+        print(f"{'Wrote' if written else 'Unchanged, kept'} {path}")
+    print(f"Finished in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import argparse
+import json
+import sys
+
+from relic_engine.diff import diff_indexes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print what changed between two relic index files as JSON.")
+    parser.add_argument('old', help="The old index (index.json, index.json.gz or index.bin).")
+    parser.add_argument('new', help="The new index.")
+    parser.add_argument('--price-threshold', type=float, default=0,
+                        help="Report price moves larger than this many platinum.")
+    parser.add_argument('--indent', type=int, default=None, help="Indent the JSON output.")
+    args = parser.parse_args(argv)
+
+    changes = diff_indexes(args.old, args.new, args.price_threshold)
+    json.dump(changes.to_dict(), sys.stdout, indent=args.indent)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,53 +1,28 @@
-import gzip
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
 import warnings
-from typing import Dict, Tuple, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Tuple, List, TextIO, Union
 import json
 
-import requests
-
-
-def __decode_and_decompress(url):
-    file = requests.get(url).content
-    file = gzip.decompress(file)
-    return json.loads(file.decode("utf-8"))
-
-
-def __get_index_file():
-    index = __decode_and_decompress("https://github.com/JCalMcBride/RelicEngine/raw/master/index.json.gz")
-
-    return index
-
-
-__index = __get_index_file()
-__relic_dict = __index['relics']
-__price_dict = __index['prices']
-__ducat_dict = __index['ducats']
-__required_dict = __index['required_count']
-__nv_relics = __index['non_vaulted']
-__type_dict = __index['types']
-
-__rarity_dict = {
-    'i': {
-        1: ((25 + (1 / 3)) / 100),
-        2: .11,
-        3: .02
-    },
-    'e': {
-        1: ((23 + (1 / 3)) / 100),
-        2: .13,
-        3: .04
-    },
-    'f': {
-        1: .2,
-        2: .17,
-        3: .06
-    },
-    'r': {
-        1: (1 / 6),
-        2: .2,
-        3: .1
-    },
-}
+from .batch import (REFINEMENTS, STYLES, VALUATIONS, ReturnTable, get_average_returns, get_batch_arrays,
+                    get_drop_selection, get_historical_returns, get_plat_per_ducat, get_scenario_matrix,
+                    get_scenario_returns)
+from .binary import BinaryIndex, encode_binary_index, write_binary_index
+from .cache import CacheInfo, ResultCache
+from .diff import ChangeSet, diff_indexes, get_section_hashes, recompute_returns
+from .history import BASES, PriceHistory, get_basis_prices, get_history, load_history
+from .index import (IndexLoadError, IndexRefresher, IndexSnapshot, configure, fetch_index, get_index, get_snapshot,
+                    load_index, refresh_index, register_carry_over, register_derived, start_refresher, stop_refresher,
+                    _active_version)
+from .ranking import RelicRanking, get_ranking, get_top_relics, relic_era
+from .rarity import get_drop_chance
+from .simulate import SimulationResult, simulate_returns
+from .sources import SourceIndex, get_best_source, get_part_sources, get_source_index
+from .squad import get_mixed_squad_returns, get_squad_return, get_squad_returns
 
 
 def get_set_name(prime_part):
@@ -58,28 +33,12 @@ def get_set_name(prime_part):
     return set_name
 
 
-def get_drop_chance(refinement: str, rarity_id: int):
-    ref = refinement.lower()[0]
-    try:
-        return __rarity_dict[ref][rarity_id]
-    except KeyError:
-        drop_chances = []
-        for digit in str(rarity_id):
-            if int(digit) in __rarity_dict[ref]:
-                drop_chances.append(get_drop_chance(ref, int(digit)))
-            else:
-                return 'N/A'
-
-        return drop_chances
-
-
 def get_relic_drops(relic, refinement):
-    relic_drops = {}
+    return _get_relic_drops(get_snapshot(), relic, refinement)
 
-    for drop in __relic_dict[relic].items():
-        relic_drops[drop[0]] = get_drop_chance(refinement, drop[1])
 
-    return relic_drops
+def _get_relic_drops(snapshot, relic, refinement):
+    return snapshot.drop_chances(relic, refinement)
 
 
 def fix_refinement_style(args):
@@ -106,37 +65,54 @@ def fix_refinement_style(args):
     return refinement, style
 
 
-def get_price(item):
-    if item in __price_dict:
-        return __price_dict[item]
-    else:
-        return 0
+def get_price(item, basis=None, day=None):
+    if basis is not None:
+        # A part the price history has no price for keeps its index price.
+        price = get_history().price(item, basis, day)
+        if price is not None:
+            return price
+
+    return _get_price(get_snapshot(), item)
+
+
+def _get_price(snapshot, item):
+    return snapshot.price(item)
 
 
 def get_ducats(item):
-    if item in __ducat_dict:
-        return __ducat_dict[item]
-    else:
-        return 0
+    return get_snapshot().ducats(item)
 
 
 def get_required_amount(item):
-    if item in __required_dict:
-        return __required_dict[item]
+    return _get_required_amount(get_snapshot(), item)
+
+
+def _get_required_amount(snapshot, item):
+    required_dict = snapshot.required_dict
+    if item in required_dict:
+        return required_dict[item]
 
     return 1
 
 
 def get_relic_prices(drops):
+    return _get_relic_prices(get_snapshot(), drops)
+
+
+def _get_relic_prices(snapshot, drops):
     relic_prices = {}
 
     for drop in drops:
-        relic_prices[drop] = get_price(drop)
+        relic_prices[drop] = _get_price(snapshot, drop)
 
     return relic_prices
 
 
 def calculate_average(drops, style_data, custom_prices=None):
+    return _calculate_average(get_snapshot(), drops, style_data, custom_prices)
+
+
+def _calculate_average(snapshot, drops, style_data, custom_prices=None):
     modifier = style_data[0]
     num_drops = style_data[1]
     chance_left = 1
@@ -146,7 +122,7 @@ def calculate_average(drops, style_data, custom_prices=None):
     if custom_prices:
         relic_prices = {k: custom_prices[k] for k in drops if k in custom_prices}
     else:
-        relic_prices = get_relic_prices(drops)
+        relic_prices = _get_relic_prices(snapshot, drops)
 
     relic_prices = {k: v for k, v in sorted(relic_prices.items(), key=lambda item: item[1], reverse=True)}
 
@@ -177,7 +153,37 @@ def calculate_average(drops, style_data, custom_prices=None):
     return average_return
 
 
+average_return_cache = ResultCache(published=_active_version)
+
+
+def _keep_average_returns(changes):
+    stale = set(changes.affected_relics) | set(changes.removed_relics)
+    return lambda key: key[0] not in stale
+
+
+register_carry_over(average_return_cache, _keep_average_returns)
+
+
 def get_average_return(relic, arg1=None, arg2=None, custom_prices=None):
+    snapshot = get_snapshot()
+    refinement, style = fix_refinement_style([arg1, arg2])
+
+    overrides = None
+    if custom_prices:
+        # Only the prices of this relic's drops matter, so identical overrides from different callers share entries.
+        overrides = tuple(sorted((part, custom_prices[part]) for part in snapshot.relic_drops(relic)
+                                 if part in custom_prices))
+
+    key = (relic, refinement, style, overrides)
+    hit, average_return = average_return_cache.get(key, snapshot.version)
+    if not hit:
+        average_return = _get_average_return(snapshot, relic, refinement, style, custom_prices)
+        average_return_cache.put(key, snapshot.version, average_return)
+
+    return average_return
+
+
+def _get_average_return(snapshot, relic, arg1=None, arg2=None, custom_prices=None):
     average_dict = {'s': 1,
                     '1': 4,
                     '2': [2, 2],
@@ -187,14 +193,14 @@ def get_average_return(relic, arg1=None, arg2=None, custom_prices=None):
 
     refinement, style = fix_refinement_style([arg1, arg2])
 
-    drops = get_relic_drops(relic, refinement)
+    drops = _get_relic_drops(snapshot, relic, refinement)
     average_return = 0
     if not isinstance(average_dict[style], list):
         for relic_drop in drops:
             if custom_prices and relic_drop in custom_prices:
                 price = custom_prices[relic_drop]
             else:
-                price = get_price(relic_drop)
+                price = _get_price(snapshot, relic_drop)
             chance = drops[relic_drop]
 
             try:
@@ -205,71 +211,185 @@ def get_average_return(relic, arg1=None, arg2=None, custom_prices=None):
 
         average_return *= average_dict[style]
     else:
-        average_return = calculate_average(drops, average_dict[style], custom_prices)
+        average_return = _calculate_average(snapshot, drops, average_dict[style], custom_prices)
 
     return round(average_return, 3)
 
 
+class SetIndex:
+    """
+    Lookups between sets, parts and relics, built once per index snapshot.
+
+    Parts are grouped by ``get_set_name`` instead of substring matching, so one set name being a
+    prefix of another cannot pull in the wrong parts.
+    """
+
+    def __init__(self, snapshot):
+        self.set_parts = {}
+        for part in snapshot.ducat_dict:
+            self.set_parts.setdefault(get_set_name(part), []).append(part)
+
+        model = snapshot.model
+        self.part_relics = {}
+        for record in model.records():
+            for part_id in record.part_ids:
+                self.part_relics.setdefault(model.parts[part_id], []).append(record.name)
+
+        relic_order = model.relic_ids
+        self.set_relics = {}
+        for set_name, parts in self.set_parts.items():
+            relics = {relic for part in parts for relic in self.part_relics.get(part, [])}
+            self.set_relics[set_name] = sorted(relics, key=relic_order.get)
+
+
+@register_derived('sets')
+def _build_set_index(snapshot):
+    return SetIndex(snapshot)
+
+
+def _normalize_set_name(set_name):
+    return set_name[:-len(' Set')] if set_name.endswith(' Set') else set_name
+
+
 def get_set_parts(set_name):
-    return list(get_set_ducats(set_name))
+    return _get_set_parts(get_snapshot(), set_name)
+
+
+def _get_set_parts(snapshot, set_name):
+    return list(snapshot.derived('sets').set_parts.get(_normalize_set_name(set_name), []))
 
 
 def get_set_ducats(set_name):
-    return dict(filter(lambda x: set_name in x[0], __ducat_dict.items()))
+    return _get_set_ducats(get_snapshot(), set_name)
+
+
+def _get_set_ducats(snapshot, set_name):
+    return {part: snapshot.ducat_dict[part] for part in _get_set_parts(snapshot, set_name)}
+
+
+def get_set_relics(set_name):
+    """Return every relic that drops a part of the set."""
+    return list(get_snapshot().derived('sets').set_relics.get(_normalize_set_name(set_name), []))
+
+
+def get_part_relics(part):
+    """Return every relic that drops the part."""
+    return list(get_snapshot().derived('sets').part_relics.get(part, []))
 
 
 def get_set_list():
-    return list(filter(lambda x: 'Set' in x, __price_dict.keys()))
+    return _get_set_list(get_snapshot())
+
+
+def _get_set_list(snapshot):
+    return list(filter(lambda x: 'Set' in x, snapshot.price_dict.keys()))
 
 
 def get_relic_list():
-    return list(__relic_dict)
+    return list(get_snapshot().relic_dict)
 
 
 def get_relic_dict():
-    return __relic_dict
+    """Return ``{relic: {part: rarity}}`` as a dict, built once per index snapshot on first call."""
+    return get_snapshot().derived('relic_dict')
+
+
+@register_derived('relic_dict', warm=False)
+def _build_relic_dict(snapshot):
+    return dict(snapshot.relic_dict.items())
+
+
+def get_relic_view():
+    """Return ``{relic: {part: rarity}}`` as a read-only mapping over the relic model, without copying it."""
+    return get_snapshot().relic_dict
 
 
 def get_required_dict():
-    return __required_dict
+    return get_snapshot().required_dict
 
 
 def get_ducat_dict():
-    return __ducat_dict
+    return get_snapshot().ducat_dict
 
 
 def get_price_dict():
-    return __price_dict
+    return get_snapshot().price_dict
 
 
 def get_non_vaulted_relics():
-    return __nv_relics
+    return get_snapshot().nv_relics
 
 
 def get_type_dict():
-    return __type_dict
+    return get_snapshot().type_dict
 
 
 def get_set_type(item):
     item_type = None
-    if item in __type_dict:
-        item_type = __type_dict[item]
+    type_dict = get_snapshot().type_dict
+    if item in type_dict:
+        item_type = type_dict[item]
 
     return item_type
 
 
 def get_vaulted_relics():
-    return list(set(__relic_dict) - set(__nv_relics))
+    return list(get_snapshot().derived('vaulted'))
+
+
+@register_derived('vaulted')
+def _build_vaulted_relics(snapshot):
+    non_vaulted = set(snapshot.nv_relics)
+    return tuple(relic for relic in snapshot.relic_dict if relic not in non_vaulted)
 
 
 def get_set_required(set_name):
+    snapshot = get_snapshot()
     required_amount = {}
-    for item in get_set_parts(set_name):
-        required_amount[item] = get_required_amount(item)
+    for item in _get_set_parts(snapshot, set_name):
+        required_amount[item] = _get_required_amount(snapshot, item)
 
     return required_amount
 
 
+def get_farming_plan(set_name, owned=None, style='4b4', vaulted=None):
+    """
+    Plan which relic to farm for every part of a set that is still missing.
+
+    Each part is farmed from its best source (see ``get_best_source``); the expected runs for a part are
+    the runs per copy times the copies still missing, from ``get_required_amount``.
+
+    Args:
+        set_name (str): Set name, with or without the trailing " Set".
+        owned (Dict[str, int], optional): Copies of each part already owned.
+        style (str): Style the relics are run in.
+        vaulted (bool, optional): Only farm from vaulted (True) or unvaulted (False) relics.
+
+    Returns:
+        Dict: ``parts``, one entry per missing part with its ``missing`` count, best ``source`` (None if no
+        relic drops it) and ``expected_runs``, hardest part first; and the total ``expected_runs``.
+    """
+    snapshot = get_snapshot()
+    sources = get_source_index(snapshot)
+    owned = owned or {}
+
+    plan = []
+    for part in _get_set_parts(snapshot, set_name):
+        missing = _get_required_amount(snapshot, part) - owned.get(part, 0)
+        if missing <= 0:
+            continue
+
+        source = sources.best(part, style, vaulted=vaulted)
+        plan.append({'part': part,
+                     'missing': missing,
+                     'source': source,
+                     'expected_runs': missing * source['expected_runs'] if source else math.inf})
+
+    plan.sort(key=lambda entry: entry['expected_runs'], reverse=True)
+
+    return {'parts': plan, 'expected_runs': sum(entry['expected_runs'] for entry in plan)}
+
+
 PAlist = {
     "prime access": {
         "Ash": "Carrier,Vectis",
@@ -317,73 +437,192 @@ PAlist = {
     }
 }
 
+# Warframe or weapon name -> the Prime Access frame it shipped with, first match in PAlist order.
+_prime_access_frames = {}
+for _frame, _items in PAlist['prime access'].items():
+    for _name in [_frame] + _items.split(','):
+        _prime_access_frames.setdefault(_name, _frame)
 
-def _build_relic_data(relic_dict: Dict, price_dict: Dict, ducat_dict: Dict, nv_relics: List[str]) -> Dict:
-    """Helper function to build relic data."""
-    relic_data = {}
-    tier_map = {3: 'Rare', 2: 'Uncommon', 1: 'Common'}
 
-    for relic, drops in relic_dict.items():
-        relic_data[relic] = {}
-        for refinement in ['Intact', 'Exceptional', 'Flawless', 'Radiant']:
-            relic_data[relic][refinement] = {
+def _iter_relic_data(snapshot: IndexSnapshot, price_dict: Dict, ducat_dict: Dict, nv_relics: List[str],
+                     rows: Iterable[int] = None) -> Iterator[Tuple[str, Dict]]:
+    """Helper function to build relic data, one ``(relic, data)`` pair at a time, for every relic or some rows."""
+    tier_map = {3: 'Rare', 2: 'Uncommon', 1: 'Common'}
+    model = snapshot.model
+    nv_relics = set(nv_relics)
+    styles = ['solo', '1b1', '2b2', '3b3', '4b4']
+
+    # Reward chance and average return share of every drop, for all relics in one pass.
+    arrays = get_batch_arrays(snapshot)
+    selection, shares = get_drop_selection(snapshot=snapshot)
+
+    for record in model.records(rows):
+        relic = record.name
+        data = {}
+        row = arrays.relic_ids[relic]
+        relic_selection = selection[row, :, :, :len(styles)].tolist()
+        relic_shares = shares[row, :, :, :len(styles)].round(3).tolist()
+
+        # Drops fill slots in order, one slot per rarity.
+        first_slots = [0]
+        for chance in record.chances[0]:
+            first_slots.append(first_slots[-1] + (len(chance) if isinstance(chance, tuple) else 1))
+
+        for refinement_index, refinement in enumerate(['Intact', 'Exceptional', 'Flawless', 'Radiant']):
+            data[refinement] = {
                 'drops': {},
                 'vaulted': relic not in nv_relics,
                 'average_return': {}
             }
 
-            for part, rarity in drops.items():
-                tier_id = int(str(rarity)[0]) - 1  # Take first digit and shift by 1
-                chance = get_drop_chance(refinement[0], rarity)
+            chances = record.chances[refinement_index]
+            for part_id, code, chance, slot in zip(record.part_ids, record.codes, chances, first_slots):
+                part = model.parts[part_id]
+                tier_id = int(str(model.rarities[code])[0]) - 1  # Take first digit and shift by 1
 
-                relic_data[relic][refinement]['drops'][part] = {
-                    'chance': chance,
-                    'tier': tier_map[tier_id + 1],
+                data[refinement]['drops'][part] = {
+                    'chance': list(chance) if isinstance(chance, tuple) else chance,
+                    'tier': tier_map.get(tier_id + 1, 'N/A'),
                     'tier_id': tier_id,
                     'price': price_dict.get(part, 0),
                     'ducats': ducat_dict.get(part, 0),
-                    'calculated_chance': {style: None for style in ['solo', '1b1', '2b2', '3b3', '4b4']},
-                    'calculated_price': {style: None for style in ['solo', '1b1', '2b2', '3b3', '4b4']}
+                    'calculated_chance': dict(zip(styles, relic_selection[slot][refinement_index])),
+                    'calculated_price': dict(zip(styles, relic_shares[slot][refinement_index]))
                 }
 
-            avg_return = get_average_return(relic, refinement[0], '4')
-            relic_data[relic][refinement]['average_return'] = {
-                'solo': get_average_return(relic, refinement[0], 's'),
-                '1b1': get_average_return(relic, refinement[0], '1'),
-                '2b2': get_average_return(relic, refinement[0], '2'),
-                '3b3': get_average_return(relic, refinement[0], '3'),
+            avg_return = _get_average_return(snapshot, relic, refinement[0], '4')
+            data[refinement]['average_return'] = {
+                'solo': _get_average_return(snapshot, relic, refinement[0], 's'),
+                '1b1': _get_average_return(snapshot, relic, refinement[0], '1'),
+                '2b2': _get_average_return(snapshot, relic, refinement[0], '2'),
+                '3b3': _get_average_return(snapshot, relic, refinement[0], '3'),
                 '4b4': avg_return
             }
 
-    return relic_data
+        yield relic, data
 
 
-def _build_set_data(relic_data: Dict, relic_dict: Dict, price_dict: Dict, ducat_dict: Dict, required_dict: Dict,
-                    type_dict: Dict) -> Dict:
-    """Helper function to build set data."""
-    set_data = {}
-    for set_name in get_set_list():
+def _iter_set_data(snapshot: IndexSnapshot, price_dict: Dict, ducat_dict: Dict, required_dict: Dict,
+                   type_dict: Dict, nv_relics: List[str]) -> Iterator[Tuple[str, Dict]]:
+    """Helper function to build set data, one ``(set name, data)`` pair at a time."""
+    set_index = snapshot.derived('sets')
+    nv_relics = set(nv_relics)
+    for set_name in _get_set_list(snapshot):
         set_name_without_set = set_name.replace(' Set', '')
-        set_data[set_name_without_set] = {
+        data = {
             'parts': {},
-            'vaulted': all(relic_data[relic]['Intact']['vaulted'] for relic in relic_dict if
-                           any(part in relic_dict[relic] for part in get_set_parts(set_name_without_set))),
+            'vaulted': all(relic not in nv_relics for relic in set_index.set_relics.get(set_name_without_set, [])),
             'type': type_dict.get(set_name_without_set, type_dict.get(set_name, 'N/A')),
             'plat': price_dict.get(set_name, 0),
-            'prime-access': next((frame for frame, items in PAlist['prime access'].items() if
-                                  set_name_without_set.split()[0] in [frame] + items.split(',')), 'N/A')
+            'prime-access': _prime_access_frames.get(set_name_without_set.split()[0], 'N/A')
         }
 
-        for part in get_set_parts(set_name_without_set):
-            set_data[set_name_without_set]['parts'][part] = {
+        for part in set_index.set_parts.get(set_name_without_set, []):
+            data['parts'][part] = {
                 'plat': price_dict.get(part, 0),
                 'ducats': ducat_dict.get(part, 0),
                 'required': required_dict.get(part, 1)
             }
-    return set_data
+
+        yield set_name_without_set, data
+
+
+# Snapshot the relic data workers build from, set in each worker process by the pool's initializer.
+_shard_snapshot = None
+
+# Shards per worker; several keep workers busy when relics differ in cost.
+SHARDS_PER_WORKER = 4
 
 
-def build_json_files(pd_file: str = None) -> Tuple[Dict, Dict]:
+def _set_shard_snapshot(snapshot: IndexSnapshot):
+    """Forked worker initializer: the snapshot arrives as an initarg inherited from the parent, not pickled."""
+    global _shard_snapshot
+
+    _shard_snapshot = snapshot
+
+
+def _init_shard_worker(path: str, version: str):
+    global _shard_snapshot
+
+    snapshot = IndexSnapshot(BinaryIndex.open(path))
+    if snapshot.version != version:
+        raise ValueError(f"{path} changed while building relic data")
+    _shard_snapshot = snapshot
+
+
+def _build_relic_shard(bounds: Tuple[int, int]) -> List[Tuple[str, Dict]]:
+    """Build the relic data of rows ``start:stop`` in a worker process."""
+    snapshot = _shard_snapshot
+    return list(_iter_relic_data(snapshot, snapshot.price_dict, snapshot.ducat_dict, snapshot.nv_relics,
+                                 range(*bounds)))
+
+
+def _iter_relic_data_parallel(snapshot: IndexSnapshot, workers: int) -> Iterator[Tuple[str, Dict]]:
+    """
+    Build relic data on a process pool, yielding it in index order like ``_iter_relic_data``.
+
+    A single-threaded process forks its workers, which share its snapshot copy-on-write. Forking while
+    other threads run (the aio executor, the index refresher) could leave a child waiting on a lock one
+    of them held, so then workers are started fresh and memory-map the snapshot's binary index file,
+    written to a temporary file first when the snapshot was not loaded from one. Each pool hands its
+    snapshot to its own workers, so concurrent builds cannot see each other's.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if 'fork' in methods and threading.active_count() == 1:
+        yield from _map_relic_shards(snapshot, workers, multiprocessing.get_context('fork'), _set_shard_snapshot,
+                                     (snapshot,))
+        return
+
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    if snapshot.binary is not None and snapshot.binary.source:
+        yield from _map_relic_shards(snapshot, workers, context, _init_shard_worker,
+                                     (snapshot.binary.source, snapshot.version))
+        return
+
+    fd, path = tempfile.mkstemp(suffix='.bin', prefix='relic_engine_')
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(encode_binary_index(snapshot.index, snapshot.version))
+        yield from _map_relic_shards(snapshot, workers, context, _init_shard_worker, (path, snapshot.version))
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _map_relic_shards(snapshot: IndexSnapshot, workers: int, context, initializer,
+                      initargs: Tuple) -> Iterator[Tuple[str, Dict]]:
+    # Build what every shard reads before forking, so forked workers inherit it instead of rebuilding it.
+    relics = len(snapshot.model.relics)
+    get_batch_arrays(snapshot)
+
+    size = max(1, -(-relics // (workers * SHARDS_PER_WORKER)))
+    bounds = [(start, min(start + size, relics)) for start in range(0, relics, size)]
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=initializer,
+                             initargs=initargs) as pool:
+        for items in pool.map(_build_relic_shard, bounds):
+            yield from items
+
+
+def _iter_json_data(snapshot: IndexSnapshot,
+                    workers: int = 1) -> Tuple[Iterator[Tuple[str, Dict]], Iterator[Tuple[str, Dict]]]:
+    """Relic and set data of one snapshot, as lazy ``(key, value)`` iterators."""
+    price_dict = snapshot.price_dict
+    ducat_dict = snapshot.ducat_dict
+    nv_relics = snapshot.nv_relics
+
+    if workers > 1:
+        relic_items = _iter_relic_data_parallel(snapshot, workers)
+    else:
+        relic_items = _iter_relic_data(snapshot, price_dict, ducat_dict, nv_relics)
+
+    return (relic_items,
+            _iter_set_data(snapshot, price_dict, ducat_dict, snapshot.required_dict, snapshot.type_dict, nv_relics))
+
+
+def build_json_files(pd_file: str = None, workers: int = 1) -> Tuple[Dict, Dict]:
     """
     Build JSON files containing relic and set data for backwards compatibility.
 
@@ -392,25 +631,66 @@ def build_json_files(pd_file: str = None) -> Tuple[Dict, Dict]:
 
     Args:
         pd_file (str, optional): Price data file. This parameter is deprecated and not used in the current implementation.
+        workers (int): Worker processes building the relic data in shards; the result is identical to a
+            serial build. Workers share the index copy-on-write or map its binary form instead of receiving
+            a copy.
 
     Returns:
-        Tuple[Dict, Dict]: A tuple containing relic_data and set_data dictionaries.
+        Tuple[Dict, Dict]: A tuple containing relic_data and set_data dictionaries. Both hold only JSON types
+        (dicts, lists, strings, numbers, booleans and None) and share no objects with the index.
     """
     if pd_file is not None:
         warnings.warn("The 'pd_file' parameter is deprecated and not used in the current implementation.",
                       DeprecationWarning, stacklevel=2)
 
-    # Fetch required data
-    relic_dict = get_relic_dict()
-    price_dict = get_price_dict()
-    ducat_dict = get_ducat_dict()
-    required_dict = get_required_dict()
-    nv_relics = get_non_vaulted_relics()
-    type_dict = get_type_dict()
+    # Fetch required data from a single snapshot so a concurrent reload cannot mix index versions
+    relic_items, set_items = _iter_json_data(get_snapshot(), workers)
+
+    return dict(relic_items), dict(set_items)
+
+
+def _dump_json_items(items: Iterable[Tuple[str, object]], fp: TextIO, indent: Union[int, str, None]):
+    """Write ``(key, value)`` pairs as a JSON object, exactly as ``json.dump(dict(items), fp, indent=indent)``."""
+    if indent is None:
+        separator = ''
+        fp.write('{')
+        for key, value in items:
+            fp.write(separator + json.dumps(key) + ': ' + json.dumps(value))
+            separator = ', '
+        fp.write('}')
+        return
 
-    # Build relic and set data
-    relic_data = _build_relic_data(relic_dict, price_dict, ducat_dict, nv_relics)
-    set_data = _build_set_data(relic_data, relic_dict, price_dict, ducat_dict, required_dict, type_dict)
+    newline = '\n' + (indent if isinstance(indent, str) else ' ' * indent)
+    separator = newline
+    fp.write('{')
+    for key, value in items:
+        # Strings escape their newlines, so every newline in the dump is layout and takes one more level of indent.
+        fp.write(separator + json.dumps(key) + ': ' + json.dumps(value, indent=indent).replace('\n', newline))
+        separator = ',' + newline
+    fp.write('}' if separator == newline else '\n}')
 
-    # Convert to JSON-compatible format
-    return json.loads(json.dumps(relic_data)), json.loads(json.dumps(set_data))
+
+def write_json_files(relic_file: Union[str, os.PathLike, TextIO] = 'relic_data.json',
+                     set_file: Union[str, os.PathLike, TextIO] = 'set_data.json', indent: Union[int, str, None] = 4,
+                     workers: int = 1):
+    """
+    Stream the relic and set data of ``build_json_files`` to files, one relic or set at a time.
+
+    The output is identical to ``json.dump(data, fp, indent=indent)`` of the ``build_json_files`` dicts,
+    without holding the whole data or its serialised text in memory.
+
+    Args:
+        relic_file (Union[str, os.PathLike, TextIO]): Path or text stream for the relic data, e.g. a
+            socket's ``makefile('w')``.
+        set_file (Union[str, os.PathLike, TextIO]): Path or text stream for the set data.
+        indent (Union[int, str, None]): Indentation, as in ``json.dump``: spaces per level, the string to
+            indent each level with, or None for compact output on one line.
+        workers (int): Worker processes building the relic data, as in ``build_json_files``.
+    """
+    relic_items, set_items = _iter_json_data(get_snapshot(), workers)
+    for target, items in [(relic_file, relic_items), (set_file, set_items)]:
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, 'w') as fp:
+                _dump_json_items(items, fp, indent)
+        else:
+            _dump_json_items(items, target, indent)
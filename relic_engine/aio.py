@@ -0,0 +1,167 @@
+"""
+Asyncio counterparts of the blocking ``relic_engine`` calls, for bots and web servers.
+
+Fetching, decoding and every batch computation run on a small thread pool, so the event loop keeps
+serving while they work; at most ``max_concurrency`` of them run at once. Identical calls made while
+one is still running share its result instead of computing it again, so a burst of users asking for
+the same ranking costs one computation. Shared results are the same objects: copy before mutating.
+
+    from relic_engine import aio
+
+    await aio.load_index()
+    top = await aio.get_top_relics('Radiant', '4b4', k=10)
+"""
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional
+
+import relic_engine
+from . import index
+
+_config = {'max_concurrency': min(4, os.cpu_count() or 1)}
+_executor = None
+_executor_lock = threading.Lock()
+
+# Per event loop: the semaphore bounding offloaded calls and the calls in flight by key.
+_semaphores = weakref.WeakKeyDictionary()
+_inflight = weakref.WeakKeyDictionary()
+
+
+def configure(max_concurrency: int = None) -> dict:
+    """
+    Set how many blocking calls may run at once, across every event loop. Returns the settings.
+
+    Takes effect for event loops and calls started afterwards.
+    """
+    global _executor
+
+    if max_concurrency is not None:
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be positive, got {max_concurrency}")
+
+        with _executor_lock:
+            _config['max_concurrency'] = max_concurrency
+            executor, _executor = _executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        _semaphores.clear()
+
+    return dict(_config)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_config['max_concurrency'], thread_name_prefix='relic-engine')
+
+        return _executor
+
+
+def _freeze(value) -> Hashable:
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
+def _request_key(func: Callable, args: tuple, kwargs: dict) -> Optional[Hashable]:
+    """Key identifying a call on the active index, or None when an argument cannot be compared."""
+    snapshot = index._snapshot
+    try:
+        key = (func, _freeze(args), _freeze(kwargs), snapshot.version if snapshot is not None else None)
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
+async def _offload(func: Callable, args: tuple, kwargs: dict):
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_config['max_concurrency'])
+
+    async with semaphore:
+        return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking ``relic_engine`` call off the event loop and return its result.
+
+    A call identical to one still running (same function, equal arguments, same index version) waits
+    for that one instead of starting another. Cancelling one waiter does not cancel the shared call.
+    """
+    return await _call(func, args, kwargs)
+
+
+async def _call(func: Callable, args: tuple, kwargs: dict, dedupe: bool = True):
+    key = _request_key(func, args, kwargs) if dedupe else None
+    if key is None:
+        return await _offload(func, args, kwargs)
+
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.setdefault(loop, {})
+    task = inflight.get(key)
+    if task is None:
+        task = inflight[key] = loop.create_task(_offload(func, args, kwargs))
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+
+    return await asyncio.shield(task)
+
+
+def _wrap(func: Callable, dedupe: bool = True) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await _call(func, args, kwargs, dedupe)
+
+    wrapper.__doc__ = f"Async ``{func.__name__}``, run off the event loop; see ``relic_engine.{func.__name__}``."
+    return wrapper
+
+
+async def load_index(source=None):
+    """Async ``load_index``: fetching, decoding and building the snapshot all happen off the event loop."""
+    return await _offload(relic_engine.load_index, (source,), {})
+
+
+async def refresh_index(force: bool = True) -> bool:
+    """Async ``refresh_index``: the download and the new snapshot's derived structures are built off the loop."""
+    return await run(relic_engine.refresh_index, force=force)
+
+
+async def get_snapshot() -> index.IndexSnapshot:
+    """Return the active snapshot, loading it off the event loop on first use."""
+    snapshot = index._snapshot
+    if snapshot is not None:
+        return snapshot
+
+    return await run(relic_engine.get_snapshot)
+
+
+get_average_return = _wrap(relic_engine.get_average_return)
+get_average_returns = _wrap(relic_engine.get_average_returns)
+get_plat_per_ducat = _wrap(relic_engine.get_plat_per_ducat)
+get_scenario_returns = _wrap(relic_engine.get_scenario_returns)
+get_historical_returns = _wrap(relic_engine.get_historical_returns)
+get_ranking = _wrap(relic_engine.get_ranking)
+get_top_relics = _wrap(relic_engine.get_top_relics)
+get_squad_returns = _wrap(relic_engine.get_squad_returns)
+get_mixed_squad_returns = _wrap(relic_engine.get_mixed_squad_returns)
+get_squad_return = _wrap(relic_engine.get_squad_return)
+simulate_returns = _wrap(relic_engine.simulate_returns)
+get_part_sources = _wrap(relic_engine.get_part_sources)
+get_best_source = _wrap(relic_engine.get_best_source)
+get_farming_plan = _wrap(relic_engine.get_farming_plan)
+# Arguments may be whole indexes, too big to compare on every call.
+diff_indexes = _wrap(relic_engine.diff_indexes, dedupe=False)
+build_json_files = _wrap(relic_engine.build_json_files)
+write_json_files = _wrap(relic_engine.write_json_files)
@@ -0,0 +1,405 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .history import DayLike, get_basis_prices, get_history
+from .index import IndexSnapshot, get_snapshot, register_derived
+
+REFINEMENTS = ('Intact', 'Exceptional', 'Flawless', 'Radiant')
+STYLES = ('solo', '1b1', '2b2', '3b3', '4b4', '8b8')
+
+# How a drop is valued: by its platinum price, its ducat value, or platinum plus ducats at an exchange rate.
+# The squad takes the drop that is best under the same valuation.
+VALUATIONS = ('platinum', 'ducats', 'blend')
+
+# Squad members whose drops compete for the reward, and rewards counted per run, for each style.
+# These mirror average_dict in get_average_return.
+STYLE_MEMBERS = np.array([1, 1, 2, 3, 4, 8])
+STYLE_MULTIPLIERS = np.array([1, 4, 2, 4 / 3, 1, 1])
+
+# Largest relative difference from get_average_return before its rounding to 3 decimals. Rounding the
+# two can still differ by 0.001 when a value sits exactly on a rounding boundary.
+TOLERANCE = 1e-9
+
+
+class BatchArrays:
+    """
+    Every relic's drops packed into dense arrays.
+
+    A part that drops at two rarities occupies two slots. Padding slots have part id -1 and no chance.
+
+    Attributes:
+        relics (List[str]): Relic names, in index order.
+        relic_ids (Dict[str, int]): Row of each relic.
+        parts (List[str]): Every part dropped by any relic.
+        part_ids (Dict[str, int]): Column of each part in a price vector.
+        slot_parts (np.ndarray): Part id per relic slot, shape (relics, slots).
+        chances (np.ndarray): Drop chance per relic, refinement and slot, shape (relics, 4, slots).
+        prices (np.ndarray): Index price per part.
+        ducats (np.ndarray): Ducat value per part.
+    """
+
+    def __init__(self, snapshot: IndexSnapshot):
+        model = snapshot.model
+        self.relics = model.relics
+        self.relic_ids = model.relic_ids
+        self.parts = model.parts
+        self.part_ids = model.part_ids
+
+        slots = [model.slots(record) for record in model.records()]
+        width = max((len(relic_slots) for relic_slots in slots), default=0)
+        self.slot_parts = np.full((len(self.relics), width), -1, dtype=np.intp)
+        slot_chances = np.zeros((len(self.relics), width, len(REFINEMENTS)))
+        for row, relic_slots in enumerate(slots):
+            if relic_slots:
+                self.slot_parts[row, :len(relic_slots)], slot_chances[row, :len(relic_slots)] = zip(*relic_slots)
+
+        # Padding slots keep chance 0, so they never drop.
+        self.chances = np.ascontiguousarray(np.moveaxis(slot_chances, 2, 1))
+
+        self.prices = self.price_vector(snapshot.price_dict)
+        self.ducats = self.price_vector(snapshot.ducat_dict)
+
+    def price_vector(self, prices: Dict[str, float], fallback: Optional[np.ndarray] = None) -> np.ndarray:
+        """Build a price per part from a dict, taking missing parts from ``fallback`` (or 0)."""
+        vector = np.zeros(len(self.parts)) if fallback is None else fallback.astype(float)
+        for part, price in prices.items():
+            part_id = self.part_ids.get(part)
+            if part_id is not None:
+                vector[part_id] = price
+
+        return vector
+
+    def part_values(self, prices: Dict[str, float] = None, valuation: str = 'platinum',
+                    exchange_rate: float = None) -> np.ndarray:
+        """
+        Build the value per part under a valuation.
+
+        Args:
+            prices (Dict[str, float], optional): Prices overriding the index prices.
+            valuation (str): One of ``VALUATIONS``.
+            exchange_rate (float, optional): Platinum per ducat; required by the ``'blend'`` valuation.
+
+        Raises:
+            ValueError: If the valuation is unknown, or ``'blend'`` has no exchange rate.
+        """
+        if valuation == 'ducats':
+            return self.ducats
+
+        platinum = self.prices if prices is None else self.price_vector(prices, self.prices)
+        if valuation == 'platinum':
+            return platinum
+        if valuation == 'blend':
+            if exchange_rate is None:
+                raise ValueError("The 'blend' valuation needs an exchange_rate (platinum per ducat)")
+            return platinum + self.ducats * exchange_rate
+
+        raise ValueError(f"Unknown valuation {valuation!r}, expected one of {VALUATIONS}")
+
+    def slot_values(self, part_values: np.ndarray) -> np.ndarray:
+        """Spread per-part values (with any leading batch axes) over relic slots; padding is worth 0."""
+        padded = np.concatenate([part_values, np.zeros(part_values.shape[:-1] + (1,))], axis=-1)
+        return padded[..., self.slot_parts]
+
+
+@register_derived('batch')
+def _build_batch_arrays(snapshot: IndexSnapshot) -> BatchArrays:
+    return BatchArrays(snapshot)
+
+
+def get_batch_arrays(snapshot: IndexSnapshot = None) -> BatchArrays:
+    """Return the packed drop arrays of a snapshot, the active one by default."""
+    return (snapshot or get_snapshot()).derived('batch')
+
+
+def _powers(base: np.ndarray, exponents) -> Dict[int, np.ndarray]:
+    """Integer powers of ``base`` built by repeated multiplication, which is much cheaper than ``**``."""
+    powers = {1: base}
+    for exponent in sorted(set(int(e) for e in exponents)):
+        if exponent in powers:
+            continue
+        if exponent % 2 == 0 and exponent // 2 in powers:
+            powers[exponent] = powers[exponent // 2] * powers[exponent // 2]
+        elif exponent - 1 in powers:
+            powers[exponent] = powers[exponent - 1] * base
+        else:
+            powers[exponent] = base ** exponent
+
+    return powers
+
+
+def _expected_returns(chances: np.ndarray, values: np.ndarray, ranks: np.ndarray = None) -> np.ndarray:
+    """
+    Vectorised ``calculate_average`` for every style at once.
+
+    Slots are walked in descending value order. The chance that slot k is the best drop among
+    ``m`` squad members is ``left**m - (left - p)**m``, where ``left`` is the chance mass not yet
+    walked. This is the same closed form ``calculate_average`` builds up one drop at a time.
+
+    Args:
+        chances: Drop chances, shape (relics, refinements, slots).
+        values: Slot values with optional leading batch axes, shape (..., relics, slots).
+        ranks: Slot values the squad picks the best drop by, shaped like ``values``. Defaults to
+            ``values``; pass another valuation to get the expected ``values`` of the drops it picks.
+
+    Returns:
+        np.ndarray: Expected returns, shape (..., relics, refinements, styles).
+    """
+    order = np.argsort(-(values if ranks is None else ranks), axis=-1, kind='stable')
+    values = np.take_along_axis(values, order, axis=-1)[..., None, :]
+    chances = np.take_along_axis(np.broadcast_to(chances, values.shape[:-2] + chances.shape[-2:]),
+                                 order[..., None, :], axis=-1)
+
+    rest = 1 - np.cumsum(chances, axis=-1)
+    left_powers = _powers(rest + chances, STYLE_MEMBERS)
+    rest_powers = _powers(rest, STYLE_MEMBERS)
+
+    returns = np.empty(chances.shape[:-1] + (len(STYLES),))
+    values = np.swapaxes(values, -1, -2)
+    for members in left_powers:
+        styles = STYLE_MEMBERS == members
+        expected = np.matmul(left_powers[members] - rest_powers[members], values)
+        returns[..., styles] = expected * STYLE_MULTIPLIERS[styles]
+
+    return returns
+
+
+def _selection_chances(chances: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Chance that each slot is the squad's reward, the per-slot terms ``_expected_returns`` sums up.
+
+    Args:
+        chances: Drop chances, shape (relics, refinements, slots).
+        values: Slot values, shape (relics, slots).
+
+    Returns:
+        np.ndarray: Chances, shape (relics, refinements, slots, styles), in slot order.
+    """
+    order = np.argsort(-values, axis=-1, kind='stable')[:, None, :]
+    ordered = np.take_along_axis(chances, order, axis=-1)
+
+    rest = 1 - np.cumsum(ordered, axis=-1)
+    left_powers = _powers(rest + ordered, STYLE_MEMBERS)
+    rest_powers = _powers(rest, STYLE_MEMBERS)
+
+    selected = np.empty(chances.shape + (len(STYLES),))
+    for members in left_powers:
+        styles = np.flatnonzero(STYLE_MEMBERS == members)
+        # A lone member's reward is their own drop, so its chance is exactly the drop chance.
+        chosen = chances if members == 1 else np.empty_like(ordered)
+        if members != 1:
+            np.put_along_axis(chosen, order, left_powers[members] - rest_powers[members], axis=-1)
+        selected[..., styles] = chosen[..., None]
+
+    return selected
+
+
+def _refinement_index(refinement: str) -> int:
+    return 'iefr'.index(refinement.lower()[0])
+
+
+def _style_index(style: str) -> int:
+    return 's12348'.index(style.lower()[0])
+
+
+class ReturnTable:
+    """
+    Average returns of every relic for every refinement and style.
+
+    ``values[relic, refinement, style]`` follows the order of ``relics``, ``REFINEMENTS`` and ``STYLES``.
+    Values are not rounded; ``round(value, 3)`` gives what ``get_average_return`` returns.
+    """
+
+    def __init__(self, relics: List[str], values: np.ndarray):
+        self.relics = relics
+        self.values = values
+        self._relic_ids = {relic: i for i, relic in enumerate(relics)}
+
+    def get(self, relic: str, refinement: str = 'Radiant', style: str = '4b4') -> float:
+        """Average return of one relic; refinement and style accept the same shorthands as ``get_average_return``."""
+        return float(self.values[self._relic_ids[relic], _refinement_index(refinement), _style_index(style)])
+
+    def to_dict(self, digits: int = 3) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Return nested ``{relic: {refinement: {style: value}}}`` dicts rounded like ``get_average_return``."""
+        rounded = np.round(self.values, digits).tolist()
+        return {relic: {refinement: dict(zip(STYLES, rounded[i][j])) for j, refinement in enumerate(REFINEMENTS)}
+                for i, relic in enumerate(self.relics)}
+
+
+def get_average_returns(prices: Dict[str, float] = None, snapshot: IndexSnapshot = None,
+                        valuation: str = 'platinum', exchange_rate: float = None, basis: str = None,
+                        day: DayLike = None) -> ReturnTable:
+    """
+    Compute the average return of every relic for every refinement and style in one pass.
+
+    Args:
+        prices (Dict[str, float], optional): Prices overriding the index prices. Parts not listed keep
+            their index price.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+        valuation (str): What a drop is worth, one of ``VALUATIONS``: platinum (as ``get_average_return``),
+            ducats, or a blend of platinum plus ducats times ``exchange_rate``. The squad's best drop is
+            chosen by the same valuation.
+        exchange_rate (float, optional): Platinum per ducat, for the ``'blend'`` valuation.
+        basis (str, optional): Pricing basis from the loaded price history, one of ``history.BASES``, e.g.
+            ``'mean_7'``. Parts the history has no price for keep their index price; ``prices`` still
+            override both.
+        day (optional): Day of the history to price, the last one by default.
+
+    Returns:
+        ReturnTable: A relics x refinements x styles table.
+    """
+    if basis is not None:
+        prices = {**get_basis_prices(basis, day), **(prices or {})}
+
+    arrays = get_batch_arrays(snapshot)
+    part_values = arrays.part_values(prices, valuation, exchange_rate)
+
+    return ReturnTable(arrays.relics, _expected_returns(arrays.chances, arrays.slot_values(part_values)))
+
+
+def get_plat_per_ducat(prices: Dict[str, float] = None, snapshot: IndexSnapshot = None) -> ReturnTable:
+    """
+    Compute the platinum given up per ducat earned when farming ducats, for every relic, refinement and style.
+
+    The squad takes the drop with the most ducats; the table holds the expected platinum price of that
+    drop divided by its expected ducats. Relics without ducat drops give NaN.
+
+    Args:
+        prices (Dict[str, float], optional): Prices overriding the index prices.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+
+    Returns:
+        ReturnTable: A relics x refinements x styles table.
+    """
+    arrays = get_batch_arrays(snapshot)
+    ducats = arrays.slot_values(arrays.ducats)
+    platinum = arrays.slot_values(arrays.part_values(prices))
+
+    expected_ducats = _expected_returns(arrays.chances, ducats)
+    expected_platinum = _expected_returns(arrays.chances, platinum, ranks=ducats)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(expected_ducats > 0, expected_platinum / expected_ducats, np.nan)
+
+    return ReturnTable(arrays.relics, ratio)
+
+
+def get_drop_selection(prices: Dict[str, float] = None,
+                       snapshot: IndexSnapshot = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute, for every drop of every relic, the chance it is the squad's reward and its share of the average return.
+
+    Both arrays are shaped (relics, slots, refinements, styles) and follow ``get_batch_arrays().slot_parts``.
+    A part dropping at several rarities has its chances summed into its first slot, the others hold 0. The
+    shares of a relic add up to its average return for the refinement and style.
+
+    Args:
+        prices (Dict[str, float], optional): Prices overriding the index prices.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Reward chance and average return share of each drop, unrounded.
+    """
+    arrays = get_batch_arrays(snapshot)
+    values = arrays.slot_values(arrays.part_values(prices))
+    selected = _selection_chances(arrays.chances, values).transpose(0, 2, 1, 3)
+    shares = selected * values[..., None, None] * STYLE_MULTIPLIERS
+
+    # First slot of each slot's part, so packed parts collapse onto one slot.
+    slot_parts = arrays.slot_parts
+    first = np.argmax(slot_parts[:, :, None] == slot_parts[:, None, :], axis=-1)
+    rows = np.arange(len(slot_parts))[:, None]
+    chances = np.zeros_like(selected)
+    np.add.at(chances, (rows, first), selected)
+    returns = np.zeros_like(shares)
+    np.add.at(returns, (rows, first), shares)
+
+    return chances, returns
+
+
+def get_scenario_matrix(price_maps: List[Dict[str, float]], fallback: bool = True,
+                        snapshot: IndexSnapshot = None) -> np.ndarray:
+    """
+    Stack price dicts into a scenarios x parts matrix for ``get_scenario_returns``.
+
+    Columns follow ``get_batch_arrays().parts``.
+
+    Args:
+        price_maps (List[Dict[str, float]]): One price dict per scenario.
+        fallback (bool): Fill parts a scenario does not list with the index price instead of 0.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+    """
+    arrays = get_batch_arrays(snapshot)
+    base = arrays.prices if fallback else None
+
+    return np.array([arrays.price_vector(price_map, base) for price_map in price_maps]).reshape(-1, len(arrays.parts))
+
+
+def get_scenario_returns(scenarios: np.ndarray, parts: List[str] = None, snapshot: IndexSnapshot = None,
+                         chunk_size: int = 32) -> np.ndarray:
+    """
+    Compute average returns of every relic under many price scenarios at once.
+
+    Each scenario gets its own drop ordering; all orderings are sorted in bulk.
+
+    Args:
+        scenarios (np.ndarray): Prices, shape (scenarios, parts). NaN entries take the index price.
+        parts (List[str], optional): Part name of each column. Defaults to ``get_batch_arrays().parts``;
+            parts not listed take the index price and unknown parts are ignored.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+        chunk_size (int): Scenarios evaluated per vectorised step, bounding peak memory.
+
+    Returns:
+        np.ndarray: Average returns, shape (scenarios, relics, refinements, styles), unrounded.
+    """
+    arrays = get_batch_arrays(snapshot)
+    scenarios = np.asarray(scenarios, dtype=float)
+    if scenarios.ndim != 2:
+        raise ValueError(f"scenarios must be a 2-D scenarios x parts matrix, got shape {scenarios.shape}")
+
+    if parts is not None:
+        if len(parts) != scenarios.shape[1]:
+            raise ValueError(f"Got {len(parts)} part names for {scenarios.shape[1]} scenario columns")
+
+        columns = [(i, arrays.part_ids[part]) for i, part in enumerate(parts) if part in arrays.part_ids]
+        prices = np.full((len(scenarios), len(arrays.parts)), np.nan)
+        if columns:
+            source, target = map(list, zip(*columns))
+            prices[:, target] = scenarios[:, source]
+    elif scenarios.shape[1] != len(arrays.parts):
+        raise ValueError(f"Expected {len(arrays.parts)} part columns, got {scenarios.shape[1]}")
+    else:
+        prices = scenarios
+
+    prices = np.where(np.isnan(prices), arrays.prices, prices)
+
+    returns = np.empty((len(prices), len(arrays.relics), len(REFINEMENTS), len(STYLES)))
+    for start in range(0, len(prices), chunk_size):
+        chunk = prices[start:start + chunk_size]
+        returns[start:start + chunk_size] = _expected_returns(arrays.chances, arrays.slot_values(chunk))
+
+    return returns
+
+
+def get_historical_returns(start: DayLike = None, end: DayLike = None, basis: str = 'average',
+                           snapshot: IndexSnapshot = None, chunk_size: int = 32) -> Tuple[List[str], np.ndarray]:
+    """
+    Compute the average returns of every relic on every day of the loaded price history in a range.
+
+    Each day is one price scenario of ``get_scenario_returns``, so the whole range is evaluated in one
+    vectorised pass. Parts without a price on a day take their index price.
+
+    Args:
+        start (optional): First day, inclusive. Defaults to the first stored day.
+        end (optional): Last day, inclusive. Defaults to the last stored day.
+        basis (str): Pricing basis, one of ``history.BASES``.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+        chunk_size (int): Days evaluated per vectorised step, bounding peak memory.
+
+    Returns:
+        Tuple[List[str], np.ndarray]: The ISO dates and the average returns, shape (days, relics,
+        refinements, styles), unrounded.
+    """
+    history = get_history()
+    dates, matrix = history.matrix(basis, start, end)
+
+    return dates, get_scenario_returns(matrix, history.parts, snapshot, chunk_size)
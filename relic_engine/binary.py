@@ -0,0 +1,356 @@
+import hashlib
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional, Tuple
+
+MAGIC = b'RELICBIN'
+FORMAT_VERSION = 2
+
+INDEX_SECTIONS = ('relics', 'non_vaulted', 'prices', 'ducats', 'required_count', 'types')
+
+# Sections that older indexes do not have; listed only when the file holds some data for them.
+OPTIONAL_SECTIONS = ('chances',)
+
+# Refinement tables of the chances section, in file order.
+_REFINEMENTS = ('Intact', 'Exceptional', 'Flawless', 'Radiant')
+
+# Sections mapping a name to one integer (or, for types, to a string id), in file order.
+_VALUE_SECTIONS = ('prices', 'ducats', 'required_count', 'types')
+
+# magic, format version, index version (sha1), then the counts of every variable-length array:
+# strings, string blob bytes, relics, drops, non-vaulted relics, one key count per value section and the
+# number of drop chance slots.
+_HEADER = struct.Struct('<8sI20s10I')
+
+_ITEM_SIZES = {'I': 4, 'i': 4, 'd': 8}
+_NATIVE = sys.byteorder == 'little' and all(array(code).itemsize == size for code, size in _ITEM_SIZES.items())
+
+
+def _padded(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def is_binary_index(data) -> bool:
+    """Return True if ``data`` starts with the binary index magic."""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def encode_binary_index(index: Dict, version: str = None) -> bytes:
+    """
+    Encode an index dict in the binary format read by ``BinaryIndex``.
+
+    Every string is stored once in a sorted table and referenced by id. Drops are flat part id and
+    rarity arrays with a start offset per relic; prices, ducats, required counts and types are parallel
+    key and value arrays plus a string id to row lookup. Drop table percentages, where the index has
+    them, are one 8-byte float table per refinement with a start offset per drop. Every array is
+    little-endian.
+
+    Args:
+        index (Dict): A decoded index, as built by ``build_index.py``.
+        version (str, optional): Hex sha1 recorded as the index version, normally the sha1 of the
+            ``index.json.gz`` written alongside. Defaults to the sha1 of the encoded sections.
+
+    Raises:
+        ValueError: If a price, ducat value, required count or rarity is not an integer, or a relic's
+            chances do not cover each of its drops at every refinement.
+    """
+    strings = set(index['relics']) | set(index['non_vaulted'])
+    for drops in index['relics'].values():
+        strings.update(drops)
+    for section in _VALUE_SECTIONS:
+        strings.update(index[section])
+    strings.update(index['types'].values())
+
+    encoded = sorted(string.encode('utf-8') for string in strings)
+    string_ids = {string.decode('utf-8'): i for i, string in enumerate(encoded)}
+
+    string_offsets = array('I', [0])
+    for string in encoded:
+        string_offsets.append(string_offsets[-1] + len(string))
+    blob = b''.join(encoded)
+
+    relic_names = array('I')
+    relic_offsets = array('I', [0])
+    drop_parts = array('I')
+    drop_rarities = array('I')
+    relic_rows = array('i', [-1]) * len(encoded)
+    chance_starts = array('I', [0])
+    chance_values = [array('d') for _ in _REFINEMENTS]
+    chance_table = index.get('chances', {})
+    for relic, drops in index['relics'].items():
+        relic_rows[string_ids[relic]] = len(relic_names)
+        relic_names.append(string_ids[relic])
+        table = chance_table.get(relic)
+        for part, rarity in drops.items():
+            drop_parts.append(string_ids[part])
+            drop_rarities.append(_integer(rarity, 'relics', part))
+            if table is not None:
+                for values, refinement in zip(chance_values, _REFINEMENTS):
+                    values.extend(_percentages(table, refinement, part, relic))
+                if len(set(map(len, chance_values))) != 1:
+                    raise ValueError(f"The chances of {relic!r} differ in length between refinements")
+            chance_starts.append(len(chance_values[0]))
+        relic_offsets.append(len(drop_parts))
+
+    sections = [string_offsets, blob + b'\0' * (_padded(len(blob)) - len(blob)),
+                relic_names, relic_offsets, drop_parts, drop_rarities, relic_rows,
+                array('I', [string_ids[relic] for relic in index['non_vaulted']]), chance_starts]
+
+    for section in _VALUE_SECTIONS:
+        keys = array('I')
+        values = array('i')
+        rows = array('i', [-1]) * len(encoded)
+        for key, value in index[section].items():
+            rows[string_ids[key]] = len(keys)
+            keys.append(string_ids[key])
+            values.append(string_ids[value] if section == 'types' else _integer(value, section, key))
+        sections += [keys, values, rows]
+    sections += chance_values
+
+    body = b''.join(_little_endian(section) for section in sections)
+    if version is None:
+        version = hashlib.sha1(body).hexdigest()
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, bytes.fromhex(version), len(encoded), len(blob),
+                          len(relic_names), len(drop_parts), len(index['non_vaulted']),
+                          *(len(index[section]) for section in _VALUE_SECTIONS), len(chance_values[0]))
+
+    return header + body
+
+
+def _integer(value, section: str, key: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"The binary index stores integers only; {section}[{key!r}] is {value!r}")
+
+    return value
+
+
+def _percentages(table: Dict, refinement: str, part: str, relic: str) -> list:
+    try:
+        value = table[refinement][part]
+    except KeyError:
+        raise ValueError(f"chances[{relic!r}] has no {refinement} chance for {part!r}") from None
+
+    return value if isinstance(value, list) else [value]
+
+
+def _little_endian(section) -> bytes:
+    if isinstance(section, bytes) or sys.byteorder == 'little':
+        return bytes(section)
+
+    swapped = array(section.typecode, section)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def write_binary_index(index: Dict, path: str, version: str = None):
+    """Encode ``index`` with ``encode_binary_index`` and write it to ``path``."""
+    with open(path, 'wb') as fp:
+        fp.write(encode_binary_index(index, version))
+
+
+class BinaryIndex(Mapping):
+    """
+    Read-only view of a binary index, usually memory-mapped.
+
+    Single lookups (``relic_drops``, ``price``, ``ducats``...) read straight from the buffer: names are
+    found by binary search over the sorted string table and nothing else is decoded. As a mapping it
+    behaves like the decoded index dict; each section is materialised on first access and kept.
+
+    Memory-mapped files are shared between processes by the page cache.
+    """
+
+    def __init__(self, buffer, source: str = None):
+        self._buffer = buffer
+        self.source = source
+
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Truncated binary index")
+        (magic, format_version, version, n_strings, blob_length, n_relics, n_drops, n_nv,
+         *value_counts, n_chances) = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a binary relic index")
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary index format {format_version}, expected {FORMAT_VERSION}")
+
+        self.version = version.hex()
+        self._offset = _HEADER.size
+
+        self._string_offsets = self._array('I', n_strings + 1)
+        self._blob_start = self._offset
+        self._offset += _padded(blob_length)
+        if self._offset > len(buffer):
+            raise ValueError("Truncated binary index")
+
+        self._relic_names = self._array('I', n_relics)
+        self._relic_offsets = self._array('I', n_relics + 1)
+        self._drop_parts = self._array('I', n_drops)
+        self._drop_rarities = self._array('I', n_drops)
+        self._relic_rows = self._array('i', n_strings)
+        self._non_vaulted = self._array('I', n_nv)
+        self._chance_starts = self._array('I', n_drops + 1)
+
+        self._values = {}
+        for section, count in zip(_VALUE_SECTIONS, value_counts):
+            self._values[section] = (self._array('I', count), self._array('i', count), self._array('i', n_strings))
+
+        self._chances = [self._array('d', n_chances) for _ in _REFINEMENTS]
+        self.sections = INDEX_SECTIONS + (OPTIONAL_SECTIONS if n_chances else ())
+
+        self._sections = {}
+
+    @classmethod
+    def open(cls, path: str) -> 'BinaryIndex':
+        """Memory-map a binary index file read-only."""
+        with open(path, 'rb') as fp:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return cls(buffer, source=path)
+
+    def _array(self, typecode: str, count: int):
+        start = self._offset
+        self._offset += _ITEM_SIZES[typecode] * count
+        if self._offset > len(self._buffer):
+            raise ValueError("Truncated binary index")
+        if _NATIVE:
+            return memoryview(self._buffer)[start:self._offset].cast(typecode)
+
+        values = array(typecode, bytes(self._buffer[start:self._offset]))
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values
+
+    def _string(self, string_id: int) -> str:
+        start = self._blob_start + self._string_offsets[string_id]
+        end = self._blob_start + self._string_offsets[string_id + 1]
+        return bytes(self._buffer[start:end]).decode('utf-8')
+
+    def _string_id(self, string: str) -> int:
+        """Binary search the sorted string table; returns -1 for unknown strings."""
+        target = string.encode('utf-8')
+        offsets = self._string_offsets
+        blob = self._blob_start
+        low, high = 0, len(offsets) - 1
+        while low < high:
+            mid = (low + high) // 2
+            candidate = bytes(self._buffer[blob + offsets[mid]:blob + offsets[mid + 1]])
+            if candidate < target:
+                low = mid + 1
+            elif candidate > target:
+                high = mid
+            else:
+                return mid
+
+        return -1
+
+    def _value(self, section: str, item: str) -> Optional[int]:
+        string_id = self._string_id(item)
+        if string_id < 0:
+            return None
+
+        _, values, rows = self._values[section]
+        row = rows[string_id]
+        return values[row] if row >= 0 else None
+
+    def relic_drops(self, relic: str) -> Dict[str, int]:
+        """
+        Return ``{part: rarity}`` for one relic.
+
+        Raises:
+            KeyError: If the relic is not in the index.
+        """
+        string_id = self._string_id(relic)
+        row = self._relic_rows[string_id] if string_id >= 0 else -1
+        if row < 0:
+            raise KeyError(relic)
+
+        return self._drops(row)
+
+    def relic_chances(self, relic: str) -> Optional[Dict[str, Dict]]:
+        """
+        Return the relic's entry of the ``chances`` section, ``{refinement: {part: percent}}``, or None if
+        it has none.
+        """
+        string_id = self._string_id(relic)
+        row = self._relic_rows[string_id] if string_id >= 0 else -1
+        if row < 0:
+            return None
+
+        return self._relic_chances(row)
+
+    def _relic_chances(self, row: int) -> Optional[Dict[str, Dict]]:
+        start, end = self._relic_offsets[row], self._relic_offsets[row + 1]
+        if self._chance_starts[start] == self._chance_starts[end]:
+            return None
+
+        table = {}
+        for refinement, values in zip(_REFINEMENTS, self._chances):
+            chances = table[refinement] = {}
+            for i in range(start, end):
+                first, last = self._chance_starts[i], self._chance_starts[i + 1]
+                part = self._string(self._drop_parts[i])
+                chances[part] = values[first] if last - first == 1 else list(values[first:last])
+
+        return table
+
+    def iter_relics(self) -> Iterator[Tuple[str, Dict[str, int]]]:
+        """Yield ``(relic, {part: rarity})`` in index order without keeping the decoded section."""
+        for row in range(len(self._relic_names)):
+            yield self._string(self._relic_names[row]), self._drops(row)
+
+    def _drops(self, row: int) -> Dict[str, int]:
+        start, end = self._relic_offsets[row], self._relic_offsets[row + 1]
+        return {self._string(self._drop_parts[i]): self._drop_rarities[i] for i in range(start, end)}
+
+    def price(self, item: str, default: int = 0) -> int:
+        value = self._value('prices', item)
+        return default if value is None else value
+
+    def ducats(self, item: str, default: int = 0) -> int:
+        value = self._value('ducats', item)
+        return default if value is None else value
+
+    def required_count(self, item: str, default: int = 1) -> int:
+        value = self._value('required_count', item)
+        return default if value is None else value
+
+    def item_type(self, item: str, default: str = None) -> Optional[str]:
+        value = self._value('types', item)
+        return default if value is None else self._string(value)
+
+    def _materialise(self, section: str):
+        if section == 'relics':
+            return {self._string(self._relic_names[row]): self._drops(row) for row in range(len(self._relic_names))}
+        if section == 'non_vaulted':
+            return [self._string(string_id) for string_id in self._non_vaulted]
+        if section == 'chances':
+            tables = ((self._string(self._relic_names[row]), self._relic_chances(row))
+                      for row in range(len(self._relic_names)))
+            return {relic: table for relic, table in tables if table is not None}
+
+        keys, values, _ = self._values[section]
+        if section == 'types':
+            return {self._string(key): self._string(value) for key, value in zip(keys, values)}
+        return {self._string(key): value for key, value in zip(keys, values)}
+
+    def __getitem__(self, section: str):
+        if section not in self.sections:
+            raise KeyError(section)
+
+        try:
+            return self._sections[section]
+        except KeyError:
+            return self._sections.setdefault(section, self._materialise(section))
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def __len__(self):
+        return len(self.sections)
+
+    def to_dict(self) -> Dict:
+        """Materialise every section into a plain index dict."""
+        return {section: self[section] for section in self.sections}
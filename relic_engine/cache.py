@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'invalidations', 'maxsize', 'currsize'])
+
+_MISSING = object()
+
+
+class ResultCache:
+    """
+    Bounded, thread-safe LRU cache whose entries all belong to one index version.
+
+    Looking up or storing a value under a newer version than the cached entries drops every entry at
+    once, so results computed from old prices are never served after a reload. With ``published``, a
+    callable returning the version of the active index, only that version counts as newer: calls still
+    running on an older snapshot after a swap miss and store nothing instead of wiping the cache.
+    Without it, any other version counts as newer. After ``carry_over`` the version carried over from
+    counts as older either way, so calls still running on it cannot undo the carry-over.
+    """
+
+    def __init__(self, maxsize: int = 8192, published: Optional[Callable[[], Hashable]] = None):
+        self.maxsize = maxsize
+        self._published = published
+        self._entries = OrderedDict()
+        self._version = None
+        self._retired = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _reset(self, version: Hashable):
+        if version != self._version:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def _check_version(self, version: Hashable) -> bool:
+        """Move to ``version`` if it is newer than the cached one; False for a call on an older version."""
+        if version == self._version:
+            return True
+        if version == self._retired and version is not None:
+            return False
+        if self._published is not None and version != self._published():
+            return False
+
+        self._reset(version)
+        return True
+
+    def get(self, key: Hashable, version: Hashable) -> Tuple[bool, Any]:
+        """Return ``(True, value)`` on a hit and ``(False, None)`` on a miss."""
+        with self._lock:
+            value = self._entries.get(key, _MISSING) if self._check_version(version) else _MISSING
+            if value is _MISSING:
+                self._misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return True, value
+
+    def put(self, key: Hashable, version: Hashable, value: Any):
+        with self._lock:
+            if not self._check_version(version) or self.maxsize <= 0:
+                return
+
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def resize(self, maxsize: int):
+        """Change the size cap, evicting the least recently used entries if needed."""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def carry_over(self, old_version: Hashable, new_version: Hashable, keep: Callable[[Hashable], bool]) -> int:
+        """
+        Move the entries still valid under a new index version to it instead of dropping them all.
+
+        Only entries cached for ``old_version`` are carried over, and only those whose key ``keep``
+        accepts; everything else is dropped as a version change would. From then on calls on
+        ``old_version`` miss and store nothing, so carry over before publishing ``new_version``.
+
+        Returns:
+            int: The number of entries kept.
+        """
+        with self._lock:
+            if self._version != old_version:
+                self._reset(new_version)
+                return 0
+
+            stale = [key for key in self._entries if not keep(key)]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._invalidations += 1
+            self._retired, self._version = old_version, new_version
+
+            return len(self._entries)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self._invalidations,
+                             self.maxsize, len(self._entries))
@@ -0,0 +1,207 @@
+import hashlib
+import json
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from .batch import REFINEMENTS, STYLES, ReturnTable, _expected_returns, get_batch_arrays
+from .index import IndexSnapshot, _read_source, get_snapshot, register_derived
+
+
+def _section_hash(section) -> str:
+    # Relic and chance sections are read-only mappings over the model; serialise them as the dicts they mirror.
+    return hashlib.sha1(json.dumps(section, sort_keys=True, default=dict).encode('utf-8')).hexdigest()
+
+
+@register_derived('section_hashes')
+def _build_section_hashes(snapshot: IndexSnapshot) -> Dict[str, str]:
+    return {section: _section_hash(snapshot.index[section]) for section in snapshot.index}
+
+
+def get_section_hashes(snapshot: IndexSnapshot = None) -> Dict[str, str]:
+    """Return the sha1 of every index section of a snapshot, the active one by default."""
+    return (snapshot or get_snapshot()).derived('section_hashes')
+
+
+def _merge(old: Iterable, new: Iterable) -> Iterator[Tuple[object, bool, bool]]:
+    """Walk two key sets in sorted order, yielding ``(key, in old, in new)``."""
+    old, new = sorted(old), sorted(new)
+    i = j = 0
+    while i < len(old) or j < len(new):
+        if j == len(new) or (i < len(old) and old[i] < new[j]):
+            yield old[i], True, False
+            i += 1
+        elif i == len(old) or new[j] < old[i]:
+            yield new[j], False, True
+            j += 1
+        else:
+            yield old[i], True, True
+            i += 1
+            j += 1
+
+
+def _drop_profiles(snapshot: IndexSnapshot) -> Dict[str, Tuple]:
+    """Per relic, its drops with their chances at every refinement, for comparing effective odds."""
+    model = snapshot.model
+    return {record.name: (tuple(model.parts[part_id] for part_id in record.part_ids), record.chances)
+            for record in model.records()}
+
+
+def _as_source(source) -> IndexSnapshot:
+    return source if isinstance(source, IndexSnapshot) else _read_source(source)
+
+
+class ChangeSet:
+    """
+    What changed between two index versions.
+
+    Lists are sorted by name. Price and rarity changes are ``(old, new)`` pairs, with None on the side
+    where the item or drop does not exist.
+
+    Attributes:
+        old_version (str): Version of the old index.
+        new_version (str): Version of the new index.
+        sections (List[str]): Sections whose content changed.
+        added_relics (List[str]): Relics only in the new index.
+        removed_relics (List[str]): Relics only in the old index.
+        vaulted (List[str]): Relics of both indexes that left ``non_vaulted``.
+        unvaulted (List[str]): Relics of both indexes that joined ``non_vaulted``.
+        rarities (Dict[str, Dict[str, Tuple]]): Per relic, the drops whose rarity changed, appeared or vanished.
+        chances (List[str]): Relics in both indexes whose drops or drop chances changed.
+        prices (Dict[str, Tuple]): Items whose price moved by more than the threshold, appeared or vanished.
+        affected_relics (List[str]): Relics of the new index whose average returns differ or may differ:
+            new relics, changed drops or chances, and relics dropping any part whose price changed at all.
+    """
+
+    def __init__(self, old_version: str, new_version: str, sections: List[str], added_relics: List[str],
+                 removed_relics: List[str], vaulted: List[str], unvaulted: List[str],
+                 rarities: Dict[str, Dict[str, Tuple]], chances: List[str], prices: Dict[str, Tuple],
+                 affected_relics: List[str]):
+        self.old_version = old_version
+        self.new_version = new_version
+        self.sections = sections
+        self.added_relics = added_relics
+        self.removed_relics = removed_relics
+        self.vaulted = vaulted
+        self.unvaulted = unvaulted
+        self.rarities = rarities
+        self.chances = chances
+        self.prices = prices
+        self.affected_relics = affected_relics
+
+    def __bool__(self):
+        return bool(self.sections)
+
+    def to_dict(self) -> Dict:
+        """Return the change set as JSON-compatible dicts and lists."""
+        return {'old_version': self.old_version,
+                'new_version': self.new_version,
+                'sections': self.sections,
+                'relics': {'added': self.added_relics, 'removed': self.removed_relics},
+                'vaulted': self.vaulted,
+                'unvaulted': self.unvaulted,
+                'rarities': {relic: {part: list(change) for part, change in drops.items()}
+                             for relic, drops in self.rarities.items()},
+                'chances': self.chances,
+                'prices': {item: list(change) for item, change in self.prices.items()},
+                'affected_relics': self.affected_relics}
+
+
+def diff_indexes(old, new, price_threshold: float = 0) -> ChangeSet:
+    """
+    Compare two index versions section by section.
+
+    Sections with equal hashes are skipped; the others are compared by walking their sorted keys side by side.
+
+    Args:
+        old: The old index, as an ``IndexSnapshot`` or anything ``load_index`` accepts.
+        new: The new index, likewise.
+        price_threshold (float): Report price moves larger than this many platinum. Every move still
+            marks the relics dropping the item as affected.
+
+    Returns:
+        ChangeSet: The changes from ``old`` to ``new``.
+    """
+    old, new = _as_source(old), _as_source(new)
+    old_hashes, new_hashes = get_section_hashes(old), get_section_hashes(new)
+    sections = [section for section, in_old, in_new in _merge(old_hashes, new_hashes)
+                if not (in_old and in_new) or old_hashes[section] != new_hashes[section]]
+
+    added, removed, rarities, chances = [], [], {}, []
+    if 'relics' in sections or 'chances' in sections:
+        old_relics, new_relics = old.relic_dict, new.relic_dict
+        old_profiles, new_profiles = _drop_profiles(old), _drop_profiles(new)
+        for relic, in_old, in_new in _merge(old_relics, new_relics):
+            if not in_old:
+                added.append(relic)
+            elif not in_new:
+                removed.append(relic)
+            else:
+                if old_profiles[relic] != new_profiles[relic]:
+                    chances.append(relic)
+
+                old_drops, new_drops = old_relics[relic], new_relics[relic]
+                if old_drops != new_drops:
+                    rarities[relic] = {part: (old_drops.get(part), new_drops.get(part))
+                                       for part, _, _ in _merge(old_drops, new_drops)
+                                       if old_drops.get(part) != new_drops.get(part)}
+
+    vaulted, unvaulted = [], []
+    if 'non_vaulted' in sections:
+        for relic, in_old, in_new in _merge(old.nv_relics, new.nv_relics):
+            if relic not in old.relic_dict or relic not in new.relic_dict:
+                continue
+            if in_old and not in_new:
+                vaulted.append(relic)
+            elif in_new and not in_old:
+                unvaulted.append(relic)
+
+    prices, repriced = {}, set()
+    if 'prices' in sections:
+        old_prices, new_prices = old.price_dict, new.price_dict
+        for item, in_old, in_new in _merge(old_prices, new_prices):
+            before, after = old_prices.get(item), new_prices.get(item)
+            if before == after:
+                continue
+
+            repriced.add(item)
+            if not (in_old and in_new) or abs(after - before) > price_threshold:
+                prices[item] = (before, after)
+
+    affected = set(added) | set(chances)
+    if repriced:
+        arrays = get_batch_arrays(new)
+        part_ids = [arrays.part_ids[item] for item in repriced if item in arrays.part_ids]
+        rows = np.flatnonzero(np.isin(arrays.slot_parts, part_ids).any(axis=1))
+        affected.update(arrays.relics[row] for row in rows.tolist())
+
+    return ChangeSet(old.version, new.version, sections, added, removed, vaulted, unvaulted, rarities, chances,
+                     prices, sorted(affected))
+
+
+def recompute_returns(previous: ReturnTable, changes: ChangeSet, snapshot: IndexSnapshot = None) -> ReturnTable:
+    """
+    Bring a table of average returns at index prices up to date with a new index, recomputing only what changed.
+
+    Args:
+        previous (ReturnTable): ``get_average_returns()`` of the old index.
+        changes (ChangeSet): ``diff_indexes`` from the old index to ``snapshot``.
+        snapshot (IndexSnapshot, optional): The new snapshot, the active one by default.
+
+    Returns:
+        ReturnTable: Average returns of every relic of the new index, equal to ``get_average_returns()``.
+    """
+    arrays = get_batch_arrays(snapshot)
+    affected = set(changes.affected_relics)
+    previous_ids = {relic: i for i, relic in enumerate(previous.relics)}
+
+    stale = [row for row, relic in enumerate(arrays.relics) if relic in affected or relic not in previous_ids]
+    kept = [row for row, relic in enumerate(arrays.relics) if relic not in affected and relic in previous_ids]
+
+    values = np.empty((len(arrays.relics), len(REFINEMENTS), len(STYLES)))
+    values[kept] = previous.values[[previous_ids[arrays.relics[row]] for row in kept]]
+    if stale:
+        values[stale] = _expected_returns(arrays.chances[stale], arrays.slot_values(arrays.prices)[stale])
+
+    return ReturnTable(arrays.relics, values)
+
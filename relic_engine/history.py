@@ -0,0 +1,331 @@
+import datetime
+import io
+import os
+import threading
+import warnings
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from .index import _write_atomic
+
+HISTORY_FORMAT = 1
+
+# Rolling windows, in calendar days ending on (and including) the day priced.
+WINDOWS = (7, 30)
+
+# Pricing bases: the day's average or median price, or a rolling mean, median or volume-weighted price.
+BASES = ('average', 'median') + tuple(f"{kind}_{window}" for kind in ('mean', 'median', 'vwap') for window in WINDOWS)
+
+# Daily columns, filled from the relics.run record fields of the same position.
+COLUMNS = ('average', 'median', 'volume')
+RECORD_FIELDS = ('avg_price', 'median', 'volume')
+
+# Running totals per part from the first day on; a window's total is the difference of two rows.
+SUMS = ('average', 'count', 'volume', 'value')
+
+DayLike = Union[str, datetime.date, np.datetime64]
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def _day_number(day: DayLike) -> int:
+    """Days since 1970-01-01; strings may carry a time after the date, as relics.run datetimes do."""
+    if isinstance(day, str):
+        day = day[:10]
+    elif isinstance(day, datetime.datetime):
+        day = day.date()
+
+    return int(np.datetime64(day, 'D').astype(np.int64))
+
+
+def _iso_day(day: int) -> str:
+    return str(np.datetime64(int(day), 'D'))
+
+
+def _field(record: Dict, field: str) -> float:
+    value = record.get(field)
+    return np.nan if value is None else float(value)
+
+
+class PriceHistory:
+    """
+    Columnar store of daily price snapshots: one row per day, one column per part.
+
+    Every column is a float array shaped (days, parts) with NaN where a part has no record that day.
+    Aggregates are kept up to date as days are appended, so no query rescans the history: rolling
+    means and volume-weighted prices are the difference of two rows of running totals, and rolling
+    medians are computed once for the appended day.
+
+    Rows are stored in buffers that double in size when full, so appending a day copies nothing but
+    that day; the attributes below are views of the filled part.
+
+    Attributes:
+        days (np.ndarray): Day numbers (days since 1970-01-01), increasing.
+        parts (List[str]): Part names, in column order.
+        part_ids (Dict[str, int]): Column of each part.
+        columns (Dict[str, np.ndarray]): Daily ``average``, ``median`` and ``volume`` per part.
+        sums (Dict[str, np.ndarray]): Running totals, shape (days + 1, parts), for prices, priced days,
+            volume and price times volume. Row ``i`` totals the first ``i`` days.
+        medians (Dict[int, np.ndarray]): Rolling median of the daily medians for each of ``WINDOWS``.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.part_ids = {}
+        self._size = 0
+        self._days = np.zeros(0, dtype=np.int64)
+        self._columns = {name: np.zeros((0, 0)) for name in COLUMNS}
+        self._sums = {name: np.zeros((1, 0)) for name in SUMS}
+        self._medians = {window: np.zeros((0, 0)) for window in WINDOWS}
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def days(self) -> np.ndarray:
+        return self._days[:self._size]
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: column[:self._size, :len(self.parts)] for name, column in self._columns.items()}
+
+    @property
+    def sums(self) -> Dict[str, np.ndarray]:
+        return {name: total[:self._size + 1, :len(self.parts)] for name, total in self._sums.items()}
+
+    @property
+    def medians(self) -> Dict[int, np.ndarray]:
+        return {window: median[:self._size, :len(self.parts)] for window, median in self._medians.items()}
+
+    @property
+    def dates(self) -> List[str]:
+        """ISO dates of the stored days."""
+        return [str(day) for day in self.days.astype('datetime64[D]')]
+
+    def _reserve(self, days: int, parts: int):
+        """Make room for ``days`` rows and ``parts`` columns, at least doubling a buffer that grows."""
+        capacity, width = self._days.shape[0], self._columns[COLUMNS[0]].shape[1]
+        if days <= capacity and parts <= width:
+            return
+
+        capacity = max(days, 2 * capacity) if days > capacity else capacity
+        width = max(parts, 2 * width) if parts > width else width
+
+        def grow(array, rows, fill):
+            grown = np.full((rows, width), fill)
+            grown[:array.shape[0], :array.shape[1]] = array
+            return grown
+
+        days_buffer = np.zeros(capacity, dtype=np.int64)
+        days_buffer[:self._size] = self.days
+        self._days = days_buffer
+        self._columns = {name: grow(column, capacity, np.nan) for name, column in self.columns.items()}
+        self._sums = {name: grow(total, capacity + 1, 0.0) for name, total in self.sums.items()}
+        self._medians = {window: grow(median, capacity, np.nan) for window, median in self.medians.items()}
+
+    def append(self, day: DayLike, records: Dict[str, Dict]):
+        """
+        Add one day's prices, updating every aggregate for that day only.
+
+        Args:
+            day: The day, as an ISO date string, ``datetime.date`` or ``np.datetime64``.
+            records (Dict[str, Dict]): Per part, a relics.run history record with ``avg_price``,
+                ``median`` and ``volume``. Missing fields count as no data.
+
+        Raises:
+            ValueError: If the day is older than the last stored day. The last day itself is replaced,
+                so a rebuild on the same day does not add a second row.
+        """
+        day = _day_number(day)
+        if self._size and day < self._days[self._size - 1]:
+            raise ValueError(f"Cannot append {_iso_day(day)} after {_iso_day(self._days[self._size - 1])}")
+        if self._size and day == self._days[self._size - 1]:
+            self._size -= 1
+
+        for part in records:
+            if part not in self.part_ids:
+                self.part_ids[part] = len(self.parts)
+                self.parts.append(part)
+
+        row, parts = self._size, len(self.parts)
+        self._reserve(row + 1, parts)
+        self._days[row] = day
+
+        columns = {name: self._columns[name][row, :parts] for name in COLUMNS}
+        for column in columns.values():
+            column[:] = np.nan
+        for part, record in records.items():
+            column = self.part_ids[part]
+            for name, field in zip(COLUMNS, RECORD_FIELDS):
+                columns[name][column] = _field(record, field)
+
+        priced = ~np.isnan(columns['average'])
+        average = np.where(priced, columns['average'], 0.0)
+        volume = np.where(priced, np.nan_to_num(columns['volume']), 0.0)
+        increments = {'average': average, 'count': priced.astype(float), 'volume': volume, 'value': average * volume}
+        for name, total in self._sums.items():
+            total[row + 1, :parts] = total[row, :parts] + increments[name]
+
+        self._size += 1
+        for window in WINDOWS:
+            start = np.searchsorted(self.days, day - window + 1)
+            with warnings.catch_warnings():
+                # Parts without a median anywhere in the window give NaN.
+                warnings.simplefilter('ignore', RuntimeWarning)
+                self._medians[window][row, :parts] = np.nanmedian(self._columns['median'][start:row + 1, :parts],
+                                                                  axis=0)
+
+    def _rows(self, start: DayLike = None, end: DayLike = None) -> np.ndarray:
+        first = 0 if start is None else np.searchsorted(self.days, _day_number(start))
+        last = len(self.days) if end is None else np.searchsorted(self.days, _day_number(end), side='right')
+
+        return np.arange(first, last)
+
+    def _row(self, day: DayLike = None) -> int:
+        """Row of the latest day on or before ``day``, the last row by default."""
+        row = len(self.days) - 1 if day is None else np.searchsorted(self.days, _day_number(day), side='right') - 1
+        if row < 0:
+            raise ValueError("The price history is empty" if day is None else f"No price history on or before {day}")
+
+        return int(row)
+
+    def values(self, basis: str = 'average', rows: np.ndarray = None) -> np.ndarray:
+        """
+        Prices of every part under a basis, shape (rows, parts), NaN where a part has no data.
+
+        Args:
+            basis (str): One of ``BASES``.
+            rows (np.ndarray, optional): Rows to price. Defaults to every day.
+
+        Raises:
+            ValueError: If the basis is unknown.
+        """
+        rows = np.arange(len(self.days)) if rows is None else np.asarray(rows, dtype=np.intp)
+        if basis not in BASES:
+            raise ValueError(f"Unknown pricing basis {basis!r}, expected one of {BASES}")
+        if basis in COLUMNS:
+            return self.columns[basis][rows]
+
+        kind, window = basis.rsplit('_', 1)
+        window = int(window)
+        if kind == 'median':
+            return self.medians[window][rows]
+
+        starts = np.searchsorted(self.days, self.days[rows] - window + 1)
+        ends = rows + 1
+        numerator, denominator = ('average', 'count') if kind == 'mean' else ('value', 'volume')
+        totals = self.sums[numerator][ends] - self.sums[numerator][starts]
+        weights = self.sums[denominator][ends] - self.sums[denominator][starts]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(weights > 0, totals / weights, np.nan)
+
+    def prices(self, basis: str = 'average', day: DayLike = None) -> Dict[str, float]:
+        """
+        Price dict of one day under a basis, leaving out parts without data.
+
+        Args:
+            basis (str): One of ``BASES``.
+            day (optional): Day to price; the latest stored day on or before it is used. Defaults to the
+                last day.
+        """
+        values = self.values(basis, [self._row(day)])[0]
+        return {part: value for part, value in zip(self.parts, values.tolist()) if value == value}
+
+    def price(self, item: str, basis: str = 'average', day: DayLike = None) -> float:
+        """Price of one part under a basis, or None if it has no data."""
+        column = self.part_ids.get(item)
+        if column is None:
+            return None
+
+        value = float(self.values(basis, [self._row(day)])[0, column])
+        return None if np.isnan(value) else value
+
+    def matrix(self, basis: str = 'average', start: DayLike = None,
+               end: DayLike = None) -> Tuple[List[str], np.ndarray]:
+        """
+        Prices of every part on every day in a range, for ``get_scenario_returns``.
+
+        Args:
+            basis (str): One of ``BASES``.
+            start (optional): First day, inclusive. Defaults to the first stored day.
+            end (optional): Last day, inclusive. Defaults to the last stored day.
+
+        Returns:
+            Tuple[List[str], np.ndarray]: The ISO dates and a (days, parts) matrix in ``parts`` order, NaN
+            where a part has no data.
+        """
+        rows = self._rows(start, end)
+        dates = [str(day) for day in self.days[rows].astype('datetime64[D]')]
+
+        return dates, self.values(basis, rows)
+
+    def save(self, path: Union[str, os.PathLike]):
+        """Write the store, aggregates included, as a compressed ``.npz`` file."""
+        arrays = {'format': np.array(HISTORY_FORMAT), 'days': self.days, 'parts': np.array(self.parts, dtype=str)}
+        arrays.update((f"column_{name}", column) for name, column in self.columns.items())
+        arrays.update((f"sum_{name}", total) for name, total in self.sums.items())
+        arrays.update((f"median_{window}", median) for window, median in self.medians.items())
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        _write_atomic(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> 'PriceHistory':
+        """
+        Read a store written by ``save``.
+
+        Raises:
+            ValueError: If the file was written in another format version.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format']) != HISTORY_FORMAT:
+                raise ValueError(f"Unsupported price history format {int(data['format'])}")
+
+            history = cls()
+            history._days = data['days']
+            history._size = len(history._days)
+            history.parts = data['parts'].tolist()
+            history.part_ids = {part: i for i, part in enumerate(history.parts)}
+            history._columns = {name: data[f"column_{name}"] for name in COLUMNS}
+            history._sums = {name: data[f"sum_{name}"] for name in SUMS}
+            history._medians = {window: data[f"median_{window}"] for window in WINDOWS}
+
+        return history
+
+
+def load_history(source: Union[str, os.PathLike, PriceHistory]) -> PriceHistory:
+    """
+    Load a price history store and make it the one pricing bases are read from.
+
+    Args:
+        source: Path to a store written by ``PriceHistory.save``, or a ``PriceHistory``.
+    """
+    global _history
+
+    history = source if isinstance(source, PriceHistory) else PriceHistory.load(source)
+    with _history_lock:
+        _history = history
+
+    return history
+
+
+def get_history() -> PriceHistory:
+    """
+    Return the active price history store.
+
+    Raises:
+        ValueError: If no history has been loaded.
+    """
+    history = _history
+    if history is None:
+        raise ValueError("No price history loaded; call load_history first")
+
+    return history
+
+
+def get_basis_prices(basis: str = 'average', day: DayLike = None) -> Dict[str, float]:
+    """Return the price dict of the active history for a basis and day; see ``PriceHistory.prices``."""
+    return get_history().prices(basis, day)
@@ -0,0 +1,496 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
+from typing import Callable, Dict, Hashable, Mapping, Optional, Union
+
+import requests
+
+from .binary import MAGIC, BinaryIndex, is_binary_index
+from .model import REFINEMENT_KEYS, IndexModel, RelicDictView, resolve_chances
+
+DEFAULT_INDEX_URL = "https://github.com/JCalMcBride/RelicEngine/raw/master/index.json.gz"
+
+_config = {
+    'url': os.environ.get('RELIC_ENGINE_INDEX_URL', DEFAULT_INDEX_URL),
+    'cache_dir': os.environ.get('RELIC_ENGINE_CACHE_DIR',
+                                os.path.join(os.path.expanduser('~'), '.cache', 'relic_engine')),
+    'max_age': float(os.environ.get('RELIC_ENGINE_MAX_AGE', 6 * 60 * 60)),
+    'timeout': float(os.environ.get('RELIC_ENGINE_TIMEOUT', 30)),
+}
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_refresher = None
+
+_derived_builders = {}
+_lazy_derived = set()
+_carried_caches = []
+
+
+class IndexLoadError(RuntimeError):
+    """Raised when no index could be fetched and no cached copy is available."""
+
+
+def register_derived(name: str, warm: bool = True):
+    """
+    Register a builder for a structure derived from an index snapshot.
+
+    Derived structures are built at most once per snapshot, lazily on first use or eagerly by
+    ``IndexSnapshot.warm`` when a background refresh prepares a new snapshot. Structures registered
+    with ``warm=False`` are only ever built on first use.
+    """
+    def decorator(builder: Callable):
+        _derived_builders[name] = builder
+        if not warm:
+            _lazy_derived.add(name)
+        return builder
+
+    return decorator
+
+
+def register_carry_over(cache, keep: Callable[[object], Callable[[Hashable], bool]]):
+    """
+    Register a ``ResultCache`` whose entries ``refresh_index`` carries over to a new index.
+
+    ``keep`` is called with the ``ChangeSet`` from the old index to the new one and returns the predicate
+    ``ResultCache.carry_over`` keeps entries by.
+    """
+    _carried_caches.append((cache, keep))
+
+
+class IndexSnapshot:
+    """
+    One immutable version of the index together with everything derived from it.
+
+    Lookups grab the active snapshot once and read only from it, so a reload that swaps in a new
+    snapshot can never mix old relics with new prices inside a single call.
+
+    ``index`` is a decoded dict or a ``BinaryIndex``. With a binary index, ``relic_drops``, ``price``
+    and ``ducats`` read straight from the mapped file, and a whole section such as ``price_dict`` is
+    only decoded when first accessed.
+
+    Relics are held in an ``IndexModel`` rather than nested dicts. For a decoded dict it replaces the
+    relic section right away, so ``index['relics']`` and ``relic_dict`` are a ``RelicDictView``; for a
+    binary index it is built on first use. The drop chances of every relic come from the model too, taken
+    from the index's ``chances`` section where the relic has an entry.
+    """
+
+    def __init__(self, index: Mapping, version: str = None):
+        self.binary = index if isinstance(index, BinaryIndex) else None
+        if version is None:
+            version = self.binary.version if self.binary is not None else _hash_index(index)
+        self.version = version
+
+        self._model = None
+        if self.binary is None:
+            self._model = IndexModel(index['relics'].items(), index.get('chances', {}).get)
+            index = dict(index, relics=self._model.view)
+            if 'chances' in index:
+                index['chances'] = self._model.chance_view
+        self.index = index
+
+        self._derived = {}
+        # Reentrant: derived builders may build the model of a binary index under the same lock.
+        self._derived_lock = threading.RLock()
+
+    @property
+    def model(self) -> IndexModel:
+        model = self._model
+        if model is None:
+            with self._derived_lock:
+                if self._model is None:
+                    self._model = IndexModel(self.binary.iter_relics(), self.binary.relic_chances)
+                model = self._model
+
+        return model
+
+    @property
+    def relic_dict(self) -> RelicDictView:
+        return self.model.view
+
+    @property
+    def price_dict(self) -> Dict:
+        return self.index['prices']
+
+    @property
+    def ducat_dict(self) -> Dict:
+        return self.index['ducats']
+
+    @property
+    def required_dict(self) -> Dict:
+        return self.index['required_count']
+
+    @property
+    def nv_relics(self):
+        return self.index['non_vaulted']
+
+    @property
+    def type_dict(self) -> Dict:
+        return self.index['types']
+
+    def relic_drops(self, relic: str) -> Dict[str, int]:
+        """Return ``{part: rarity}`` for one relic; raises KeyError for unknown relics."""
+        if self._model is None:
+            return self.binary.relic_drops(relic)
+
+        return self._model.drops(relic)
+
+    def drop_chances(self, relic: str, refinement: str) -> Dict:
+        """Return ``{part: chance}`` for one relic, a list of chances for a part dropping at several rarities."""
+        if self._model is None:
+            drops = self.binary.relic_drops(relic)
+            chances = resolve_chances(list(drops), list(drops.values()), self.binary.relic_chances(relic))
+            chances = chances[REFINEMENT_KEYS.index(refinement.lower()[0])]
+            return {part: list(chance) if isinstance(chance, tuple) else chance
+                    for part, chance in zip(drops, chances)}
+
+        return self._model.drop_chances(relic, refinement)
+
+    def price(self, item: str) -> int:
+        if self.binary is not None:
+            return self.binary.price(item)
+
+        return self.index['prices'].get(item, 0)
+
+    def ducats(self, item: str) -> int:
+        if self.binary is not None:
+            return self.binary.ducats(item)
+
+        return self.index['ducats'].get(item, 0)
+
+    def derived(self, name: str):
+        """Return the named derived structure, building it on first use."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = _derived_builders[name](self)
+
+            return self._derived[name]
+
+    def warm(self) -> 'IndexSnapshot':
+        """Build every registered derived structure up front, except those registered with ``warm=False``."""
+        for name in list(_derived_builders):
+            if name not in _lazy_derived:
+                self.derived(name)
+
+        return self
+
+
+def _hash_index(index: Dict) -> str:
+    return hashlib.sha1(json.dumps(index, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def configure(url: str = None, cache_dir: str = None, max_age: float = None, timeout: float = None) -> Dict:
+    """
+    Change where and how the index is fetched.
+
+    Every option can also be set through the environment before import
+    (``RELIC_ENGINE_INDEX_URL``, ``RELIC_ENGINE_CACHE_DIR``, ``RELIC_ENGINE_MAX_AGE``,
+    ``RELIC_ENGINE_TIMEOUT``). Passing an empty string as ``cache_dir`` disables the disk cache.
+
+    Args:
+        url (str, optional): URL of ``index.json.gz``.
+        cache_dir (str, optional): Directory holding the cached index and its validators.
+        max_age (float, optional): Seconds a cached index is used without revalidation.
+        timeout (float, optional): Network timeout in seconds.
+
+    Returns:
+        Dict: The active configuration.
+    """
+    for key, value in (('url', url), ('cache_dir', cache_dir), ('max_age', max_age), ('timeout', timeout)):
+        if value is not None:
+            _config[key] = value
+
+    return dict(_config)
+
+
+def _cache_paths():
+    cache_dir = _config['cache_dir']
+    return os.path.join(cache_dir, 'index.json.gz'), os.path.join(cache_dir, 'index.meta.json')
+
+
+def _read_cache():
+    if not _config['cache_dir']:
+        return None, {}
+
+    data_path, meta_path = _cache_paths()
+    try:
+        with open(data_path, 'rb') as fp:
+            data = fp.read()
+    except OSError:
+        return None, {}
+
+    try:
+        with open(meta_path, 'r') as fp:
+            meta = json.load(fp)
+    except (OSError, ValueError):
+        meta = {}
+
+    # Validators belong to the URL they were issued for.
+    if meta.get('url') != _config['url']:
+        meta = {}
+
+    return data, meta
+
+
+def _write_atomic(path: Union[str, os.PathLike], data: bytes):
+    """Write a file through a temporary file and a rename, so readers never see it half written."""
+    tmp_path = f"{os.fspath(path)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as fp:
+        fp.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_cache(data: Optional[bytes], meta: Dict):
+    if not _config['cache_dir']:
+        return
+
+    data_path, meta_path = _cache_paths()
+    try:
+        os.makedirs(_config['cache_dir'], exist_ok=True)
+        if data is not None:
+            _write_atomic(data_path, data)
+        _write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+    except OSError as e:
+        warnings.warn(f"Could not write the relic index cache: {e}", RuntimeWarning, stacklevel=3)
+
+
+def fetch_index(force: bool = False) -> bytes:
+    """
+    Return the raw ``index.json.gz`` bytes, going through the disk cache.
+
+    A cached copy younger than ``max_age`` is returned without touching the network. Older copies
+    are revalidated with ``If-None-Match``/``If-Modified-Since``. If the server cannot be reached
+    the stale copy is used with a warning.
+
+    Args:
+        force (bool): Revalidate even if the cached copy is still fresh.
+
+    Raises:
+        IndexLoadError: If the index can neither be downloaded nor read from the cache.
+    """
+    cached, meta = _read_cache()
+
+    if cached is not None and not force and time.time() - meta.get('fetched_at', 0) < _config['max_age']:
+        return cached
+
+    headers = {}
+    if cached is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = requests.get(_config['url'], headers=headers, timeout=_config['timeout'])
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.RequestException as e:
+        if cached is None:
+            raise IndexLoadError(f"Could not download the relic index from {_config['url']}: {e}") from e
+
+        warnings.warn(f"Could not revalidate the relic index, using the cached copy: {e}",
+                      RuntimeWarning, stacklevel=2)
+        return cached
+
+    if response.status_code == 304:
+        meta.update({'fetched_at': time.time(),
+                     'etag': response.headers.get('ETag', meta.get('etag')),
+                     'last_modified': response.headers.get('Last-Modified', meta.get('last_modified'))})
+        _write_cache(None, meta)
+        return cached
+
+    data = response.content
+    _write_cache(data, {'url': _config['url'],
+                        'fetched_at': time.time(),
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified')})
+
+    return data
+
+
+def decode_index(data: bytes) -> Dict:
+    """Decode index bytes, gzip-compressed or plain JSON."""
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+
+    return json.loads(data.decode("utf-8"))
+
+
+def _read_source(source) -> IndexSnapshot:
+    if isinstance(source, dict):
+        return IndexSnapshot(source)
+
+    if not isinstance(source, (bytes, bytearray, memoryview)):
+        with open(source, 'rb') as fp:
+            if is_binary_index(fp.read(len(MAGIC))):
+                return IndexSnapshot(BinaryIndex.open(source))
+
+            fp.seek(0)
+            source = fp.read()
+
+    return _snapshot_from_bytes(bytes(source))
+
+
+def _data_version(data: bytes) -> str:
+    if is_binary_index(data):
+        return BinaryIndex(data).version
+
+    return hashlib.sha1(data).hexdigest()
+
+
+def _snapshot_from_bytes(data: bytes) -> IndexSnapshot:
+    if is_binary_index(data):
+        return IndexSnapshot(BinaryIndex(data))
+
+    return IndexSnapshot(decode_index(data), hashlib.sha1(data).hexdigest())
+
+
+def _publish(snapshot: IndexSnapshot):
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = snapshot
+
+
+def load_index(source: Union[str, os.PathLike, bytes, Dict] = None) -> Dict:
+    """
+    Load an index and make it the one used by every lookup.
+
+    Args:
+        source (optional): A path to an ``index.json``/``index.json.gz``/``index.bin`` file, its raw
+            bytes, or an already decoded index dict. When omitted the index is fetched through the disk
+            cache. Binary files are memory-mapped rather than read.
+
+    Returns:
+        Dict: The loaded index. For a binary index this is a ``BinaryIndex`` mapping whose sections
+        are decoded on first access.
+    """
+    snapshot = _read_source(source) if source is not None else _snapshot_from_bytes(fetch_index())
+    _publish(snapshot)
+
+    return snapshot.index
+
+
+def _active_version() -> Optional[str]:
+    """Version of the active snapshot, or None before one is loaded; result caches follow it."""
+    snapshot = _snapshot
+    return snapshot.version if snapshot is not None else None
+
+
+def get_snapshot() -> IndexSnapshot:
+    """Return the active index snapshot, loading it on first use."""
+    global _snapshot
+
+    snapshot = _snapshot
+    if snapshot is not None:
+        return snapshot
+
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = _snapshot_from_bytes(fetch_index())
+
+        return _snapshot
+
+
+def get_index() -> Dict:
+    """Return the active index, loading it on first use."""
+    return get_snapshot().index
+
+
+def refresh_index(force: bool = True) -> bool:
+    """
+    Fetch the index again and swap it in if it changed.
+
+    The new snapshot, including every registered derived structure, is built before it is
+    published with a single reference swap. Calls already running keep the snapshot they started with.
+    Entries of registered result caches that the change set leaves valid are carried over to the new
+    snapshot just before the swap, so only the relics that changed are computed again.
+
+    Args:
+        force (bool): Revalidate with the server even if the cached copy is still fresh.
+
+    Returns:
+        bool: True if a new index was published.
+    """
+    data = fetch_index(force=force)
+    current = _snapshot
+    if current is not None and current.version == _data_version(data):
+        return False
+
+    snapshot = _snapshot_from_bytes(data).warm()
+    if current is not None and _carried_caches:
+        from .diff import diff_indexes
+
+        changes = diff_indexes(current, snapshot)
+        # Nothing may fail between the first carry-over and the swap, or old calls would stop caching.
+        for cache, keep in [(cache, keep(changes)) for cache, keep in _carried_caches]:
+            cache.carry_over(current.version, snapshot.version, keep)
+    _publish(snapshot)
+
+    return True
+
+
+class IndexRefresher(threading.Thread):
+    """Daemon thread that calls ``refresh_index`` every ``interval`` seconds until stopped."""
+
+    def __init__(self, interval: float, on_reload: Callable[[IndexSnapshot], None] = None):
+        super().__init__(name='relic-engine-refresher', daemon=True)
+        self.interval = interval
+        self.on_reload = on_reload
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                reloaded = refresh_index()
+            except Exception as e:  # Keep serving the current snapshot; try again next interval.
+                self.last_error = e
+                warnings.warn(f"Relic index refresh failed: {e}", RuntimeWarning)
+                continue
+
+            self.last_error = None
+            if reloaded and self.on_reload is not None:
+                self.on_reload(_snapshot)
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        if self is not threading.current_thread():
+            self.join(timeout)
+
+
+def start_refresher(interval: float = 60 * 60, on_reload: Callable[[IndexSnapshot], None] = None) -> IndexRefresher:
+    """
+    Start refreshing the index in the background. Replaces any refresher already running.
+
+    Args:
+        interval (float): Seconds between refreshes.
+        on_reload (Callable, optional): Called with the new snapshot after each swap.
+
+    Returns:
+        IndexRefresher: The running refresher thread.
+    """
+    global _refresher
+
+    stop_refresher()
+    _refresher = IndexRefresher(interval, on_reload)
+    _refresher.start()
+
+    return _refresher
+
+
+def stop_refresher():
+    """Stop the background refresher, if one is running."""
+    global _refresher
+
+    if _refresher is not None:
+        _refresher.stop()
+        _refresher = None
@@ -0,0 +1,328 @@
+from array import array
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .rarity import _rarity_dict, get_drop_chance
+
+REFINEMENT_KEYS = ('i', 'e', 'f', 'r')
+REFINEMENT_NAMES = ('Intact', 'Exceptional', 'Flawless', 'Radiant')
+_REFINEMENT_ROWS = {key: i for i, key in enumerate(REFINEMENT_KEYS)}
+
+# Drop table percentages have two decimals. A percentage this close to a standard chance stands for it,
+# so the standard relics keep their exact chances (e.g. 25.33% is 76/300).
+_SNAP_TOLERANCE = 5e-5
+
+
+def _tiers(rarity: int) -> Tuple[int, ...]:
+    """Unpack a rarity code such as ``21`` into its tiers, or ``(0,)`` if any digit is not a known tier."""
+    tiers = tuple(int(digit) for digit in str(rarity))
+    if any(tier not in _rarity_dict['i'] for tier in tiers):
+        return (0,)
+
+    return tiers
+
+
+def _from_percent(percent: float, key: str) -> float:
+    chance = percent / 100
+    for standard in _rarity_dict[key].values():
+        if abs(chance - standard) < _SNAP_TOLERANCE:
+            return standard
+
+    return chance
+
+
+def _to_percent(chance: float) -> float:
+    return round(chance * 100, 2)
+
+
+def _table_chance(value, key: str):
+    if isinstance(value, list):
+        return tuple(_from_percent(percent, key) for percent in value)
+
+    return _from_percent(value, key)
+
+
+def _tier_chances(rarities: Sequence[int], key: str) -> List:
+    """
+    Chances of every drop from the tier table alone.
+
+    When the tiers do not describe a whole relic (an unknown tier, or chances not adding up to 1, as
+    with eight equal drops all given tier 1), every slot gets an equal share instead.
+    """
+    chances = [get_drop_chance(key, rarity) for rarity in rarities]
+    slots = [chance if isinstance(chance, list) else [chance] for chance in chances]
+    flat = [chance for slot in slots for chance in slot]
+    if all(isinstance(chance, float) for chance in flat) and abs(sum(flat) - 1) < 1e-9:
+        return [tuple(chance) if isinstance(chance, list) else chance for chance in chances]
+
+    counts = [len(str(rarity)) for rarity in rarities]
+    share = 1 / sum(counts)
+    return [share if count == 1 else (share,) * count for count in counts]
+
+
+def resolve_chances(parts: Sequence[str], rarities: Sequence[int], table: Optional[Dict] = None) -> Tuple:
+    """
+    Return the chance vectors of one relic: per refinement, the chance of each drop.
+
+    A chance is a float, or a tuple with one chance per rarity for a part that drops at several.
+
+    Args:
+        parts: Part of each drop.
+        rarities: Rarity code of each drop.
+        table (Dict, optional): The relic's entry in the index's ``chances`` section,
+            ``{refinement name: {part: percent or [percent, ...]}}``. Used when it covers every drop at
+            every refinement; otherwise the chances come from the tiers.
+    """
+    if table is not None:
+        try:
+            return tuple(tuple(_table_chance(table[name][part], key) for part in parts)
+                         for key, name in zip(REFINEMENT_KEYS, REFINEMENT_NAMES))
+        except (KeyError, TypeError):
+            pass
+
+    return tuple(tuple(_tier_chances(rarities, key)) for key in REFINEMENT_KEYS)
+
+
+def _table_source(drops: Dict[str, int], table: Dict) -> Optional[Tuple]:
+    """The table's percentages in drop order, or None if the table does not cover every drop."""
+    packed = [i for i, rarity in enumerate(drops.values()) if rarity > 9]
+    source = []
+    try:
+        for name in REFINEMENT_NAMES:
+            chances = table[name]
+            values = [chances[part] for part in drops]
+            for i in packed:
+                values[i] = tuple(values[i])
+            source.append(tuple(values))
+
+        source = tuple(source)
+        hash(source)
+    except (KeyError, TypeError):
+        return None
+
+    return source
+
+
+class RelicRecord:
+    """
+    Drops of one relic as parallel arrays of part ids and rarity code ids, with its chance vectors.
+
+    Records are cut from the model's flat arrays on request; the model itself keeps no per-relic objects.
+
+    Attributes:
+        name (str): Relic name.
+        part_ids (array): Part id per drop, into ``IndexModel.parts``.
+        codes (array): Rarity code id per drop, into ``IndexModel.rarities``.
+        chances (Tuple[tuple, ...]): Per refinement, the chance of each drop (a tuple for packed codes).
+    """
+
+    __slots__ = ('name', 'part_ids', 'codes', 'chances')
+
+    def __init__(self, name: str, part_ids: array, codes: array, chances: Tuple):
+        self.name = name
+        self.part_ids = part_ids
+        self.codes = codes
+        self.chances = chances
+
+
+class IndexModel:
+    """
+    Typed form of the index's relic section.
+
+    Part names and rarity codes are interned into id tables. The drops of every relic are stored
+    back to back in two flat arrays, ``drop_parts`` and ``drop_codes``; relic ``i`` owns the range
+    ``offsets[i]:offsets[i + 1]``. Part ids follow the order parts first appear in, walking relics in
+    index order.
+
+    Chance vectors (see ``resolve_chances``) are interned as well: relics with the same layout share
+    one profile, so the standard relics need only a handful.
+
+    Attributes:
+        parts (List[str]): Part name per part id.
+        part_ids (Dict[str, int]): Id of each part.
+        relics (List[str]): Relic names, in index order.
+        relic_ids (Dict[str, int]): Position of each relic.
+        offsets (array): Start of each relic's drops, plus the total drop count.
+        drop_parts (array): Part id per drop.
+        drop_codes (array): Rarity code id per drop.
+        rarities (List[int]): Rarity code per code id, e.g. ``1`` or ``21``.
+        code_tiers (List[Tuple[int, ...]]): Tiers per code id (1 Common, 2 Uncommon, 3 Rare); ``(0,)``
+            for codes with a digit outside the standard tiers.
+        profiles (List[tuple]): Interned chance vectors.
+        relic_profiles (array): Profile id per relic.
+        view (RelicDictView): ``{relic: {part: rarity}}`` mapping over the model.
+        chance_view (ChanceDictView): The ``chances`` section as a mapping over the model.
+    """
+
+    def __init__(self, relics: Iterable[Tuple[str, Dict[str, int]]],
+                 chance_table: Callable[[str], Optional[Dict]] = None):
+        self.parts = []
+        self.part_ids = {}
+        self.relics = []
+        self.relic_ids = {}
+        self.offsets = array('I', [0])
+        self.drop_parts = array('I')
+        self.drop_codes = array('H')
+        self.rarities = []
+        self.code_tiers = []
+        self.profiles = []
+        self.relic_profiles = array('I')
+        self.view = RelicDictView(self)
+        self.chance_view = ChanceDictView(self)
+
+        # Per relic, 1 if its chances came from the drop table; and profiles holding a packed (tuple) chance.
+        self._tabled = bytearray()
+        self._packed_profiles = set()
+
+        code_ids = {}
+        # Profile id per distinct chance source (the relic's table values, or its rarity codes), and per profile.
+        profile_ids = {}
+        interned = {}
+        for relic, drops in relics:
+            for part, rarity in drops.items():
+                part_id = self.part_ids.get(part)
+                if part_id is None:
+                    part_id = self.part_ids[part] = len(self.parts)
+                    self.parts.append(part)
+
+                code = code_ids.get(rarity)
+                if code is None:
+                    code = code_ids[rarity] = len(self.rarities)
+                    self.rarities.append(rarity)
+                    self.code_tiers.append(_tiers(rarity))
+
+                self.drop_parts.append(part_id)
+                self.drop_codes.append(code)
+
+            table = chance_table(relic) if chance_table is not None else None
+            source = _table_source(drops, table) if table is not None else None
+            if source is None:
+                source = tuple(drops.values())
+                table = None
+            self._tabled.append(table is not None)
+
+            profile_id = profile_ids.get(source)
+            if profile_id is None:
+                profile = resolve_chances(list(drops), list(drops.values()), table)
+                profile_id = profile_ids[source] = interned.setdefault(profile, len(self.profiles))
+                if profile_id == len(self.profiles):
+                    self.profiles.append(profile)
+                    if any(isinstance(chance, tuple) for chance in profile[0]):
+                        self._packed_profiles.add(profile_id)
+
+            self.relic_ids[relic] = len(self.relics)
+            self.relics.append(relic)
+            self.offsets.append(len(self.drop_parts))
+            self.relic_profiles.append(profile_id)
+
+        # drop_chances results per refinement and relic, filled in on first request.
+        self._chance_dicts = tuple([None] * len(self.relics) for _ in REFINEMENT_KEYS)
+
+    def record(self, relic: str) -> RelicRecord:
+        """Return the record of a relic; raises KeyError for unknown relics."""
+        return self._record(self.relic_ids[relic])
+
+    def _record(self, row: int) -> RelicRecord:
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return RelicRecord(self.relics[row], self.drop_parts[start:end], self.drop_codes[start:end],
+                           self.profiles[self.relic_profiles[row]])
+
+    def records(self, rows: Iterable[int] = None) -> Iterator[RelicRecord]:
+        """Yield the record of every relic in index order, or of the given rows only."""
+        for row in range(len(self.relics)) if rows is None else rows:
+            yield self._record(row)
+
+    def drops(self, relic: str) -> Dict[str, int]:
+        """Return ``{part: rarity}`` for one relic, as stored in the index."""
+        row = self.relic_ids[relic]
+        start, end = self.offsets[row], self.offsets[row + 1]
+        parts = self.parts
+        rarities = self.rarities
+        return {parts[part_id]: rarities[code]
+                for part_id, code in zip(self.drop_parts[start:end], self.drop_codes[start:end])}
+
+    def drop_chances(self, relic: str, refinement: str) -> Dict:
+        """Return ``{part: chance}`` for one relic, a list of chances for a part dropping at several rarities."""
+        row = self.relic_ids[relic]
+        refinement_row = _REFINEMENT_ROWS[refinement.lower()[0]]
+        drops = self._chance_dicts[refinement_row][row]
+        if drops is None:
+            parts = self.parts
+            start, end = self.offsets[row], self.offsets[row + 1]
+            chances = self.profiles[self.relic_profiles[row]][refinement_row]
+            drops = {parts[part_id]: chance for part_id, chance in zip(self.drop_parts[start:end], chances)}
+            self._chance_dicts[refinement_row][row] = drops
+
+        drops = drops.copy()
+        if self.relic_profiles[row] in self._packed_profiles:
+            # Callers get their own lists, as get_drop_chance builds a fresh one each time.
+            for part, chance in drops.items():
+                if isinstance(chance, tuple):
+                    drops[part] = list(chance)
+
+        return drops
+
+    def slots(self, record: RelicRecord) -> List[Tuple[int, Tuple[float, ...]]]:
+        """Return ``(part_id, chance per refinement)`` per slot: one slot per rarity of each drop."""
+        slots = []
+        for i, part_id in enumerate(record.part_ids):
+            chances = [chance[i] if isinstance(chance[i], tuple) else (chance[i],) for chance in record.chances]
+            slots.extend((part_id, refinement_chances) for refinement_chances in zip(*chances))
+
+        return slots
+
+
+class RelicDictView(Mapping):
+    """Read-only ``{relic: {part: rarity}}`` view over an ``IndexModel``; each value is built on access."""
+
+    def __init__(self, model: IndexModel):
+        self._model = model
+
+    def __getitem__(self, relic: str) -> Dict[str, int]:
+        return self._model.drops(relic)
+
+    def __contains__(self, relic) -> bool:
+        return relic in self._model.relic_ids
+
+    def __iter__(self):
+        return iter(self._model.relics)
+
+    def __len__(self):
+        return len(self._model.relics)
+
+    def __repr__(self):
+        return f"RelicDictView({len(self)} relics)"
+
+
+class ChanceDictView(Mapping):
+    """
+    Read-only ``{relic: {refinement: {part: percent}}}`` view of the relics whose chances came from the
+    drop table, matching the index's ``chances`` section.
+    """
+
+    def __init__(self, model: IndexModel):
+        self._model = model
+
+    def __getitem__(self, relic: str) -> Dict[str, Dict]:
+        row = self._model.relic_ids[relic]
+        if not self._model._tabled[row]:
+            raise KeyError(relic)
+
+        record = self._model._record(row)
+        parts = [self._model.parts[part_id] for part_id in record.part_ids]
+        return {name: {part: [_to_percent(c) for c in chance] if isinstance(chance, tuple) else _to_percent(chance)
+                       for part, chance in zip(parts, chances)}
+                for name, chances in zip(REFINEMENT_NAMES, record.chances)}
+
+    def __contains__(self, relic) -> bool:
+        row = self._model.relic_ids.get(relic)
+        return row is not None and bool(self._model._tabled[row])
+
+    def __iter__(self):
+        return (relic for relic, tabled in zip(self._model.relics, self._model._tabled) if tabled)
+
+    def __len__(self):
+        return self._model._tabled.count(1)
+
+    def __repr__(self):
+        return f"ChanceDictView({len(self)} relics)"
@@ -0,0 +1,131 @@
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+
+from .batch import REFINEMENTS, STYLES, VALUATIONS, _refinement_index, _style_index, get_average_returns
+from .cache import ResultCache
+from .index import IndexSnapshot, _active_version, get_snapshot, register_carry_over, register_derived
+
+# Rankings by other valuations than platinum, per snapshot version and (valuation, exchange rate).
+ranking_cache = ResultCache(maxsize=16, published=_active_version)
+
+# Index sections a ranking is computed from; a refresh changing none of them keeps the cached rankings.
+_RANKING_SECTIONS = {'relics', 'chances', 'prices', 'ducats', 'non_vaulted'}
+register_carry_over(ranking_cache, lambda changes: lambda key: not _RANKING_SECTIONS.intersection(changes.sections))
+
+
+def relic_era(relic: str) -> str:
+    """Return the era of a relic, e.g. ``'Axi'`` for ``'Axi A1'``."""
+    return relic.split(' ', 1)[0]
+
+
+class RelicRanking:
+    """
+    Relics sorted by average return for every refinement and style, built once per index snapshot and valuation.
+
+    ``orders[refinement, style]`` lists relic rows from best to worst; ties keep index order. Filters
+    are boolean masks over relic rows, so a filtered page costs one pass over an already sorted array.
+
+    Attributes:
+        relics (List[str]): Relic names, in index order.
+        values (np.ndarray): Average returns, shape (relics, refinements, styles), unrounded.
+        orders (np.ndarray): Relic rows by descending return, shape (refinements, styles, relics).
+        eras (List[str]): Eras present in the index, in order of first appearance.
+        era_ids (np.ndarray): Position of each relic's era in ``eras``.
+        vaulted (np.ndarray): Whether each relic is vaulted.
+        valuation (str): Valuation the relics are ranked by, one of ``VALUATIONS``.
+    """
+
+    def __init__(self, snapshot: IndexSnapshot, valuation: str = 'platinum', exchange_rate: float = None):
+        table = get_average_returns(snapshot=snapshot, valuation=valuation, exchange_rate=exchange_rate)
+        self.valuation = valuation
+        self.relics = table.relics
+        self.values = table.values
+        self.orders = np.ascontiguousarray(np.argsort(-table.values, axis=0, kind='stable').transpose(1, 2, 0))
+
+        era_ids = {}
+        self.era_ids = np.array([era_ids.setdefault(relic_era(relic), len(era_ids)) for relic in self.relics],
+                                dtype=np.intp)
+        self.eras = list(era_ids)
+
+        non_vaulted = set(snapshot.nv_relics)
+        self.vaulted = np.array([relic not in non_vaulted for relic in self.relics], dtype=bool)
+
+    def _order(self, refinement: str, style: str, era: Union[str, Iterable[str]] = None,
+               vaulted: bool = None) -> np.ndarray:
+        order = self.orders[_refinement_index(refinement), _style_index(style)]
+        mask = None
+        if era is not None:
+            wanted = {era.lower()} if isinstance(era, str) else {name.lower() for name in era}
+            ids = [i for i, name in enumerate(self.eras) if name.lower() in wanted]
+            mask = np.isin(self.era_ids, ids)
+        if vaulted is not None:
+            mask = self.vaulted == vaulted if mask is None else mask & (self.vaulted == vaulted)
+
+        return order if mask is None else order[mask[order]]
+
+    def top(self, refinement: str = 'Radiant', style: str = '4b4', k: int = 10, offset: int = 0,
+            era: Union[str, Iterable[str]] = None, vaulted: bool = None) -> List[Tuple[str, float]]:
+        """
+        Return one page of the best relics as ``(relic, average return)`` pairs, rounded like ``get_average_return``.
+
+        Args:
+            refinement (str): Refinement, in any shorthand ``get_average_return`` accepts.
+            style (str): Style, in any shorthand ``get_average_return`` accepts.
+            k (int): Page size.
+            offset (int): Number of ranked relics to skip.
+            era (Union[str, Iterable[str]], optional): Era or eras to keep, e.g. ``'Axi'`` or ``['Lith', 'Meso']``.
+            vaulted (bool, optional): Keep only vaulted (True) or only unvaulted (False) relics.
+        """
+        rows = self._order(refinement, style, era, vaulted)[offset:offset + k]
+        values = self.values[rows, _refinement_index(refinement), _style_index(style)]
+
+        return [(self.relics[row], round(value, 3)) for row, value in zip(rows.tolist(), values.tolist())]
+
+    def count(self, era: Union[str, Iterable[str]] = None, vaulted: bool = None) -> int:
+        """Number of relics passing the filters, e.g. to count pages."""
+        return len(self._order(REFINEMENTS[0], STYLES[0], era, vaulted))
+
+
+@register_derived('ranking')
+def _build_ranking(snapshot: IndexSnapshot) -> RelicRanking:
+    return RelicRanking(snapshot)
+
+
+def get_ranking(snapshot: IndexSnapshot = None, valuation: str = 'platinum',
+                exchange_rate: float = None) -> RelicRanking:
+    """
+    Return the relic ranking of a snapshot, the active one by default.
+
+    The platinum ranking is built with the snapshot; rankings by ducats or a blend are built on first
+    use and kept until the next price refresh.
+
+    Raises:
+        ValueError: If the valuation is unknown, or ``'blend'`` has no exchange rate.
+    """
+    snapshot = snapshot or get_snapshot()
+    if valuation == 'platinum':
+        return snapshot.derived('ranking')
+    if valuation not in VALUATIONS:
+        raise ValueError(f"Unknown valuation {valuation!r}, expected one of {VALUATIONS}")
+
+    key = (valuation, None if valuation == 'ducats' else exchange_rate)
+    hit, ranking = ranking_cache.get(key, snapshot.version)
+    if not hit:
+        ranking = RelicRanking(snapshot, *key)
+        ranking_cache.put(key, snapshot.version, ranking)
+
+    return ranking
+
+
+def get_top_relics(refinement: str = 'Radiant', style: str = '4b4', k: int = 10, offset: int = 0,
+                   era: Union[str, Iterable[str]] = None, vaulted: bool = None, valuation: str = 'platinum',
+                   exchange_rate: float = None) -> List[Tuple[str, float]]:
+    """
+    Return the best relics to crack by average return, filtered and paginated.
+
+    The ranking is sorted once per index snapshot, so it follows every price refresh without sorting
+    on each call. ``valuation`` ranks by platinum, ducats or a blend, as in ``get_average_returns``.
+    See ``RelicRanking.top`` for the other arguments.
+    """
+    return get_ranking(valuation=valuation, exchange_rate=exchange_rate).top(refinement, style, k, offset, era, vaulted)
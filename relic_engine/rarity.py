@@ -0,0 +1,37 @@
+_rarity_dict = {
+    'i': {
+        1: ((25 + (1 / 3)) / 100),
+        2: .11,
+        3: .02
+    },
+    'e': {
+        1: ((23 + (1 / 3)) / 100),
+        2: .13,
+        3: .04
+    },
+    'f': {
+        1: .2,
+        2: .17,
+        3: .06
+    },
+    'r': {
+        1: (1 / 6),
+        2: .2,
+        3: .1
+    },
+}
+
+
+def get_drop_chance(refinement: str, rarity_id: int):
+    ref = refinement.lower()[0]
+    try:
+        return _rarity_dict[ref][rarity_id]
+    except KeyError:
+        drop_chances = []
+        for digit in str(rarity_id):
+            if int(digit) in _rarity_dict[ref]:
+                drop_chances.append(get_drop_chance(ref, int(digit)))
+            else:
+                return 'N/A'
+
+        return drop_chances
@@ -0,0 +1,229 @@
+from itertools import combinations_with_replacement
+from math import factorial
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .batch import (REFINEMENTS, STYLE_MEMBERS, STYLES, _expected_returns, _refinement_index, _style_index,
+                    get_batch_arrays)
+from .index import IndexSnapshot
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Upper bound on uniforms drawn per vectorised step, bounding peak memory (8 bytes each).
+CHUNK_DRAWS = 1 << 22
+
+# Independent rewards each style earns over a number of runs; their ratio is the style's multiplier. In
+# 1b1 every member opens their own relic, four rewards per run, and 3b3 earns four rewards every three runs.
+STYLE_REWARDS = np.array([1, 4, 2, 4, 1, 1])
+STYLE_REWARD_RUNS = np.array([1, 1, 1, 3, 1, 1])
+
+
+class SimulationResult:
+    """
+    Outcome distribution of simulated relic runs for every relic, refinement and style.
+
+    A reward is the best of the drops the squad members opening the relic draw. A run's return is the
+    sum of the independent rewards it earns (``STYLE_REWARDS``): four in 1b1, two in 2b2, one otherwise.
+    3b3 earns four rewards every three runs, so its return is a third of the sum of four rewards. ``mean``
+    is directly comparable with ``get_average_return``, and variances and percentiles describe real
+    runs (for 3b3, per run of a block of three). Arrays are shaped (relics, refinements, styles) in the
+    order of ``relics``, ``REFINEMENTS`` and ``styles``.
+
+    Attributes:
+        relics (List[str]): Relic names.
+        styles (List[str]): Style names.
+        runs (int): Runs simulated per relic and refinement.
+        mean (np.ndarray): Mean return per run.
+        variance (np.ndarray): Variance of the return per run.
+        percentiles (Dict[float, np.ndarray]): Return at each requested percentile.
+        analytic (np.ndarray): The closed-form average returns for the same prices.
+    """
+
+    def __init__(self, relics: List[str], styles: List[str], runs: int, mean: np.ndarray, variance: np.ndarray,
+                 percentiles: Dict[float, np.ndarray], analytic: np.ndarray):
+        self.relics = relics
+        self.styles = styles
+        self.runs = runs
+        self.mean = mean
+        self.variance = variance
+        self.percentiles = percentiles
+        self.analytic = analytic
+        self._relic_ids = {relic: i for i, relic in enumerate(relics)}
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    @property
+    def stderr(self) -> np.ndarray:
+        """Standard error of ``mean``."""
+        return np.sqrt(self.variance / self.runs)
+
+    def deviation(self) -> np.ndarray:
+        """
+        Difference between the simulated and analytic means in standard errors.
+
+        Cells without variance (a relic that always gives the same reward) report 0 when the two agree
+        and ``inf`` otherwise.
+        """
+        difference = self.mean - self.analytic
+        stderr = self.stderr
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(stderr > 0, difference / stderr,
+                            np.where(np.isclose(difference, 0, atol=1e-9), 0.0, np.inf))
+
+    def get(self, relic: str, refinement: str = 'Radiant', style: str = '4b4') -> Dict[str, float]:
+        """Statistics of one relic; refinement and style accept the same shorthands as ``get_average_return``."""
+        cell = (self._relic_ids[relic], _refinement_index(refinement), self.styles.index(_style_name(style)))
+        stats = {'mean': float(self.mean[cell]),
+                 'std': float(self.std[cell]),
+                 'stderr': float(self.stderr[cell]),
+                 'analytic': float(self.analytic[cell]),
+                 'deviation': float(self.deviation()[cell])}
+        stats.update((f"p{q:g}", float(values[cell])) for q, values in self.percentiles.items())
+
+        return stats
+
+
+def _style_name(style: str) -> str:
+    return STYLES[_style_index(style)]
+
+
+def _rank_draws(rng: np.random.Generator, cdf: np.ndarray, runs: int, members: int) -> np.ndarray:
+    """
+    Draw ``members`` drops per run for every row of ``cdf``, as ranks into the row's slots.
+
+    ``cdf`` holds each row's cumulative chances in rank order; the rank of a draw is the number of
+    cumulative chances it passes. A rank equal to the slot count means no listed drop.
+    """
+    uniforms = rng.random((len(cdf), runs, members))
+    # Single bytes and in-place steps keep each pass over the draws to the memory it has to touch.
+    ranks = np.zeros(uniforms.shape, dtype=np.uint8)
+    passed = np.empty(uniforms.shape, dtype=bool)
+    for slot in range(cdf.shape[-1]):
+        np.greater_equal(uniforms, cdf[:, slot, None, None], out=passed)
+        ranks += passed.view(np.uint8)
+
+    return ranks
+
+
+def _percentile(values: np.ndarray, probabilities: np.ndarray, q: float) -> np.ndarray:
+    """The smallest value whose cumulative probability reaches ``q`` percent; values are in descending order."""
+    ascending = probabilities[..., ::-1].cumsum(axis=-1)
+    position = (ascending < q / 100 - 1e-12).sum(axis=-1, keepdims=True)
+    position = np.minimum(position, values.shape[-1] - 1)
+
+    return np.take_along_axis(values[..., ::-1], position, axis=-1)[..., 0]
+
+
+def _run_distribution(values: np.ndarray, probabilities: np.ndarray, rewards: int):
+    """
+    Distribution of the sum of ``rewards`` independent rewards, each worth ``values[..., slot]`` with
+    ``probabilities[..., slot]``. Returns the outcome values, in descending order, and their probabilities.
+    """
+    slots = values.shape[-1]
+    # How many rewards land in each slot, for every multiset of slots, and how many orders give it.
+    multisets = np.array([np.bincount(combination, minlength=slots)
+                          for combination in combinations_with_replacement(range(slots), rewards)])
+    orders = np.array([factorial(rewards) / np.prod([factorial(n) for n in row]) for row in multisets.tolist()])
+
+    outcomes = values @ multisets.T
+    outcome_probabilities = orders * np.prod(probabilities[..., None, :] ** multisets, axis=-1)
+
+    order = np.argsort(-outcomes, axis=-1, kind='stable')
+    outcomes = np.take_along_axis(np.broadcast_to(outcomes, outcome_probabilities.shape), order, axis=-1)
+    return outcomes, np.take_along_axis(outcome_probabilities, order, axis=-1)
+
+
+def simulate_returns(runs: int = 10000, relics: Sequence[str] = None, prices: Dict[str, float] = None,
+                     styles: Sequence[str] = STYLES, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                     seed=None, snapshot: IndexSnapshot = None) -> SimulationResult:
+    """
+    Simulate relic runs to estimate the distribution of returns per relic, refinement and style.
+
+    Every run draws one drop per squad member for each of the rewards it earns from the relic's chances.
+    Styles share these draws (solo looks at the first draw, 1b1 at the first four as four rewards, 2b2
+    at two pairs and so on), so differences between styles carry little sampling noise. Only which slot
+    wins each reward is counted, which keeps memory flat however many runs are asked for. A run's
+    rewards are independent and identically distributed, so the distribution of its return is that of
+    the sum of the rewards, computed exactly from the simulated reward distribution.
+
+    Args:
+        runs (int): Runs simulated per relic and refinement.
+        relics (Sequence[str], optional): Relics to simulate. Defaults to every relic.
+        prices (Dict[str, float], optional): Prices overriding the index prices.
+        styles (Sequence[str]): Styles to report, in any shorthand ``get_average_return`` accepts.
+        percentiles (Sequence[float]): Percentiles of the return to report, between 0 and 100.
+        seed: Seed or ``np.random.Generator`` for reproducible runs.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+
+    Returns:
+        SimulationResult: Simulated statistics alongside the analytic average returns.
+
+    Raises:
+        KeyError: If a relic is not in the index.
+        ValueError: If ``runs`` is not positive or a style is unknown.
+    """
+    if runs < 1:
+        raise ValueError(f"runs must be positive, got {runs}")
+
+    arrays = get_batch_arrays(snapshot)
+    rng = np.random.default_rng(seed)
+    style_ids = []
+    for style in styles:
+        try:
+            style_ids.append(_style_index(style))
+        except ValueError:
+            raise ValueError(f"Unknown style {style!r}") from None
+    members = STYLE_MEMBERS[style_ids]
+    rewards = STYLE_REWARDS[style_ids]
+
+    rows = list(range(len(arrays.relics))) if relics is None else [arrays.relic_ids[relic] for relic in relics]
+    part_prices = arrays.prices if prices is None else arrays.price_vector(prices, arrays.prices)
+    values = arrays.slot_values(part_prices)[rows]
+    chances = arrays.chances[rows]
+    analytic = _expected_returns(chances, values)[..., style_ids]
+
+    # Rank the slots of each relic by value, best first, and add a worthless rank for "no listed drop".
+    order = np.argsort(-values, axis=-1, kind='stable')
+    values = np.take_along_axis(values, order, axis=-1)
+    values = np.concatenate([values, np.zeros((len(rows), 1))], axis=-1)
+    chances = np.take_along_axis(chances, order[:, None, :], axis=-1)
+
+    # Cumulative chances per relic and refinement. Rows adding up to 1 cannot fall past their last slot
+    # through rounding.
+    cdf = np.cumsum(chances, axis=-1).reshape(-1, chances.shape[-1])
+    complete = np.abs(cdf[:, -1] - 1) < 1e-9
+    cdf[complete, -1] = np.inf
+
+    slots = values.shape[-1]
+    width = int((members * rewards).max())
+    counts = np.zeros((len(cdf), len(style_ids), slots), dtype=np.int64)
+    cells = np.arange(len(cdf))[:, None] * slots
+    step = max(1, CHUNK_DRAWS // (max(len(cdf), 1) * width))
+    for start in range(0, runs, step):
+        ranks = _rank_draws(rng, cdf, min(step, runs - start), width)
+        for i, (group, count) in enumerate(zip(members.tolist(), rewards.tolist())):
+            # Each reward is the best drop, the lowest rank, of its own group of members.
+            grouped = ranks[..., :group * count].reshape(ranks.shape[:2] + (count, group))
+            best = grouped[..., 0]
+            for member in range(1, group):
+                best = np.minimum(best, grouped[..., member])
+            counts[:, i] += np.bincount((best + cells[:, :, None]).ravel(),
+                                        minlength=len(cdf) * slots).reshape(len(cdf), slots)
+
+    probabilities = (counts / (runs * rewards[:, None])).reshape(len(rows), len(REFINEMENTS), len(style_ids), slots)
+    shape = (len(rows), len(REFINEMENTS), len(style_ids))
+    mean, variance = np.empty(shape), np.empty(shape)
+    quantiles = {q: np.empty(shape) for q in percentiles}
+    for i, style in enumerate(style_ids):
+        outcomes, outcome_probabilities = _run_distribution(values[:, None, :], probabilities[:, :, i], int(rewards[i]))
+        outcomes = outcomes / STYLE_REWARD_RUNS[style]
+        mean[..., i] = (outcome_probabilities * outcomes).sum(axis=-1)
+        variance[..., i] = np.maximum((outcome_probabilities * outcomes ** 2).sum(axis=-1) - mean[..., i] ** 2, 0)
+        for q in percentiles:
+            quantiles[q][..., i] = _percentile(outcomes, outcome_probabilities, q)
+
+    return SimulationResult([arrays.relics[row] for row in rows], [STYLES[i] for i in style_ids], runs, mean,
+                            variance, quantiles, analytic)
@@ -0,0 +1,144 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .batch import REFINEMENTS, STYLE_MEMBERS, STYLE_MULTIPLIERS, _refinement_index, _style_index, get_batch_arrays
+from .index import IndexSnapshot, get_snapshot, register_derived
+
+
+def run_chance(chance: float, style: str = '4b4') -> float:
+    """
+    Chance that a drop of per-member chance ``chance`` shows up in one run of a style.
+
+    Each reward is drawn by the style's members, and a run counts ``STYLE_MULTIPLIERS`` rewards (four solo
+    rewards in 1b1, four every three runs in 3b3), so a run holds ``members * multiplier`` draws.
+    """
+    style_id = _style_index(style)
+    return 1 - (1 - chance) ** float(STYLE_MEMBERS[style_id] * STYLE_MULTIPLIERS[style_id])
+
+
+def expected_runs(chance: float, style: str = '4b4') -> float:
+    """Expected runs of a style until a drop of per-member chance ``chance`` shows up, ``inf`` if it never can."""
+    per_run = run_chance(chance, style)
+    return 1 / per_run if per_run > 0 else math.inf
+
+
+class SourceIndex:
+    """
+    Inverse index from every part to the relics and refinements that drop it, built once per index snapshot.
+
+    A part's sources are ``(relic, refinement)`` pairs stored back to back, best chance first (ties keep
+    index order, then refinement order); part ``i`` owns ``offsets[i]:offsets[i + 1]``. The chance is
+    per squad member and adds up every rarity the relic drops the part at. Since a higher per-member
+    chance means fewer expected runs in every style, one order serves all styles.
+
+    Attributes:
+        relics (List[str]): Relic names, in index order.
+        part_ids (Dict[str, int]): Id of each part.
+        offsets (np.ndarray): Start of each part's sources, plus the total.
+        source_relics (np.ndarray): Relic row per source.
+        source_refinements (np.ndarray): Refinement index per source, into ``REFINEMENTS``.
+        source_chances (np.ndarray): Per-member chance per source.
+        vaulted (np.ndarray): Whether each relic is vaulted.
+    """
+
+    def __init__(self, snapshot: IndexSnapshot):
+        arrays = get_batch_arrays(snapshot)
+        self.relics = arrays.relics
+        self.part_ids = arrays.part_ids
+
+        relic_rows, slots = np.nonzero(arrays.slot_parts >= 0)
+        parts = arrays.slot_parts[relic_rows, slots]
+
+        # Sum the slots of packed parts, giving one chance per (part, relic) and refinement.
+        keys = parts * len(self.relics) + relic_rows
+        keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        chances = np.zeros((len(keys), len(REFINEMENTS)))
+        np.add.at(chances, inverse.ravel(), arrays.chances[relic_rows, :, slots])
+        parts, relic_rows = parts[first], relic_rows[first]
+
+        # One source per (part, relic, refinement), sorted by part, then best chance first.
+        parts = np.repeat(parts, len(REFINEMENTS))
+        relic_rows = np.repeat(relic_rows, len(REFINEMENTS))
+        refinements = np.tile(np.arange(len(REFINEMENTS)), len(keys))
+        chances = chances.ravel()
+        order = np.lexsort((refinements, relic_rows, -chances, parts))
+
+        self.source_relics = relic_rows[order]
+        self.source_refinements = refinements[order]
+        self.source_chances = chances[order]
+        self.offsets = np.searchsorted(parts[order], np.arange(len(arrays.parts) + 1))
+
+        non_vaulted = set(snapshot.nv_relics)
+        self.vaulted = np.array([relic not in non_vaulted for relic in self.relics], dtype=bool)
+
+    def sources(self, part: str, style: str = '4b4', refinement: str = None,
+                vaulted: bool = None) -> List[Dict]:
+        """
+        Return every source of a part, fewest expected runs first.
+
+        Each source is a dict with the relic, refinement, per-member ``chance``, the ``run_chance`` of
+        seeing the part in one run of the style (see ``run_chance``; every member can pick it in a
+        radshare), ``expected_runs`` and whether the relic is ``vaulted``.
+
+        Args:
+            part (str): Part name. Parts no relic drops have no sources.
+            style (str): Style, in any shorthand ``get_average_return`` accepts.
+            refinement (str, optional): Keep only this refinement.
+            vaulted (bool, optional): Keep only vaulted (True) or only unvaulted (False) relics.
+        """
+        return self._sources(part, style, refinement, vaulted, None)
+
+    def best(self, part: str, style: str = '4b4', refinement: str = None, vaulted: bool = None) -> Optional[Dict]:
+        """Return the source of a part with the fewest expected runs, or None; see ``sources``."""
+        sources = self._sources(part, style, refinement, vaulted, 1)
+        return sources[0] if sources else None
+
+    def _sources(self, part, style, refinement, vaulted, limit) -> List[Dict]:
+        part_id = self.part_ids.get(part)
+        if part_id is None:
+            return []
+
+        window = slice(self.offsets[part_id], self.offsets[part_id + 1])
+        rows = self.source_relics[window]
+        refinements = self.source_refinements[window]
+        chances = self.source_chances[window]
+
+        mask = chances > 0
+        if refinement is not None:
+            mask &= refinements == _refinement_index(refinement)
+        if vaulted is not None:
+            mask &= self.vaulted[rows] == vaulted
+
+        sources = []
+        for row, refinement_id, chance in zip(rows[mask][:limit].tolist(), refinements[mask][:limit].tolist(),
+                                              chances[mask][:limit].tolist()):
+            sources.append({'relic': self.relics[row],
+                            'refinement': REFINEMENTS[refinement_id],
+                            'chance': chance,
+                            'run_chance': run_chance(chance, style),
+                            'expected_runs': expected_runs(chance, style),
+                            'vaulted': bool(self.vaulted[row])})
+
+        return sources
+
+
+@register_derived('sources')
+def _build_source_index(snapshot: IndexSnapshot) -> SourceIndex:
+    return SourceIndex(snapshot)
+
+
+def get_source_index(snapshot: IndexSnapshot = None) -> SourceIndex:
+    """Return the part source index of a snapshot, the active one by default."""
+    return (snapshot or get_snapshot()).derived('sources')
+
+
+def get_part_sources(part: str, style: str = '4b4', refinement: str = None, vaulted: bool = None) -> List[Dict]:
+    """Return every relic and refinement dropping a part, fewest expected runs first; see ``SourceIndex.sources``."""
+    return get_source_index().sources(part, style, refinement, vaulted)
+
+
+def get_best_source(part: str, style: str = '4b4', refinement: str = None, vaulted: bool = None) -> Optional[Dict]:
+    """Return the relic and refinement to farm a part with, or None if no relic drops it."""
+    return get_source_index().best(part, style, refinement, vaulted)
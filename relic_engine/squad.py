@@ -0,0 +1,140 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .batch import REFINEMENTS, _refinement_index, get_batch_arrays
+from .index import IndexSnapshot, get_snapshot
+
+Member = Tuple[str, str]
+
+
+def _refinement_ids(refinements: Sequence[str]) -> List[int]:
+    try:
+        return [_refinement_index(refinement) for refinement in refinements]
+    except (ValueError, IndexError, AttributeError):
+        raise ValueError(f"Unknown refinement in {list(refinements)!r}") from None
+
+
+def _best_drop_value(values: np.ndarray, chances: np.ndarray) -> np.ndarray:
+    """
+    Expected value of the best drop among squad members, exactly.
+
+    The chance that slot k (in descending value order) is the best drop is
+    ``prod(left_m) - prod(left_m - p_mk)`` over members m, where ``left_m`` is member m's chance mass
+    at slot k and below.
+
+    Args:
+        values: Slot values, shape (..., slots).
+        chances: Each member's chance per slot, shape (..., members, slots). A member that cannot drop a
+            slot has chance 0 for it.
+    """
+    order = np.argsort(-values, axis=-1, kind='stable')
+    values = np.take_along_axis(values, order, axis=-1)
+    chances = np.take_along_axis(chances, order[..., None, :], axis=-1)
+
+    rest = 1 - np.cumsum(chances, axis=-1)
+    best = np.prod(rest + chances, axis=-2) - np.prod(rest, axis=-2)
+
+    return (best * values).sum(axis=-1)
+
+
+def get_squad_returns(refinements: Sequence[str], prices: Dict[str, float] = None, snapshot: IndexSnapshot = None,
+                      valuation: str = 'platinum', exchange_rate: float = None) -> np.ndarray:
+    """
+    Expected value of every relic for a squad whose members crack it at different refinements.
+
+    Every member opens the same relic and everyone takes the best of the drops, as in 4b4. A squad of
+    four Radiant members gives the 4b4 Radiant average return; ``['Radiant', 'Intact', 'Intact',
+    'Intact']`` gives the one-Radiant squad.
+
+    Args:
+        refinements (Sequence[str]): Refinement of each member, in any shorthand ``get_average_return``
+            accepts.
+        prices (Dict[str, float], optional): Prices overriding the index prices.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+        valuation (str): Valuation of the drops, as in ``get_average_returns``.
+        exchange_rate (float, optional): Platinum per ducat, for the ``'blend'`` valuation.
+
+    Returns:
+        np.ndarray: Expected value per relic, in the order of ``get_batch_arrays().relics``, unrounded.
+
+    Raises:
+        ValueError: If a refinement or the valuation is unknown.
+    """
+    arrays = get_batch_arrays(snapshot)
+    counts = np.bincount(_refinement_ids(refinements), minlength=len(REFINEMENTS))
+    values = arrays.slot_values(arrays.part_values(prices, valuation, exchange_rate))
+
+    order = np.argsort(-values, axis=-1, kind='stable')
+    values = np.take_along_axis(values, order, axis=-1)
+    chances = np.take_along_axis(arrays.chances, order[:, None, :], axis=-1)
+
+    # Members with the same refinement share a factor, so the product over members is a product of powers.
+    rest = 1 - np.cumsum(chances, axis=-1)
+    left = rest + chances
+    exponents = counts[None, :, None]
+    best = np.prod(left ** exponents, axis=1) - np.prod(rest ** exponents, axis=1)
+
+    return (best * values).sum(axis=-1)
+
+
+def get_mixed_squad_returns(squads: Sequence[Sequence[Member]], prices: Dict[str, float] = None,
+                            snapshot: IndexSnapshot = None, valuation: str = 'platinum',
+                            exchange_rate: float = None) -> np.ndarray:
+    """
+    Expected value of many squads whose members bring different relics and refinements.
+
+    Each member draws from their own relic at their own refinement, and everyone takes the best of the
+    drops. All squads are evaluated in one vectorised pass; squads may have different sizes.
+
+    Args:
+        squads (Sequence[Sequence[Tuple[str, str]]]): Per squad, a ``(relic, refinement)`` pair per member.
+        prices (Dict[str, float], optional): Prices overriding the index prices.
+        snapshot (IndexSnapshot, optional): Snapshot to use instead of the active one.
+        valuation (str): Valuation of the drops, as in ``get_average_returns``.
+        exchange_rate (float, optional): Platinum per ducat, for the ``'blend'`` valuation.
+
+    Returns:
+        np.ndarray: Expected value per squad, unrounded.
+
+    Raises:
+        KeyError: If a relic is not in the index.
+        ValueError: If a refinement or the valuation is unknown.
+    """
+    arrays = get_batch_arrays(snapshot)
+    size = max((len(squad) for squad in squads), default=0)
+    if not squads or size == 0:
+        return np.zeros(len(squads))
+
+    # Pad smaller squads with members that never drop anything.
+    rows = np.zeros((len(squads), size), dtype=np.intp)
+    refinement_ids = np.zeros((len(squads), size), dtype=np.intp)
+    present = np.zeros((len(squads), size), dtype=bool)
+    for i, squad in enumerate(squads):
+        relics = [relic for relic, _ in squad]
+        rows[i, :len(squad)] = [arrays.relic_ids[relic] for relic in relics]
+        refinement_ids[i, :len(squad)] = _refinement_ids([refinement for _, refinement in squad])
+        present[i, :len(squad)] = True
+
+    slots = arrays.slot_parts.shape[1]
+    part_values = arrays.part_values(prices, valuation, exchange_rate)
+    values = arrays.slot_values(part_values)[rows].reshape(len(squads), size * slots)
+    member_chances = arrays.chances[rows, refinement_ids] * present[..., None]
+
+    # Every member's slots form their own block of the squad's slots; other members' blocks get chance 0.
+    chances = np.zeros((len(squads), size, size, slots))
+    members = np.arange(size)
+    chances[:, members, members, :] = member_chances
+
+    return _best_drop_value(values, chances.reshape(len(squads), size, size * slots))
+
+
+def get_squad_return(members: Sequence[Member], custom_prices: Dict[str, float] = None) -> float:
+    """
+    Expected value of one squad, rounded like ``get_average_return``.
+
+    Args:
+        members (Sequence[Tuple[str, str]]): A ``(relic, refinement)`` pair per member.
+        custom_prices (Dict[str, float], optional): Prices overriding the index prices.
+    """
+    return round(float(get_mixed_squad_returns([members], custom_prices, get_snapshot())[0]), 3)
@@ -12,7 +12,7 @@ setup(
         description=DESCRIPTION,
         long_description=LONG_DESCRIPTION,
         packages=find_packages(),
-        install_requires=['lxml','requests','bs4'],
+        install_requires=['lxml','requests','bs4','numpy'],
         keywords=['warframe','relics','prime'],
         classifiers= [
             "Programming Language :: Python :: 3",
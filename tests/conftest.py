@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.insert(0, ROOT)
+
+import relic_engine  # noqa: E402
+
+
+@pytest.fixture
+def fixture_index():
+    """Path of the frozen index the benchmarks use."""
+    return os.path.join(FIXTURES, 'index.json.gz')
+
+
+@pytest.fixture
+def engine(fixture_index):
+    """``relic_engine`` with the frozen index loaded."""
+    relic_engine.load_index(fixture_index)
+    return relic_engine
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+from relic_engine import aio
+
+
+class Blocking:
+    """Blocking call that records its calls and waits until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def __call__(self, value):
+        self.calls.append((value, threading.get_ident()))
+        self.release.wait(5)
+        return [value]
+
+
+async def _until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError('condition not reached')
+
+
+def test_concurrent_identical_calls_share_one_offloaded_call():
+    func = Blocking()
+
+    async def main():
+        waiters = [asyncio.ensure_future(aio.run(func, 1)) for _ in range(5)]
+        other = asyncio.ensure_future(aio.run(func, 2))
+        await _until(lambda: func.calls)
+        # Give a duplicate that slipped through the time to start as well before releasing.
+        await asyncio.sleep(0.05)
+        func.release.set()
+        return await asyncio.gather(*waiters), await other
+
+    results, other = asyncio.run(main())
+
+    assert sorted(value for value, _ in func.calls) == [1, 2]
+    assert threading.get_ident() not in {thread for _, thread in func.calls}
+    assert other == [2]
+    # Every waiter gets the very same result object.
+    assert all(result is results[0] for result in results) and results[0] == [1]
+
+
+def test_cancelling_one_waiter_keeps_the_shared_call():
+    func = Blocking()
+
+    async def main():
+        first = asyncio.ensure_future(aio.run(func, 1))
+        second = asyncio.ensure_future(aio.run(func, 1))
+        await _until(lambda: func.calls)
+        first.cancel()
+        func.release.set()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ([1], True)
+    assert len(func.calls) == 1
+
+
+def test_calls_after_completion_run_again(engine):
+    async def main():
+        first = await aio.get_top_relics('Radiant', '4b4', k=5)
+        second = await aio.get_top_relics('Radiant', '4b4', k=5)
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert first == second == engine.get_top_relics('Radiant', '4b4', k=5)
+    assert not any(aio._inflight.values())
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from relic_engine import REFINEMENTS, STYLES
+from relic_engine.batch import TOLERANCE
+
+
+def _assert_matches_scalar(engine, table, custom_prices=None):
+    snapshot = engine.get_snapshot()
+    for row, relic in enumerate(table.relics):
+        for i, refinement in enumerate(REFINEMENTS):
+            for j, style in enumerate(STYLES):
+                value = table.values[row, i, j]
+                expected = engine._get_average_return(snapshot, relic, refinement, style, custom_prices)
+                # get_average_return rounds to 3 decimals.
+                assert abs(value - expected) <= 5e-4 + TOLERANCE * abs(value), (relic, refinement, style)
+
+
+def test_average_returns_match_get_average_return(engine):
+    table = engine.get_average_returns()
+
+    assert table.relics == engine.get_relic_list()
+    assert table.values.shape == (len(table.relics), len(REFINEMENTS), len(STYLES))
+    _assert_matches_scalar(engine, table)
+
+
+def test_average_returns_with_prices_match_get_average_return(engine):
+    prices = {part: price * 1.5 + 1 for part, price in engine.get_price_dict().items()}
+    prices.update((part, 7) for part in engine.get_batch_arrays().parts if part not in prices)
+
+    _assert_matches_scalar(engine, engine.get_average_returns(prices=prices), prices)
+
+
+def test_return_table_get_accepts_shorthands(engine):
+    table = engine.get_average_returns()
+    relic = table.relics[0]
+
+    assert table.get(relic, 'r', '4') == table.values[0, 3, 4]
+    assert round(table.get(relic, 'Intact', 'solo'), 3) == engine.get_average_return(relic, 'Intact', 'solo')
+    assert table.to_dict()[relic]['Radiant']['4b4'] == pytest.approx(table.values[0, 3, 4], abs=5e-4)
+
+
+def test_default_scenario_matches_average_returns(engine):
+    returns = engine.get_scenario_returns(engine.get_scenario_matrix([{}]))
+
+    assert returns.shape == (1,) + engine.get_average_returns().values.shape
+    np.testing.assert_allclose(returns[0], engine.get_average_returns().values, rtol=TOLERANCE)
+
+
+def test_scenarios_match_average_returns_with_their_prices(engine):
+    arrays = engine.get_batch_arrays()
+    price_maps = [{}, {arrays.parts[0]: 500}, {part: 1 for part in arrays.parts[:50]}]
+    returns = engine.get_scenario_returns(engine.get_scenario_matrix(price_maps), chunk_size=2)
+
+    for scenario, prices in zip(returns, price_maps):
+        np.testing.assert_allclose(scenario, engine.get_average_returns(prices=prices).values, rtol=TOLERANCE)
+
+    # Named columns in any order, with unknown parts ignored and unlisted parts at their index price.
+    named = engine.get_scenario_returns(np.array([[1.0, 99.0]]), parts=['Unknown Part', arrays.parts[0]])
+    np.testing.assert_allclose(named[0], engine.get_average_returns(prices={arrays.parts[0]: 99}).values,
+                               rtol=TOLERANCE)
@@ -0,0 +1,62 @@
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+
+from relic_engine import REFINEMENTS
+from relic_engine.binary import BinaryIndex, encode_binary_index
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEXES = [os.path.join(ROOT, 'benchmarks', 'fixtures', 'index.json.gz'), os.path.join(ROOT, 'index.json.gz')]
+
+
+@pytest.fixture(params=INDEXES, ids=['fixture', 'committed'])
+def index_files(request, tmp_path):
+    """The JSON index, its binary form written as ``build_index.py`` does, and the decoded JSON."""
+    with open(request.param, 'rb') as fp:
+        raw = fp.read()
+    index = json.loads(gzip.decompress(raw))
+
+    json_path, binary_path = tmp_path / 'index.json.gz', tmp_path / 'index.bin'
+    json_path.write_bytes(raw)
+    binary_path.write_bytes(encode_binary_index(index, hashlib.sha1(raw).hexdigest()))
+
+    return index, str(json_path), str(binary_path)
+
+
+def test_binary_matches_json(index_files):
+    index, _, binary_path = index_files
+    binary = BinaryIndex.open(binary_path)
+
+    assert binary.to_dict() == index
+    for section in ('relics', 'prices', 'ducats', 'required_count', 'types'):
+        assert list(binary[section]) == list(index[section]), section
+
+    for relic, drops in index['relics'].items():
+        assert binary.relic_drops(relic) == drops, relic
+        assert binary.relic_chances(relic) == index.get('chances', {}).get(relic), relic
+    for item in list(index['prices']) + list(index['ducats']) + ['Not An Item']:
+        assert binary.price(item) == index['prices'].get(item, 0), item
+        assert binary.ducats(item) == index['ducats'].get(item, 0), item
+        assert binary.required_count(item) == index['required_count'].get(item, 1), item
+        assert binary.item_type(item) == index['types'].get(item), item
+
+
+def _loaded(engine, path):
+    engine.load_index(path)
+    relic_drops = {(relic, refinement): engine.get_relic_drops(relic, refinement)
+                   for relic in engine.get_relic_list() for refinement in REFINEMENTS}
+
+    return engine.get_snapshot().version, engine.get_relic_dict(), relic_drops, engine.build_json_files()
+
+
+def test_loaders_agree(engine, index_files):
+    _, json_path, binary_path = index_files
+    from_json, from_binary = _loaded(engine, json_path), _loaded(engine, binary_path)
+
+    assert from_binary[0] == from_json[0]
+    assert from_binary[1] == from_json[1]
+    assert from_binary[2] == from_json[2]
+    assert json.dumps(from_binary[3]) == json.dumps(from_json[3])
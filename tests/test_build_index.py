@@ -0,0 +1,71 @@
+import gzip
+import json
+import os
+import shutil
+import sys
+
+import build_index
+from conftest import FIXTURES
+
+sys.path.insert(0, FIXTURES)
+from make_fixtures import make_droptables  # noqa: E402
+
+STANDARD = {'A Prime Blueprint': 3, 'B Prime Barrel': 2, 'C Prime Stock': 2,
+            'D Prime Receiver': 1, 'E Prime Handle': 1, 'Forma Blueprint': 1}
+EQUAL = {f"{name} Prime Blueprint": 1 for name in 'ABCDEFGH'}
+
+
+def _odds(drops, percents):
+    return {refinement: dict(zip(drops, percents)) for refinement in build_index.REFINEMENTS}
+
+
+def test_chances_are_kept_only_for_relics_off_their_tiers():
+    index = {'relics': {'Axi A1': STANDARD, 'Axi A2': STANDARD, 'Requiem I': EQUAL},
+             'non_vaulted': ['Axi A1'],
+             'chances': {'Axi A2': _odds(STANDARD, [5.0, 10.0, 10.0, 25.0, 25.0, 25.0]),
+                         'Requiem I': _odds(EQUAL, [12.5] * 8)}}
+
+    relics, _, chances = build_index.build_relic_tables(make_droptables(index))
+
+    assert relics == index['relics']
+    # Axi A1 has the standard odds, and eight equal drops are what eight tier 1 drops resolve to as well.
+    assert chances == {'Axi A2': index['chances']['Axi A2']}
+
+
+def _rewrite_gzip(path, edit):
+    with gzip.open(path, 'rb') as fp:
+        data = fp.read()
+    with gzip.open(path, 'wb') as fp:
+        fp.write(edit(data))
+
+
+def test_unchanged_sources_skip_their_stage(tmp_path):
+    sources = tmp_path / 'sources'
+    shutil.copytree(os.path.join(FIXTURES, 'sources'), sources)
+
+    def build():
+        fetcher = build_index.SourceFetcher(fixtures=str(sources), workers=1)
+        index, log = build_index.build_files_incremental(build_index.BuildState(str(tmp_path / 'state')), fetcher)
+        return index, {stage: status for stage, status, _ in log}
+
+    index, statuses = build()
+    assert statuses == {'relics': 'ran', 'prices': 'ran', 'manifests': 'ran'}
+    assert build() == (index, {'relics': 'skipped', 'prices': 'skipped', 'manifests': 'skipped'})
+
+    history = sources / 'relics.run' / 'history' / 'price_history_2024-08-21.json.gz'
+    item = next(iter(index['prices']))
+
+    def reprice(data):
+        prices = json.loads(data)
+        prices[item][0]['avg_price'] += 1
+        return json.dumps(prices).encode('utf-8')
+
+    _rewrite_gzip(history, reprice)
+    repriced, statuses = build()
+    assert statuses == {'relics': 'skipped', 'prices': 'ran', 'manifests': 'skipped'}
+    assert repriced['prices'][item] == index['prices'][item] + 1
+
+    _rewrite_gzip(sources / 'www.warframe.com' / 'droptables.gz', lambda data: data + b'<!-- edited -->')
+    rebuilt, statuses = build()
+    assert statuses == {'relics': 'ran', 'prices': 'skipped', 'manifests': 'skipped'}
+    assert rebuilt == repriced
@@ -0,0 +1,37 @@
+from relic_engine import ResultCache
+
+
+def test_version_change_drops_entries():
+    cache = ResultCache()
+    cache.put('key', 'v1', 1)
+    assert cache.get('key', 'v1') == (True, 1)
+
+    assert cache.get('key', 'v2') == (False, None)
+    assert cache.get('key', 'v1') == (False, None)
+    assert cache.info().invalidations == 1
+
+
+def test_calls_on_an_older_version_do_not_wipe_the_cache():
+    published = ['v1']
+    cache = ResultCache(published=lambda: published[0])
+    cache.put('key', 'v1', 1)
+
+    published[0] = 'v2'
+    cache.put('key', 'v2', 2)
+    for _ in range(3):
+        # A call still running on the old snapshot misses and stores nothing.
+        assert cache.get('key', 'v1') == (False, None)
+        cache.put('key', 'v1', 1)
+        assert cache.get('key', 'v2') == (True, 2)
+
+    assert cache.info().invalidations == 1
+
+
+def test_carry_over_keeps_accepted_entries():
+    cache = ResultCache()
+    cache.put('kept', 'v1', 1)
+    cache.put('dropped', 'v1', 2)
+
+    assert cache.carry_over('v1', 'v2', lambda key: key == 'kept') == 1
+    assert cache.get('kept', 'v2') == (True, 1)
+    assert cache.get('dropped', 'v2') == (False, None)
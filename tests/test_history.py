@@ -0,0 +1,62 @@
+import warnings
+
+import numpy as np
+
+from relic_engine import PriceHistory
+
+
+def _records(rng, parts):
+    return {part: {'avg_price': float(rng.integers(1, 100)), 'median': float(rng.integers(1, 100)),
+                   'volume': int(rng.integers(0, 50))}
+            for part in parts if rng.random() < 0.8}
+
+
+def _append_days(history, rng, days, first_day=0):
+    parts = ['A Prime Blueprint', 'B Prime Barrel']
+    for day in range(first_day, first_day + days):
+        if day % 5 == 0:
+            parts.append(f"P{day} Prime Blueprint")
+        history.append(np.datetime64(day + 19000, 'D'), _records(rng, parts))
+        if day % 7 == 3:
+            # A rebuild on the same day replaces the row instead of adding one.
+            history.append(np.datetime64(day + 19000, 'D'), _records(rng, parts))
+
+
+def _check_aggregates(history):
+    columns = history.columns
+    priced = ~np.isnan(columns['average'])
+    average = np.where(priced, columns['average'], 0.0)
+    expected = np.vstack([np.zeros(len(history.parts)), np.cumsum(average, axis=0)])
+    np.testing.assert_allclose(history.sums['average'], expected)
+    np.testing.assert_allclose(history.sums['count'][-1], priced.sum(axis=0))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for window, medians in history.medians.items():
+            for row, day in enumerate(history.days):
+                start = np.searchsorted(history.days, day - window + 1)
+                np.testing.assert_allclose(medians[row], np.nanmedian(columns['median'][start:row + 1], axis=0))
+
+
+def test_appended_aggregates_match_a_full_recomputation():
+    history = PriceHistory()
+    _append_days(history, np.random.default_rng(0), 40)
+
+    assert len(history) == 40
+    assert history.columns['average'].shape == (40, len(history.parts))
+    _check_aggregates(history)
+
+
+def test_saved_history_keeps_growing_after_load(tmp_path):
+    rng = np.random.default_rng(1)
+    history = PriceHistory()
+    _append_days(history, rng, 12)
+    history.save(tmp_path / 'history.npz')
+
+    loaded = PriceHistory.load(tmp_path / 'history.npz')
+    assert loaded.dates == history.dates
+    assert loaded.prices('mean_7') == history.prices('mean_7')
+
+    _append_days(loaded, rng, 20, first_day=12)
+    assert len(loaded) == 32
+    _check_aggregates(loaded)
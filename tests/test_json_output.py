@@ -0,0 +1,37 @@
+import io
+import json
+
+import pytest
+
+from relic_engine import _dump_json_items
+
+
+@pytest.mark.parametrize('indent', [None, 0, 4, '\t'])
+def test_write_json_files_matches_json_dump(engine, indent):
+    relic_data, set_data = engine.build_json_files()
+    relic_file, set_file = io.StringIO(), io.StringIO()
+
+    engine.write_json_files(relic_file, set_file, indent=indent)
+
+    assert relic_file.getvalue() == json.dumps(relic_data, indent=indent)
+    assert set_file.getvalue() == json.dumps(set_data, indent=indent)
+
+
+@pytest.mark.parametrize('indent', [None, 0, 4, '\t'])
+def test_dump_json_items_empty(indent):
+    fp = io.StringIO()
+    _dump_json_items(iter(()), fp, indent)
+
+    assert fp.getvalue() == json.dumps({}, indent=indent)
+
+
+def test_drops_keep_their_first_tier(engine, fixture_index):
+    engine.load_index({'relics': {'Axi Z1': {'Known Prime Part': 21, 'Odd Prime Part': 4}},
+                       'non_vaulted': [], 'prices': {}, 'ducats': {}, 'required_count': {}, 'types': {}})
+    try:
+        drops = engine.build_json_files()[0]['Axi Z1']['Intact']['drops']
+    finally:
+        engine.load_index(fixture_index)
+
+    assert (drops['Known Prime Part']['tier'], drops['Known Prime Part']['tier_id']) == ('Uncommon', 1)
+    assert (drops['Odd Prime Part']['tier'], drops['Odd Prime Part']['tier_id']) == ('N/A', 3)
@@ -0,0 +1,67 @@
+import lzma
+import random
+
+import pytest
+
+from build_index import decompress_lzma_stream
+
+GARBAGE_SIZES = (0, 1, 5000)
+
+# A stream without an end marker is cut where the decoder rejects a byte, which can be this many
+# bytes after the stream really ends.
+LOOKAHEAD = 3
+
+
+def _text():
+    rng = random.Random(0)
+    return '\r\n'.join(f"ExportItem{i}_en.json!00_{rng.getrandbits(64):016x}" for i in range(2000)).encode()
+
+
+def _garbage(size):
+    rng = random.Random(size)
+    return bytes(rng.getrandbits(8) for _ in range(size))
+
+
+def _chunks(data, size=1 << 14):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', GARBAGE_SIZES)
+@pytest.mark.parametrize('fmt', [lzma.FORMAT_XZ, lzma.FORMAT_ALONE])
+def test_stream_with_end_marker(fmt, size):
+    text = _text()
+    output, ignored = decompress_lzma_stream(_chunks(lzma.compress(text, format=fmt) + _garbage(size)))
+
+    assert output == text
+    assert ignored == size
+
+
+def test_concatenated_streams():
+    text = _text()
+    payload = lzma.compress(text[:1000]) + lzma.compress(text[1000:]) + _garbage(100)
+
+    assert decompress_lzma_stream(_chunks(payload, 1000)) == (text, 100)
+
+
+def test_unfinished_stream_after_complete_one():
+    text = _text()
+    unfinished = lzma.compress(b'more')[:20]
+
+    assert decompress_lzma_stream([lzma.compress(text) + unfinished]) == (text, len(unfinished))
+
+
+@pytest.mark.parametrize('size', GARBAGE_SIZES)
+def test_stream_without_end_marker(size):
+    text = _text()
+    # Drop the end marker and pad with a byte the decoder accepts, like the published manifest index.
+    payload = lzma.compress(text, format=lzma.FORMAT_ALONE)[:-5] + b'\x00'
+
+    output, ignored = decompress_lzma_stream(_chunks(payload + _garbage(size)))
+
+    assert output == text
+    assert max(0, size - LOOKAHEAD) <= ignored <= size
+
+
+def test_invalid_payload():
+    with pytest.raises(lzma.LZMAError):
+        decompress_lzma_stream([_garbage(100)])
@@ -0,0 +1,23 @@
+import gzip
+import json
+from collections.abc import Mapping
+
+
+def test_get_relic_dict_is_a_plain_dict(engine, fixture_index):
+    with gzip.open(fixture_index, 'rb') as fp:
+        relics = json.load(fp)['relics']
+
+    relic_dict = engine.get_relic_dict()
+    assert type(relic_dict) is dict
+    assert json.loads(json.dumps(relic_dict)) == relics
+    assert engine.get_relic_dict() is relic_dict
+
+    copy = relic_dict.copy()
+    copy['Axi Z9'] = {}
+    assert 'Axi Z9' not in engine.get_relic_dict()
+
+
+def test_get_relic_view_reads_the_model(engine):
+    view = engine.get_relic_view()
+    assert isinstance(view, Mapping) and not isinstance(view, dict)
+    assert dict(view.items()) == engine.get_relic_dict()
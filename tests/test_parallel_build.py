@@ -0,0 +1,29 @@
+import threading
+import warnings
+
+import pytest
+
+
+@pytest.fixture(params=['single thread', 'other threads running'])
+def threads(request):
+    """Run the test with only the main thread, or with another thread alive so workers are not forked."""
+    if request.param == 'single thread':
+        yield
+        return
+
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+def test_parallel_build_matches_serial(engine, threads):
+    serial = engine.build_json_files()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        parallel = engine.build_json_files(workers=2)
+
+    assert list(parallel[0]) == list(serial[0])
+    assert parallel == serial
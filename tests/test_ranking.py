@@ -0,0 +1,58 @@
+import pytest
+
+from relic_engine import RelicRanking
+from relic_engine.batch import REFINEMENTS, STYLES
+from relic_engine.index import IndexSnapshot
+
+DROPS = {'A Prime Blueprint': 3, 'B Prime Barrel': 2, 'C Prime Stock': 2,
+         'D Prime Receiver': 1, 'E Prime Handle': 1, 'Forma Blueprint': 1}
+RICH = dict(DROPS, **{'F Prime Chassis': 1})
+del RICH['Forma Blueprint']
+
+
+def _ranking():
+    # Three relics with the same drops tie; Neo D1 swaps its Forma for a part and ranks first.
+    index = {'relics': {'Lith C1': DROPS, 'Axi B1': DROPS, 'Neo D1': RICH, 'Lith A1': DROPS},
+             'non_vaulted': ['Axi B1', 'Neo D1'],
+             'prices': {part: 10 * (i + 1) for i, part in enumerate(sorted(RICH))},
+             'ducats': {part: 15 for part in RICH},
+             'required_count': {part: 1 for part in RICH},
+             'types': {}}
+    return RelicRanking(IndexSnapshot(index))
+
+
+@pytest.mark.parametrize('style', STYLES)
+@pytest.mark.parametrize('refinement', REFINEMENTS)
+def test_ties_keep_index_order(refinement, style):
+    assert [relic for relic, _ in _ranking().top(refinement, style)] == ['Neo D1', 'Lith C1', 'Axi B1', 'Lith A1']
+
+
+def test_filters_keep_the_order():
+    ranking = _ranking()
+
+    assert [relic for relic, _ in ranking.top(era='lith')] == ['Lith C1', 'Lith A1']
+    assert [relic for relic, _ in ranking.top(era=['Axi', 'NEO'])] == ['Neo D1', 'Axi B1']
+    assert [relic for relic, _ in ranking.top(vaulted=True)] == ['Lith C1', 'Lith A1']
+    assert [relic for relic, _ in ranking.top(era='Lith', vaulted=False)] == []
+    assert ranking.count(era='Lith') == 2
+    assert ranking.count(vaulted=False) == 2
+
+
+def test_ranking_matches_average_returns(engine):
+    relics = engine.get_relic_list()
+    ranked = engine.get_top_relics('Radiant', '4b4', k=len(relics))
+
+    assert sorted(relic for relic, _ in ranked) == sorted(relics)
+    assert [value for _, value in ranked] == sorted((value for _, value in ranked), reverse=True)
+    for relic, value in ranked:
+        # Both round to 3 decimals, which can differ by 0.001 on a rounding boundary; see TOLERANCE.
+        assert value == pytest.approx(engine.get_average_return(relic, 'Radiant', '4b4'), abs=1.001e-3)
+
+
+def test_pages_split_the_full_ranking(engine):
+    full = engine.get_top_relics('Intact', '1b1', k=len(engine.get_relic_list()), era='Axi')
+    pages = [engine.get_top_relics('Intact', '1b1', k=7, offset=offset, era='Axi') for offset in range(0, len(full), 7)]
+
+    assert [entry for page in pages for entry in page] == full
+    assert engine.get_ranking().count(era='Axi') == len(full)
+    assert engine.get_top_relics('Intact', '1b1', k=7, offset=len(full), era='Axi') == []
@@ -0,0 +1,43 @@
+import gzip
+import json
+
+import relic_engine
+from relic_engine import index as index_module
+
+
+def test_refresh_keeps_returns_of_unchanged_relics(engine, fixture_index, monkeypatch):
+    with gzip.open(fixture_index, 'rb') as fp:
+        new_index = json.load(fp)
+    relic = engine.get_relic_list()[0]
+    part = next(iter(new_index['relics'][relic]))
+    new_index['prices'][part] += 10
+    monkeypatch.setattr(index_module, 'fetch_index', lambda force=False: json.dumps(new_index).encode('utf-8'))
+
+    old_snapshot = engine.get_snapshot()
+    relics = engine.get_relic_list()
+    before = {name: engine.get_average_return(name, 'Radiant', '4b4') for name in relics}
+
+    assert engine.refresh_index()
+    changes = engine.diff_indexes(old_snapshot, engine.get_snapshot())
+    assert relic in changes.affected_relics
+    assert len(changes.affected_relics) < len(relics)
+
+    cache = relic_engine.average_return_cache
+    for name in relics:
+        hits = cache.info().hits
+        assert engine.get_average_return(name, 'Radiant', '4b4') == (
+            engine._get_average_return(engine.get_snapshot(), name, 'Radiant', '4b4'))
+        assert cache.info().hits == hits + (name not in changes.affected_relics)
+
+    assert engine.get_average_return(relic, 'Radiant', '4b4') != before[relic]
+
+
+def test_calls_on_the_old_snapshot_do_not_undo_the_carry_over():
+    cache = relic_engine.ResultCache(published=lambda: 'v1')
+    cache.put('kept', 'v1', 1)
+    cache.carry_over('v1', 'v2', lambda key: True)
+
+    # Published version is still v1 until the swap, yet a call on it must not wipe the carried entries.
+    assert cache.get('kept', 'v1') == (False, None)
+    cache.put('other', 'v1', 2)
+    assert cache.get('kept', 'v2') == (True, 1)
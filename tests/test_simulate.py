@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+# Simulated means must fall within this many standard errors of the closed form in every cell.
+MAX_DEVIATION = 5
+
+
+def test_simulated_means_match_average_returns(engine):
+    relics = engine.get_relic_list()[:40]
+    result = engine.simulate_returns(runs=4000, relics=relics, seed=0)
+    table = engine.get_average_returns()
+    rows = [table.relics.index(relic) for relic in relics]
+
+    np.testing.assert_allclose(result.analytic, table.values[rows], rtol=1e-12)
+    assert np.abs(result.deviation()).max() < MAX_DEVIATION
+    assert result.mean.shape == (len(relics), len(engine.REFINEMENTS), len(engine.STYLES))
+
+
+def test_simulation_is_reproducible_and_ordered(engine):
+    relic = engine.get_relic_list()[0]
+    first = engine.simulate_returns(runs=500, relics=[relic], styles=['solo', '1b1'], seed=3)
+    second = engine.simulate_returns(runs=500, relics=[relic], styles=['solo', '1b1'], seed=3)
+
+    assert first.get(relic, 'Radiant', '1b1') == second.get(relic, 'Radiant', '1b1')
+    stats = first.get(relic, 'Intact', 'solo')
+    assert stats['p5'] <= stats['p25'] <= stats['p50'] <= stats['p75'] <= stats['p95']
+    # 1b1 sums four independent rewards: four times the mean and variance of a solo run.
+    assert first.get(relic, 'Intact', '1b1')['mean'] == pytest.approx(4 * stats['mean'], rel=0.1)
+    assert first.get(relic, 'Intact', '1b1')['std'] ** 2 == pytest.approx(4 * stats['std'] ** 2, rel=0.2)
+
+
+def test_unknown_style_is_rejected(engine):
+    with pytest.raises(ValueError):
+        engine.simulate_returns(runs=10, styles=['9b9'])
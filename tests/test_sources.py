@@ -0,0 +1,51 @@
+import math
+
+import pytest
+
+from relic_engine.batch import STYLE_MEMBERS, STYLE_MULTIPLIERS, STYLES
+from relic_engine.sources import expected_runs, run_chance
+
+
+@pytest.mark.parametrize('style', STYLES)
+def test_runs_count_every_reward_of_the_style(style):
+    draws = STYLE_MEMBERS[STYLES.index(style)] * STYLE_MULTIPLIERS[STYLES.index(style)]
+
+    assert run_chance(0.1, style) == pytest.approx(1 - 0.9 ** draws)
+    assert expected_runs(0.1, style) == pytest.approx(1 / (1 - 0.9 ** draws))
+    assert expected_runs(0.0, style) == math.inf
+
+
+def test_one_by_one_runs_farm_like_a_radshare():
+    # Four solo rewards per run see as many draws as one reward drawn by four members.
+    assert expected_runs(0.02, '1b1') == pytest.approx(expected_runs(0.02, '4b4'))
+    assert expected_runs(0.02, '3b3') == pytest.approx(expected_runs(0.02, '4b4'))
+    assert expected_runs(0.02, 'solo') > expected_runs(0.02, '1b1')
+    assert expected_runs(0.02, '8b8') < expected_runs(0.02, '4b4')
+
+
+def test_part_sources_use_the_style(engine):
+    relic = engine.get_relic_list()[0]
+    part = next(iter(engine.get_relic_drops(relic, 'Intact')))
+
+    for style in STYLES:
+        sources = engine.get_part_sources(part, style)
+        assert [source['expected_runs'] for source in sources] == sorted(source['expected_runs'] for source in sources)
+        for source in sources:
+            assert source['expected_runs'] == pytest.approx(expected_runs(source['chance'], style))
+
+    assert engine.get_best_source(part, '1b1')['expected_runs'] < engine.get_best_source(part, 'solo')['expected_runs']
+
+
+def test_farming_plan_uses_the_style(engine):
+    relic = engine.get_relic_list()[0]
+    part = next(part for part in engine.get_relic_drops(relic, 'Intact') if 'Forma' not in part)
+    set_name = engine.get_set_name(part)
+
+    solo = engine.get_farming_plan(set_name, style='solo')
+    one_by_one = engine.get_farming_plan(set_name, style='1b1')
+
+    assert one_by_one['expected_runs'] < solo['expected_runs']
+    for entry in one_by_one['parts']:
+        if entry['source']:
+            assert entry['expected_runs'] == pytest.approx(
+                entry['missing'] * expected_runs(entry['source']['chance'], '1b1'))
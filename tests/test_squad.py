@@ -0,0 +1,48 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from relic_engine import REFINEMENTS
+from relic_engine.batch import STYLE_MEMBERS, STYLE_MULTIPLIERS, STYLES
+
+
+@pytest.mark.parametrize('refinement', REFINEMENTS)
+@pytest.mark.parametrize('style', STYLES)
+def test_same_refinement_squad_reduces_to_its_style(engine, refinement, style):
+    members = int(STYLE_MEMBERS[STYLES.index(style)])
+    table = engine.get_average_returns()
+
+    squad = engine.get_squad_returns([refinement] * members)
+
+    # A squad return is one reward; the style multiplier counts the rewards per run.
+    expected = table.values[:, REFINEMENTS.index(refinement), STYLES.index(style)] / STYLE_MULTIPLIERS[STYLES.index(style)]
+    np.testing.assert_allclose(squad, expected, rtol=1e-9, atol=1e-9)
+
+
+def test_mixed_squads_of_one_relic_match_get_squad_returns(engine):
+    relics = engine.get_relic_list()[:5]
+    refinements = ['Radiant', 'Intact', 'Intact', 'Flawless']
+    rows = [engine.get_batch_arrays().relic_ids[relic] for relic in relics]
+
+    mixed = engine.get_mixed_squad_returns([[(relic, refinement) for refinement in refinements] for relic in relics])
+
+    np.testing.assert_allclose(mixed, engine.get_squad_returns(refinements)[rows], rtol=1e-9)
+
+
+def test_mixed_relic_squad_matches_enumeration(engine):
+    relics = engine.get_relic_list()
+    members = [(relics[0], 'Radiant'), (relics[1], 'Intact'), (relics[2], 'Exceptional')]
+    arrays = engine.get_batch_arrays()
+    values = arrays.slot_values(arrays.prices)
+
+    # Every combination of one slot per member, weighted by its chance; the squad takes the best drop.
+    outcomes = []
+    for relic, refinement in members:
+        row = arrays.relic_ids[relic]
+        outcomes.append(list(zip(values[row], arrays.chances[row, REFINEMENTS.index(refinement)])))
+    expected = sum(max(value for value, _ in combination) * np.prod([chance for _, chance in combination])
+                   for combination in itertools.product(*outcomes))
+
+    assert engine.get_mixed_squad_returns([members, members[:1]])[0] == pytest.approx(expected, rel=1e-9)
+    assert engine.get_squad_return(members) == round(expected, 3)